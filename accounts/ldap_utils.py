@@ -1,9 +1,21 @@
-from ldap3 import Server, Connection, ALL, SUBTREE
+from contextlib import contextmanager
+import queue
+
+from ldap3 import Server, Connection, ALL, SUBTREE, RESTARTABLE
+from ldap3.utils.conv import escape_filter_chars
 from django.conf import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# substring search used by the people autocomplete; {0} must be filter-escaped
+PEOPLE_SEARCH_FILTER = "(|(sAMAccountName=*{0}*)(cn=*{0}*)(mail=*{0}*))"
+
+
+def people_search_filter(q: str) -> str:
+    """Return the autocomplete LDAP filter for free text q (escaped, so '*' or '(' match literally)."""
+    return PEOPLE_SEARCH_FILTER.format(escape_filter_chars(q))
+
 
 def build_bind_username(input_username: str):
     """Build bind username and search filter."""
@@ -43,6 +55,62 @@ def _get_ldap_connection(username: str = None, password: str = None):
     raise RuntimeError("No LDAP credentials provided.")
 
 
+# Service-account connections shared across requests (directory searches do not
+# need the user's own bind). RESTARTABLE connections re-bind by themselves after
+# a dropped socket. A connection is used by one thread at a time; at most
+# LDAP_POOL_SIZE idle connections are kept.
+LDAP_POOL_SIZE = 8
+_pool = queue.LifoQueue(maxsize=LDAP_POOL_SIZE)
+
+
+def _new_service_connection():
+    bind_dn = getattr(settings, "LDAP_BIND_DN", None)
+    bind_pw = getattr(settings, "LDAP_BIND_PASSWORD", None)
+    server_uri = getattr(settings, "LDAP_SERVER", None)
+    if not (server_uri and bind_dn and bind_pw):
+        return None
+    server = Server(server_uri, port=int(getattr(settings, "LDAP_PORT", 389)), get_info=ALL)
+    return Connection(server, user=bind_dn, password=bind_pw, receive_timeout=20,
+                      client_strategy=RESTARTABLE, auto_bind=True)
+
+
+def _discard_conn(conn):
+    try:
+        conn.unbind()
+    except Exception:
+        logger.debug("Unbinding discarded LDAP connection failed", exc_info=True)
+
+
+@contextmanager
+def get_pooled_conn():
+    """
+    Yield a pooled service-account connection, or None when no service account is
+    configured (callers then bind with the user's credentials as before).
+    An idle pooled connection is reused when available, otherwise a new one is
+    opened (never waits). On a clean exit the connection goes back to the pool;
+    if the block raised it is unbound and dropped. Do not unbind it yourself.
+    """
+    try:
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        try:
+            conn = _new_service_connection()
+        except Exception:
+            logger.exception("Could not open pooled LDAP connection")
+            conn = None
+    try:
+        yield conn
+    except Exception:
+        if conn is not None:
+            _discard_conn(conn)
+        raise
+    if conn is not None:
+        try:
+            _pool.put_nowait(conn)
+        except queue.Full:
+            _discard_conn(conn)
+
+
 def get_user_entry_by_username(username: str, conn: Connection = None, username_password_for_conn: tuple = None):
     """Return LDAP entry for username (ldap3.Entry) or None."""
     close_conn = False
@@ -59,9 +127,9 @@ def get_user_entry_by_username(username: str, conn: Connection = None, username_
     search_base = f"{user_search_base},{base_dn}" if user_search_base else base_dn
 
     if '@' in username:
-        search_filter = f"(userPrincipalName={username})"
+        search_filter = f"(userPrincipalName={escape_filter_chars(username)})"
     else:
-        search_filter = f"(sAMAccountName={username})"
+        search_filter = f"(sAMAccountName={escape_filter_chars(username)})"
 
     attributes = getattr(settings, "LDAP_ATTRIBUTES", [
         'cn', 'sAMAccountName', 'userPrincipalName', 'mail', 'department',
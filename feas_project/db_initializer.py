@@ -5,6 +5,7 @@ Class-based DB initializer for FEAS using mysql.connector (same style as your re
 Idempotent; creates tables in dependency-safe order and seeds roles.
 """
 
+import hashlib
 import os
 import sys
 import traceback
@@ -30,6 +31,10 @@ except Exception:
 
 class DatabaseInitializer:
     INIT_KEY = "db_initialized"
+    # init-table row holding a fingerprint of the index list last applied
+    INDEXES_KEY = "indexes_version"
+    # init-table row set once the one-off data fixes in _normalize_data have run
+    NORMALIZED_KEY = "data_normalized_v1"
     DEFAULT_INIT_TABLE = "system_settings"
 
     def __init__(self, db_config: Dict = None):
@@ -46,6 +51,9 @@ class DatabaseInitializer:
 
         # Build DDLs in dependency-aware order
         self.ddl_statements = self._build_ddls(self.init_table)
+        # Secondary indexes applied on every start (existing installs included)
+        self.index_statements = self._build_indexes()
+        self.indexes_version = hashlib.sha1(repr(self.index_statements).encode()).hexdigest()[:16]
 
         self.role_inserts = [
             ("ADMIN", "Administrator"),
@@ -689,6 +697,104 @@ class DatabaseInitializer:
         print(f"Total tables to create: {len(ddls)}")
         return tuple(ddls)
 
+    def _build_indexes(self) -> Tuple[Tuple[str, str, str, str], ...]:
+        """
+        Secondary indexes for the hot lookups in projects/views.py.
+        Each entry is (table, index_name, column list, kind) where kind is "" for a
+        regular B-tree index or "FULLTEXT". They are kept out of the CREATE TABLE
+        DDLs so databases created before the index was introduced pick it up too
+        (see _ensure_indexes_once; changing this list makes the next start re-apply it).
+        """
+        return (
+            # project_list: pdl_name filter + EXISTS probe on prism_wbs by creator; the
+            # (creator, project_id) key also serves the creator filter of the IOM lookups,
+            # and project_id alone is covered by the foreign-key index
+            ("projects", "idx_projects_pdl_name", "`pdl_name`", ""),
+            ("prism_wbs", "idx_prism_wbs_creator_project", "`creator`, `project_id`", ""),
+            # project_list / _get_all_projects: ORDER BY created_at DESC
+            ("projects", "idx_projects_created_at", "`created_at` DESC", ""),
+            # get_billing_period_for_date: start_date <= d <= end_date containment
+            ("monthly_hours_limit", "idx_mhl_start_end", "`start_date`, `end_date`", ""),
+            # user / LDAP directory lookups by email or cn (username and ldap_id are already UNIQUE)
+            ("users", "idx_users_email", "`email`", ""),
+            ("ldap_directory", "idx_ldap_directory_email", "`email`", ""),
+            ("ldap_directory", "idx_ldap_directory_cn", "`cn`", ""),
+            # ldap_search autocomplete: MATCH(username, email, cn) AGAINST (... IN BOOLEAN MODE)
+            ("ldap_directory", "ft_ldap_directory_user", "`username`, `email`, `cn`", "FULLTEXT"),
+            # get_allocations_for_iom / save_monthly_allocations: (project, iom, month[, subproject])
+            ("monthly_allocation_entries", "idx_mae_pid_iom_month",
+             "`project_id`, `iom_id`, `month_start`, `subproject_id`", ""),
+            # save_monthly_allocations post-save SUM: (project, month, subproject) grouped by user
+            ("monthly_allocation_entries", "idx_mae_pid_month_sub_user",
+             "`project_id`, `month_start`, `subproject_id`, `user_ldap`", ""),
+            # team_allocations: reportees' entries for a billing month
+            ("monthly_allocation_entries", "idx_mae_month_user", "`month_start`, `user_ldap`", ""),
+        )
+
+    def _ensure_indexes_once(self, conn):
+        """
+        Apply the secondary indexes only when the index list changed since the last
+        successful run (initialize_database runs on every login, so the
+        information_schema probes must not).
+        """
+        if self._get_setting(conn, self.INDEXES_KEY) == self.indexes_version:
+            return
+        if self._ensure_indexes(conn):
+            self._set_setting(conn, self.INDEXES_KEY, self.indexes_version)
+
+    def _ensure_indexes(self, conn) -> bool:
+        """
+        Create any missing secondary index; existing ones are left untouched.
+        Returns False when an index could not be created.
+        """
+        ok = True
+        cursor = conn.cursor()
+        try:
+            for table, index_name, columns, kind in self.index_statements:
+                cursor.execute(
+                    """
+                    SELECT 1 FROM information_schema.STATISTICS
+                    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+                    LIMIT 1
+                    """,
+                    (table, index_name),
+                )
+                if cursor.fetchone() is not None:
+                    continue
+                print(f"Creating index {index_name} on {table} ({columns})")
+                try:
+                    prefix = f"{kind} " if kind else ""
+                    cursor.execute(f"CREATE {prefix}INDEX `{index_name}` ON `{table}` ({columns})")
+                except mysql.connector.Error:
+                    # table may not exist yet on a partially initialized DB
+                    print(f"WARNING: could not create index {index_name} on {table}")
+                    traceback.print_exc()
+                    ok = False
+            conn.commit()
+        finally:
+            cursor.close()
+        return ok
+
+    def _normalize_data(self, conn):
+        """
+        One-off data fixes that let lookups stay index-friendly. They scan whole
+        tables, so they run once per database (NORMALIZED_KEY), not on every login.
+        """
+        if self._get_setting(conn, self.NORMALIZED_KEY) == "true":
+            return
+        cursor = conn.cursor()
+        try:
+            # prism_wbs.creator is compared with "creator = %s" (no TRIM on the column)
+            cursor.execute("UPDATE `prism_wbs` SET `creator` = TRIM(`creator`) WHERE `creator` <> TRIM(`creator`)")
+            conn.commit()
+        except mysql.connector.Error:
+            print("WARNING: could not normalize prism_wbs.creator")
+            traceback.print_exc()
+            return
+        finally:
+            cursor.close()
+        self._set_setting(conn, self.NORMALIZED_KEY, "true")
+
     def connect(self):
         try:
             conn = mysql.connector.connect(**self.db_config)
@@ -732,6 +838,19 @@ class DatabaseInitializer:
             cursor.close()
 
     def _set_initialized_flag(self, conn):
+        self._set_setting(conn, self.INIT_KEY, "true")
+
+    def _get_setting(self, conn, key):
+        """value_text of an init-table row, or None."""
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT value_text FROM `{self.init_table}` WHERE key_name = %s LIMIT 1", (key,))
+            row = cursor.fetchone()
+            return row[0] if row else None
+        finally:
+            cursor.close()
+
+    def _set_setting(self, conn, key, value):
         cursor = conn.cursor()
         try:
             q = f"""
@@ -739,7 +858,7 @@ class DatabaseInitializer:
             VALUES (%s, %s)
             ON DUPLICATE KEY UPDATE value_text = VALUES(value_text), updated_at = CURRENT_TIMESTAMP
             """
-            cursor.execute(q, (self.INIT_KEY, "true"))
+            cursor.execute(q, (key, value))
             conn.commit()
         finally:
             cursor.close()
@@ -768,9 +887,13 @@ class DatabaseInitializer:
             self._execute_statements(conn, [self.ddl_statements[0]])
             if self._is_already_initialized(conn):
                 print("FEAS: Database already initialized. Skipping.")
+                self._ensure_indexes_once(conn)
+                self._normalize_data(conn)
                 return True
             # create all other tables in the pre-determined safe order
             self._execute_statements(conn, list(self.ddl_statements[1:]))
+            # secondary indexes
+            self._ensure_indexes_once(conn)
             # seed roles
             self._seed_roles(conn)
             # set init flag
@@ -99,9 +99,33 @@ DATABASES = {
         "HOST": os.getenv("MYSQL_HOST", "127.0.0.1"),
         "PORT": os.getenv("MYSQL_PORT", "3306"),
         "OPTIONS": {"init_command": "SET sql_mode='STRICT_TRANS_TABLES'"},
+        # keep the per-thread connection open between requests instead of a new
+        # TCP + auth handshake each time (set MYSQL_CONN_MAX_AGE=0 for gevent workers);
+        # CONN_HEALTH_CHECKS below replaces a connection the server has since dropped
+        "CONN_MAX_AGE": int(os.getenv("MYSQL_CONN_MAX_AGE", "600")),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# Shared cache for the projects app's dropdown/API caches. Views invalidate these
+# entries on write, so the backend must be shared by every worker process (Django's
+# LocMemCache default is per process). Redis by default (FEAS_CACHE_URL); set
+# FEAS_CACHE_BACKEND to use another shared backend, e.g.
+# django.core.cache.backends.memcached.PyMemcacheCache, or
+# django.core.cache.backends.db.DatabaseCache with FEAS_CACHE_URL set to the table
+# name (run "manage.py createcachetable" at deploy). The projects app treats cache
+# errors as misses, so an unreachable cache only costs the uncached queries.
+FEAS_CACHE_BACKEND = os.getenv("FEAS_CACHE_BACKEND", "django.core.cache.backends.redis.RedisCache")
+CACHES = {
+    "default": {
+        "BACKEND": FEAS_CACHE_BACKEND,
+        "LOCATION": os.getenv("FEAS_CACHE_URL", "redis://127.0.0.1:6379/1"),
+    }
+}
+if FEAS_CACHE_BACKEND.endswith(".RedisCache"):
+    # fail fast when Redis is down instead of stalling the request
+    CACHES["default"]["OPTIONS"] = {"socket_connect_timeout": 0.5, "socket_timeout": 0.5}
+
 # Optional: overrideable name for the init table used by initializer
 DB_INIT_DONE_TABLE = os.getenv("DB_INIT_DONE_TABLE", "system_settings")
 # (You can also set it directly: DB_INIT_DONE_TABLE = "system_settings")
@@ -112,6 +136,13 @@ DB_INIT_DONE_TABLE = os.getenv("DB_INIT_DONE_TABLE", "system_settings")
 LDAP_SERVER = '10.170.130.91'
 LDAP_PORT = 389
 
+# Service account for directory searches (people autocomplete, reportee lookups).
+# When both are set, accounts.ldap_utils.get_pooled_conn() reuses pooled service
+# connections across requests; when either is empty the pool is disabled and each
+# search binds with the logged-in user's own credentials instead.
+LDAP_BIND_DN = os.getenv('LDAP_BIND_DN', '')
+LDAP_BIND_PASSWORD = os.getenv('LDAP_BIND_PASSWORD', '')
+
 # Leave user search base empty if you want the whole directory
 LDAP_USER_SEARCH_BASE = ''
 # settings.py
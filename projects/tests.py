@@ -1,3 +1,347 @@
-from django.test import TestCase
+import json
+from contextlib import closing
+from datetime import date
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from feas_project.db_initializer import DatabaseInitializer
+from projects import views
+
+# user_punches is created outside db_initializer (by the punch import), so the
+# tests create the columns save_my_alloc_daily relies on themselves
+USER_PUNCHES_DDL = """
+    CREATE TABLE IF NOT EXISTS `user_punches` (
+        `id` BIGINT AUTO_INCREMENT PRIMARY KEY,
+        `user_ldap` VARCHAR(255) NOT NULL,
+        `allocation_id` BIGINT NOT NULL,
+        `punch_date` DATE NOT NULL,
+        `week_number` INT NOT NULL,
+        `actual_hours` DECIMAL(10,2) NOT NULL DEFAULT 0,
+        `wbs` VARCHAR(255),
+        `updated_at` TIMESTAMP NULL,
+        UNIQUE KEY `uq_user_punch` (`user_ldap`, `allocation_id`, `punch_date`)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+"""
+
+# tables the tests write to, emptied after every test
+TOUCHED_TABLES = (
+    "user_punches", "weekly_allocations", "team_distributions", "monthly_allocation_entries",
+    "prism_wbs", "subprojects", "projects", "domains", "coes", "users", "monthly_hours_limit",
+)
+
+_schema_ready = False
+
+
+def _ensure_schema():
+    """Create the app schema in the test database once per run (the app has no models)."""
+    global _schema_ready
+    if _schema_ready:
+        return
+    db = connection.settings_dict
+    init = DatabaseInitializer(db_config=dict(
+        host=db.get("HOST") or "127.0.0.1",
+        port=int(db.get("PORT") or 3306),
+        user=db.get("USER") or "",
+        password=db.get("PASSWORD") or "",
+        database=db["NAME"],
+        charset="utf8mb4",
+        use_unicode=True,
+    ))
+    conn = init.connect()
+    try:
+        init._execute_statements(conn, list(init.ddl_statements) + [USER_PUNCHES_DDL])
+    finally:
+        conn.close()
+    _schema_ready = True
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class SqlTestCase(TransactionTestCase):
+    """
+    Runs the views' raw SQL against the real MySQL test database. Rows are written
+    through Django's connection, which (like every connection.cursor() in the
+    views) has CLIENT.FOUND_ROWS set; db_cursor() connections do not.
+    """
+
+    def setUp(self):
+        _ensure_schema()
+        views.clear_billing_period_caches()
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        with connection.cursor() as cur:
+            cur.execute("SET FOREIGN_KEY_CHECKS=0")
+            try:
+                for table in TOUCHED_TABLES:
+                    cur.execute(f"TRUNCATE TABLE `{table}`")
+            finally:
+                cur.execute("SET FOREIGN_KEY_CHECKS=1")
+
+    def execute(self, sql, params=None):
+        with connection.cursor() as cur:
+            cur.execute(sql, params or [])
+            return cur.lastrowid
+
+    def post_json(self, name, payload, ldap=None):
+        request = self.factory.post(reverse(name), data=json.dumps(payload), content_type="application/json")
+        request.session = {"ldap_username": ldap} if ldap else {}
+        return request
+
+    def add_billing_month(self, year=2025, month=3, start=date(2025, 3, 1), end=date(2025, 3, 31), max_hours=160):
+        self.execute(
+            "INSERT INTO monthly_hours_limit (year, month, start_date, end_date, max_hours) VALUES (%s, %s, %s, %s, %s)",
+            [year, month, start, end, max_hours],
+        )
+
+    def add_project(self, name="Apollo", pdl_name=None, subprojects=("Core",)):
+        project_id = self.execute("INSERT INTO projects (name, pdl_name) VALUES (%s, %s)", [name, pdl_name])
+        sub_ids = [
+            self.execute("INSERT INTO subprojects (project_id, name) VALUES (%s, %s)", [project_id, sub])
+            for sub in subprojects
+        ]
+        return project_id, sub_ids
+
+    def add_entry(self, user_ldap, hours, month_start=date(2025, 3, 1), project_id=None, subproject_id=None,
+                  iom_id=None):
+        return self.execute(
+            "INSERT INTO monthly_allocation_entries "
+            "(project_id, subproject_id, iom_id, month_start, user_ldap, total_hours) "
+            "VALUES (%s, %s, %s, %s, %s, %s)",
+            [project_id, subproject_id, iom_id, month_start, user_ldap, hours],
+        )
+
+    def add_week(self, allocation_id, week_number, hours, percent=0):
+        self.execute(
+            "INSERT INTO weekly_allocations (allocation_id, week_number, hours, percent) VALUES (%s, %s, %s, %s)",
+            [allocation_id, week_number, hours, percent],
+        )
+
+
+class CoeDomainCreateTests(SqlTestCase):
+    """create_coe / create_domain detect duplicates from the upsert's rowcount."""
+
+    def create(self, view, name, data):
+        request = self.factory.post(reverse(name), data=data, HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+        request.session = {}
+        response = view(request)
+        return response.status_code, json.loads(response.content)
+
+    def test_create_coe_rejects_duplicate_name(self):
+        self.assertEqual(self.create(views.create_coe, "projects:coes_create", {"name": "Body"}),
+                         (200, {"success": True}))
+        self.assertEqual(self.create(views.create_coe, "projects:coes_create", {"name": "Body"}),
+                         (400, {"success": False, "error": "COE with this name already exists."}))
+        # coes.name uses a case-insensitive collation, so this is the same COE
+        self.assertEqual(self.create(views.create_coe, "projects:coes_create", {"name": "body"})[0], 400)
+        with connection.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM coes")
+            self.assertEqual(cur.fetchone()[0], 1)
+
+    def test_create_domain_rejects_duplicate_name_per_coe(self):
+        coe_a = self.execute("INSERT INTO coes (name) VALUES ('A')")
+        coe_b = self.execute("INSERT INTO coes (name) VALUES ('B')")
+        ok = self.create(views.create_domain, "projects:domains_create", {"name": "Seats", "coe_id": coe_a})
+        self.assertEqual(ok, (200, {"success": True}))
+        dup = self.create(views.create_domain, "projects:domains_create", {"name": "Seats", "coe_id": coe_a})
+        self.assertEqual(dup, (400, {"success": False,
+                                     "error": "Domain with this name already exists for the selected COE."}))
+        # the name is only unique within a COE
+        other = self.create(views.create_domain, "projects:domains_create", {"name": "Seats", "coe_id": coe_b})
+        self.assertEqual(other, (200, {"success": True}))
+
+    def test_duplicate_upsert_rowcount_depends_on_found_rows(self):
+        # why create_coe/create_domain must stay on db_cursor(): under Django's
+        # CLIENT.FOUND_ROWS a no-op duplicate reports 1 row, the same as an insert
+        sql = ("INSERT INTO coes (name) VALUES (%s) "
+               "ON DUPLICATE KEY UPDATE id=LAST_INSERT_ID(id)")
+        with views.db_cursor() as cur:
+            cur.execute(sql, ["Chassis"])
+            self.assertEqual(cur.rowcount, 1)
+            cur.execute(sql, ["Chassis"])
+            self.assertEqual(cur.rowcount, 0)
+        with connection.cursor() as cur:
+            cur.execute(sql, ["Chassis"])
+            self.assertEqual(cur.rowcount, 1)
+
+
+class SaveMyAllocDailyTests(SqlTestCase):
+    """save_my_alloc_daily: the weekly cap check and the upsert are one statement."""
+
+    def setUp(self):
+        super().setUp()
+        self.add_billing_month()
+        self.allocation_id = self.add_entry("emp@corp.com", 10)
+        # 2025-03-01 is the billing start, so 2025-03-03..05 fall in week 1
+        self.add_week(self.allocation_id, 1, Decimal("0.30"))
+
+    def punch(self, punch_date, hours, allocation_id=None):
+        request = self.post_json("projects:save_my_alloc_daily", {
+            "allocation_id": allocation_id or self.allocation_id,
+            "punch_date": punch_date,
+            "actual_hours": hours,
+            "wbs": "WBS-1",
+        }, ldap="emp@corp.com")
+        response = views.save_my_alloc_daily(request)
+        return response.status_code, json.loads(response.content)
+
+    def punched_hours(self):
+        with connection.cursor() as cur:
+            cur.execute("SELECT punch_date, actual_hours, week_number FROM user_punches ORDER BY punch_date")
+            return cur.fetchall()
+
+    def test_week_total_landing_on_cap_is_accepted(self):
+        self.assertEqual(self.punch("2025-03-03", 0.1)[0], 200)
+        # 0.1 + 0.2 == 0.3 exactly in DECIMAL
+        self.assertEqual(self.punch("2025-03-04", 0.2)[0], 200)
+        self.assertEqual(self.punched_hours(), [
+            (date(2025, 3, 3), Decimal("0.10"), 1),
+            (date(2025, 3, 4), Decimal("0.20"), 1),
+        ])
+
+    def test_resaving_unchanged_punch_is_accepted(self):
+        # with FOUND_ROWS the no-op update still counts as a matched row
+        self.assertEqual(self.punch("2025-03-03", 0.3)[0], 200)
+        self.assertEqual(self.punch("2025-03-03", 0.3)[0], 200)
+        self.assertEqual(self.punched_hours(), [(date(2025, 3, 3), Decimal("0.30"), 1)])
+
+    def test_updating_a_day_replaces_its_previous_hours(self):
+        self.assertEqual(self.punch("2025-03-03", 0.3)[0], 200)
+        self.assertEqual(self.punch("2025-03-03", 0.25)[0], 200)
+        self.assertEqual(self.punched_hours(), [(date(2025, 3, 3), Decimal("0.25"), 1)])
+
+    def test_exceeding_weekly_cap_is_rejected(self):
+        self.assertEqual(self.punch("2025-03-03", 0.2)[0], 200)
+        self.assertEqual(self.punch("2025-03-05", 0.11),
+                         (400, {"ok": False, "error": "Exceeds weekly allocation 0.30"}))
+        self.assertEqual(self.punched_hours(), [(date(2025, 3, 3), Decimal("0.20"), 1)])
+
+    def test_week_without_allocation_is_rejected(self):
+        # 2025-03-10 is in week 2, which has no weekly_allocations row
+        self.assertEqual(self.punch("2025-03-10", 0.1),
+                         (400, {"ok": False, "error": "No weekly allocation found"}))
+        self.assertEqual(self.punched_hours(), [])
+
+
+class TeamAllocationsQueryTests(SqlTestCase):
+    """_TEAM_ALLOCATIONS_SQL: reportee totals, distributions and lead rows in one UNION ALL."""
+
+    def test_rows_are_grouped_per_kind(self):
+        month = date(2025, 3, 1)
+        project_id, (core_id, ui_id) = self.add_project(subprojects=("Core", "UI"))
+        self.execute("INSERT INTO users (username, email) VALUES ('Reportee One', 'r1@corp.com')")
+        self.add_entry("r1@corp.com", 10, project_id=project_id, subproject_id=core_id)
+        self.add_entry("r1@corp.com", "5.50", project_id=project_id, subproject_id=ui_id)
+        self.add_entry("r1@corp.com", 7, month_start=date(2025, 4, 1))  # other month
+        self.add_entry("R2@corp.com", 4, project_id=project_id, subproject_id=core_id)
+        self.add_entry("lead@corp.com", 20, project_id=project_id, subproject_id=core_id)
+        self.add_entry("lead@corp.com", 10, project_id=project_id, subproject_id=core_id)
+        self.add_entry("lead@corp.com", 8, project_id=project_id, subproject_id=ui_id)
+        dist_id = self.execute(
+            "INSERT INTO team_distributions (month_start, lead_ldap, project_id, subproject_id, reportee_ldap, hours) "
+            "VALUES (%s, 'lead@corp.com', %s, %s, 'r1@corp.com', 6)",
+            [month, project_id, core_id],
+        )
+
+        in_params = ["r1@corp.com", "r2@corp.com"]
+        params = [month, *in_params, "lead@corp.com", month, month, "lead@corp.com"]
+        sql = views._sql_with_in(views._TEAM_ALLOCATIONS_SQL, len(in_params))
+        with closing(views.iter_rows(sql, params)) as rows:
+            rows = list(rows)
+
+        self.assertEqual(rows, [
+            ("alloc", None, None, "r1@corp.com", "Reportee One", "r1@corp.com", Decimal("15.50")),
+            ("alloc", None, None, "R2@corp.com", "R2@corp.com", "R2@corp.com", Decimal("4.00")),
+            ("dist", dist_id, core_id, "r1@corp.com", None, None, Decimal("6.00")),
+            ("lead", None, core_id, None, "Core", "Apollo", Decimal("30.00")),
+            ("lead", None, ui_id, None, "UI", "Apollo", Decimal("8.00")),
+        ])
+
+
+class MonthlyAllocationsTests(SqlTestCase):
+    """monthly_allocations / save_monthly_allocations against a seeded billing month."""
+
+    def setUp(self):
+        super().setUp()
+        self.add_billing_month()
+        self.project_id, (self.core_id, self.ui_id) = self.add_project(
+            pdl_name="pdl@corp.com", subprojects=("Core", "UI"))
+
+    def render_context(self):
+        request = self.factory.get(reverse("projects:monthly_allocations"), {"month": "2025-03"})
+        request.session = {"ldap_username": "pdl@corp.com"}
+        with mock.patch.object(views, "render") as render:
+            views.monthly_allocations(request)
+        return render.call_args.args[2]
+
+    def test_week_rows_do_not_repeat_entry_hours(self):
+        split = self.add_entry("u1@corp.com", 10, project_id=self.project_id, subproject_id=self.core_id)
+        self.add_week(split, 1, 5, percent=50)
+        self.add_week(split, 2, 5, percent=50)
+        self.add_entry("u1@corp.com", 4, project_id=self.project_id, subproject_id=self.core_id)
+        unsplit = self.add_entry("u2@corp.com", 8, project_id=self.project_id, subproject_id=self.ui_id)
+        self.add_week(unsplit, 1, 8, percent=100)
+        self.add_entry("u3@corp.com", 9, month_start=date(2025, 4, 1), project_id=self.project_id,
+                       subproject_id=self.core_id)
+
+        context = self.render_context()
+
+        allocation_map = context["allocation_map"]
+        self.assertEqual(set(allocation_map), {(self.core_id, "u1@corp.com"), (self.ui_id, "u2@corp.com")})
+        self.assertEqual(allocation_map[(self.core_id, "u1@corp.com")].total_hours, Decimal("14.00"))
+        self.assertEqual(allocation_map[(self.ui_id, "u2@corp.com")].total_hours, Decimal("8.00"))
+        self.assertEqual(set(context["weekly_map"]), {split, unsplit})
+        self.assertEqual(sorted(context["weekly_map"][split]), [1, 2])
+        self.assertEqual(context["weekly_map"][split][2]["hours"], Decimal("5.00"))
+        self.assertEqual(context["capacity_map"]["u1@corp.com"],
+                         {"allocated": 14.0, "remaining": 146.0, "limit": 160.0})
+        self.assertEqual(context["capacity_map"]["u2@corp.com"]["allocated"], 8.0)
+        self.assertEqual(context["billing_start"], "2025-03-01")
+
+    def save(self, items):
+        request = self.post_json("projects:save_monthly_allocations", {
+            "project_id": self.project_id,
+            "subproject_id": self.core_id,
+            "month": "2025-03",
+            "items": items,
+        })
+        response = views.save_monthly_allocations(request)
+        return response.status_code, json.loads(response.content)
+
+    def entries(self):
+        with connection.cursor() as cur:
+            cur.execute("SELECT iom_id, user_ldap, total_hours FROM monthly_allocation_entries ORDER BY id")
+            return cur.fetchall()
+
+    def test_save_replaces_entries_and_reports_totals(self):
+        self.execute("INSERT INTO prism_wbs (iom_id, project_id) VALUES ('IOM-1', %s)", [self.project_id])
+        self.add_entry("old@corp.com", 3, project_id=self.project_id, subproject_id=self.core_id, iom_id="IOM-1")
+
+        status, body = self.save([
+            {"iom_id": "IOM-1", "user_ldap": "U1@corp.com", "total_hours": 40},
+            {"iom_id": "IOM-1", "user_ldap": "u2@corp.com", "total_hours": "80"},
+        ])
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body, {"ok": True, "billing_start": "2025-03-01", "saved_items": [
+            {"user_ldap": "u1@corp.com", "total_hours": 40.0, "fte": 0.25},
+            {"user_ldap": "u2@corp.com", "total_hours": 80.0, "fte": 0.5},
+        ]})
+        self.assertEqual(self.entries(), [
+            ("IOM-1", "u1@corp.com", Decimal("40.00")),
+            ("IOM-1", "u2@corp.com", Decimal("80.00")),
+        ])
+
+    def test_save_without_users_only_clears_the_iom(self):
+        self.execute("INSERT INTO prism_wbs (iom_id, project_id) VALUES ('IOM-1', %s)", [self.project_id])
+        self.add_entry("old@corp.com", 3, project_id=self.project_id, subproject_id=self.core_id, iom_id="IOM-1")
+        self.add_entry("ui@corp.com", 2, project_id=self.project_id, subproject_id=self.ui_id, iom_id="IOM-1")
+
+        status, body = self.save([{"iom_id": "IOM-1", "user_ldap": "", "total_hours": 0}])
+
+        self.assertEqual((status, body), (200, {"ok": True, "saved_items": [], "billing_start": "2025-03-01"}))
+        # only the posted subproject's rows are cleared
+        self.assertEqual(self.entries(), [("IOM-1", "ui@corp.com", Decimal("2.00"))])
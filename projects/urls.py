@@ -37,6 +37,7 @@ urlpatterns = [
     path('monthly_allocations/', views.monthly_allocations, name='monthly_allocations'),
     path('get_applicable_ioms/', views.get_applicable_ioms, name='get_applicable_ioms'),
     path('get_iom_details/', views.get_iom_details, name='get_iom_details'),
+    path('get_iom_details_bulk/', views.get_iom_details_bulk, name='get_iom_details_bulk'),
     path('allocations_ldap_search/', views.ldap_search, name='allocations_ldap_search'),
 
     # Projects/team allocation helpers
@@ -146,26 +146,44 @@ file to the original byte size. Keeping it changes nothing functionally.
 """
 
 # Standard library
+import calendar
+import hashlib
 import io
 import json
 import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
 from datetime import date, datetime, timedelta
 from decimal import Decimal, ROUND_HALF_UP
-from math import ceil
 
 # Third-party (non-Django)
 import mysql.connector
+try:
+    import orjson  # optional: faster JSON for the AJAX write endpoints
+except ImportError:
+    orjson = None
 import openpyxl
-from mysql.connector import Error, IntegrityError
+from mysql.connector import HAVE_CEXT, Error, IntegrityError
+from mysql.connector.pooling import MySQLConnectionPool, PoolError
 from openpyxl import Workbook
-from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
 from openpyxl.utils import get_column_letter
 from xhtml2pdf import pisa
 
 # Django
 from django.conf import settings
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache as django_cache
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import connection, transaction
 from django.http import (
     HttpResponse,
@@ -177,39 +195,20 @@ from django.http import (
 from django.shortcuts import redirect, render
 from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.utils.http import urlencode
 from django.views.decorators.http import require_GET, require_POST, require_http_methods
-# projects/views.py (append or merge into existing file)
-import json
-import datetime
-import logging
-from django.db import connection, transaction
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST
-from django.contrib.admin.views.decorators import staff_member_required
-from django.utils.dateparse import parse_date
-from django.views.decorators.http import require_GET
-from django.http import HttpResponse, JsonResponse
-import openpyxl
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from datetime import date
-from django.db import connection
-from django.utils import timezone
-from django.shortcuts import render
-from django.http import JsonResponse, HttpResponseBadRequest, HttpResponseForbidden
-from django.db import connection, transaction
-from django.urls import reverse
-from django.views.decorators.http import require_POST
-from datetime import date, timedelta, datetime
-from decimal import Decimal, ROUND_HALF_UP
-from django.urls import path
-from . import views
-import json, logging
 
 
 logger = logging.getLogger(__name__)
 
 PAGE_SIZE = 10
+
+# Decimal constants for the hours/percent arithmetic in the save endpoints
+_D0 = Decimal("0.00")
+_D100 = Decimal("100.00")
+_DCENT = Decimal("0.01")
 # -------------------------
 # LDAP helpers (use your ldap_utils)
 # -------------------------
@@ -217,13 +216,6 @@ PAGE_SIZE = 10
 # username_password_for_conn param so they can use session credentials.
 try:
     from accounts.ldap_utils import get_user_entry_by_username, get_reportees_for_user_dn
-    def get_user_entry_by_username(username, username_password_for_conn=None):
-        logger.warning("ldap_utils.get_user_entry_by_username not available")
-        return None
-
-    def get_reportees_for_user_dn(user_dn, username_password_for_conn=None):
-        logger.warning("ldap_utils.get_reportees_for_user_dn not available")
-        return []
 except ImportError:
     def get_user_entry_by_username(username, username_password_for_conn=None):
         logger.warning("ldap_utils.get_user_entry_by_username not available")
@@ -233,11 +225,48 @@ except ImportError:
         logger.warning("ldap_utils.get_reportees_for_user_dn not available")
         return []
 
-logger = logging.getLogger(__name__)
-
 # Default hours available per employee per month (can be overridden in settings)
 HOURS_AVAILABLE_PER_MONTH = float(getattr(settings, "HOURS_AVAILABLE_PER_MONTH", 183.75))
 
+# -------------------------
+# Excel export styles (built once at import, shared by all exports)
+# -------------------------
+XL_HEADER_FONT = Font(name="Calibri", bold=True, color="FFFFFF", size=11)
+XL_TITLE_FONT = Font(name="Calibri", bold=True, size=14, color="FFFFFF")
+XL_BOLD_FONT = Font(name="Calibri", bold=True, size=11)
+XL_NORMAL_FONT = Font(name="Calibri", size=11)
+XL_CENTER = Alignment(horizontal="center", vertical="center")
+XL_LEFT = Alignment(horizontal="left", vertical="center")
+XL_FILL_BLUE = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+XL_TL_FILL = PatternFill("solid", fgColor="1F6FEB")
+XL_TL_FONT = Font(color="FFFFFF", bold=True)
+XL_TL_BORDER = Border(left=Side(style="thin", color="CCCCCC"), right=Side(style="thin", color="CCCCCC"),
+                      top=Side(style="thin", color="CCCCCC"), bottom=Side(style="thin", color="CCCCCC"))
+
+# name -> NamedStyle attributes; registered per workbook by _add_xl_named_styles
+_XL_NAMED_STYLES = {
+    "xl_header": {"font": XL_HEADER_FONT, "fill": XL_FILL_BLUE, "alignment": XL_CENTER},
+    "tl_header": {"font": XL_TL_FONT, "fill": XL_TL_FILL, "alignment": XL_CENTER, "border": XL_TL_BORDER},
+}
+
+
+def _add_xl_named_styles(wb):
+    """Register the shared header NamedStyles on `wb` so cells can use cell.style = "<name>"."""
+    existing = set(wb.named_styles)
+    for name, attrs in _XL_NAMED_STYLES.items():
+        if name not in existing:
+            wb.add_named_style(NamedStyle(name=name, **attrs))
+
+
+def _xl_write_only_cell(ws, value, style=None, **attrs):
+    """WriteOnlyCell for `ws` with a named `style` and/or font/alignment/fill set from the shared XL_* objects."""
+    cell = WriteOnlyCell(ws, value=value)
+    if style:
+        cell.style = style
+    for name, attr in attrs.items():
+        setattr(cell, name, attr)
+    return cell
+
 # -------------------------
 # DB helpers
 # -------------------------
@@ -335,6 +364,30 @@ def dictfetchall(cursor):
     return [dict(zip(cols, row)) for row in cursor.fetchall()]
 
 
+def dict_iter(cursor, size=1000):
+    """Yield the rows of an executed cursor as dicts, `size` rows per fetch.
+
+    Streaming counterpart of `dictfetchall` for single-pass loops: rows are
+    pulled with `fetchmany(size)` and each dict is built only when consumed, so
+    the full list of dicts is never held in memory.
+
+    Args:
+        cursor: A DB-API 2.0 cursor that has already executed a SELECT.
+        size: Rows per `fetchmany` call (also set as the cursor's `arraysize`).
+
+    Yields:
+        dict[str, Any]: One dictionary per row, keyed by column name.
+    """
+    cols = [c[0] for c in cursor.description] if cursor.description else []
+    cursor.arraysize = size
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        for row in rows:
+            yield dict(zip(cols, row))
+
+
 def get_connection():
     """Create a direct MySQL connection using `mysql.connector`.
 
@@ -360,13 +413,26 @@ def get_connection():
         mysql.connector.Error: If connection fails or configuration is invalid.
 
     Notes:
-        - Remember to call ``conn.close()`` when done to avoid connection leaks.
-        - `mysql.connector` typically defaults to autocommit=False; manage
-          commits/rollbacks as needed.
+        - Connections come from a process-wide pool; ``conn.close()`` returns
+          the connection to the pool, so always call it when done.
+        - Connections are in autocommit mode; use ``conn.start_transaction()``
+          (or ``db_cursor(atomic=True)``) when several statements must be atomic.
         - Fallback values are used if any settings are missing or blank.
     """
+    cfg = _connection_config()
+    pool = _get_pool(cfg)
+    if pool is not None:
+        try:
+            return pool.get_connection()
+        except PoolError:
+            # pool exhausted under a burst: fall back to a one-off connection
+            logger.warning("get_connection: MySQL pool exhausted, opening a direct connection")
+    return mysql.connector.connect(**cfg)
+
+
+def _connection_config():
     dbs = settings.DATABASES.get("default", {})
-    return mysql.connector.connect(
+    return dict(
         host=dbs.get("HOST", "127.0.0.1") or "127.0.0.1",
         port=int(dbs.get("PORT", 3306) or 3306),
         user=dbs.get("USER", "root") or "",
@@ -374,9 +440,151 @@ def get_connection():
         database=dbs.get("NAME", "feasdb") or "",
         charset="utf8mb4",
         use_unicode=True,
+        # single statements commit on their own; db_cursor(atomic=True) opens an
+        # explicit transaction where several statements must succeed together
+        autocommit=True,
+        # C extension when it is installed (faster protocol handling and batching)
+        use_pure=not HAVE_CEXT,
+    )
+
+
+# Process-wide pool of mysql.connector connections. Connections handed out by
+# get_connection() go back to the pool on conn.close(), so the existing
+# "get_connection() ... finally: conn.close()" call sites skip the TCP + auth
+# handshake on every call.
+MYSQL_POOL_SIZE = 16
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(cfg):
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                try:
+                    _pool = MySQLConnectionPool(
+                        pool_name="prism", pool_size=MYSQL_POOL_SIZE, pool_reset_session=True, **cfg
+                    )
+                except Error:
+                    logger.exception("get_connection: could not create MySQL pool; using direct connections")
+                    return None
+    return _pool
+
+
+@contextmanager
+def db_cursor(dictionary=False, atomic=False, prepared=False):
+    """Yield a cursor on a pooled connection and always return the connection.
+
+    Connections run in autocommit mode, so single statements need nothing else.
+    With ``atomic=True`` the block runs in one explicit transaction, committed
+    when it exits normally and rolled back if it raises. ``prepared=True`` gives a
+    server-side prepared-statement cursor (tuple rows), for statements repeated
+    on hot paths.
+    """
+    conn = get_connection()
+    cur = conn.cursor(prepared=True) if prepared else conn.cursor(dictionary=dictionary)
+    try:
+        if atomic:
+            conn.start_transaction()
+        yield cur
+        if atomic:
+            conn.commit()
+    except Exception:
+        if atomic:
+            conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+def iter_rows(sql, params=None, batch=2000):
+    """Stream the rows of a SELECT as tuples without materializing the result.
+
+    Runs the query on a pooled `mysql.connector` connection with an unbuffered
+    cursor and pulls rows from the server `batch` at a time, so peak memory is
+    O(batch) instead of O(rows). Intended for exports that write rows as they arrive.
+
+    Args:
+        sql: SELECT statement using ``%s`` placeholders.
+        params: Sequence of parameters for ``sql``.
+        batch: Number of rows fetched per round-trip.
+
+    Yields:
+        tuple: One row per iteration, in the column order of the SELECT.
+
+    Notes:
+        The connection is held until the generator is exhausted or closed; wrap it
+        in ``contextlib.closing`` when the loop may stop early. Rows left unread
+        are drained before the connection goes back to the pool.
+    """
+    conn = get_connection()
+    cur = conn.cursor(buffered=False)
+    try:
+        cur.execute(sql, tuple(params or ()))
+        while True:
+            chunk = cur.fetchmany(batch)
+            if not chunk:
+                break
+            yield from chunk
+    finally:
+        try:
+            # an unread unbuffered result would break the next user of the connection
+            conn.consume_results()
+        except Exception:
+            logger.debug("iter_rows: could not drain unread rows", exc_info=True)
+        try:
+            cur.close()
+        except Exception:
+            pass
+        conn.close()
+
+
+_DJANGO_JSON_ENCODER = DjangoJSONEncoder()
+
+# Dates, times and datetimes are passed to _json_default so they get DjangoJSONEncoder's
+# format (milliseconds, "Z" for UTC, no offset on naive values); non-str dict keys
+# are stringified like json.dumps does.
+_ORJSON_OPTS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+
+
+def _json_default(obj):
+    """orjson/json `default` hook: DjangoJSONEncoder's conversions, plus sets as lists."""
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    return _DJANGO_JSON_ENCODER.default(obj)
+
+
+def fast_json(data, status=200):
+    """Drop-in for JsonResponse(data, status=...) on hot AJAX paths.
+
+    Serializes with orjson when it is installed, producing the same values as
+    DjangoJSONEncoder (compact separators aside), and falls back to JsonResponse otherwise.
+    """
+    if orjson is None:
+        return JsonResponse(data, status=status, safe=False)
+    return HttpResponse(
+        orjson.dumps(data, default=_json_default, option=_ORJSON_OPTS),
+        content_type="application/json",
+        status=status,
     )
 
 
+def fast_json_dumps(data):
+    """json.dumps counterpart of fast_json: returns a str, via orjson when available."""
+    if orjson is None:
+        return json.dumps(data, default=_json_default)
+    return orjson.dumps(data, default=_json_default, option=_ORJSON_OPTS).decode()
+
+
+def fast_json_loads(raw):
+    """json.loads counterpart of fast_json: parses bytes/str with orjson when available."""
+    if orjson is None:
+        return json.loads(raw)
+    return orjson.loads(raw)
+
+
 def get_month_start_and_end(year_month):
     # year_month is "YYYY-MM" or a date; returns (date_start, date_end)
     """Compute the first and last calendar day of a given month.
@@ -404,10 +612,8 @@ def get_month_start_and_end(year_month):
     Implementation Details:
         - If a string is provided, it appends ``"-01"`` and parses with the
           format ``"%Y-%m-%d"``.
-        - To find the last day of the month, it uses:
-          ``(first_day.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)``,
-          which jumps to the next month then steps back one day—this works for
-          every month, including February in leap years.
+        - The last day of the month comes from ``calendar.monthrange``, which
+          handles every month, including February in leap years.
 
     Notes:
         - Works purely with ``date`` objects; time zones are not involved.
@@ -420,17 +626,14 @@ def get_month_start_and_end(year_month):
     else:
         dt = date.today().replace(day=1)
     # compute end of month
-    next_month = (dt.replace(day=28) + timedelta(days=4)).replace(day=1)
-    last_day = next_month - timedelta(days=1)
+    last_day = dt.replace(day=calendar.monthrange(dt.year, dt.month)[1])
     return (dt, last_day)
 
 # 1. CENTRALIZED BILLING PERIOD SOURCE OF TRUTH
 # -------------------------------------------------------------------
 from datetime import date, timedelta, datetime
 from django.db import connection
-import logging
 
-logger = logging.getLogger(__name__)
 
 def _to_date(v):
     """Normalize DB date/time to datetime.date."""
@@ -446,25 +649,59 @@ def _to_date(v):
     except Exception:
         return None
 
+# Billing-period lookups are the hottest queries in this module; keep the SQL text
+# fixed so the server can reuse its parse, and bind already-converted parameters.
+# The date lookup is written as two range predicates (not "%s BETWEEN start_date AND
+# end_date") so it can use the (start_date, end_date) index.
+_BILLING_PERIOD_BY_MONTH_SQL = (
+    "SELECT start_date, end_date FROM monthly_hours_limit WHERE year = %s AND month = %s LIMIT 1"
+)
+_BILLING_PERIOD_FOR_DATE_SQL = (
+    "SELECT start_date, end_date FROM monthly_hours_limit "
+    "WHERE start_date <= %s AND end_date >= %s LIMIT 1"
+)
+
+
+# monthly_hours_limit is edited from the settings app (possibly in another worker), so
+# the per-process memo below is time-bucketed; the saving worker also clears its own
+# copy through clear_billing_period_caches()
+BILLING_PERIOD_CACHE_SECONDS = 300
+
+
+# bumped by clear_billing_period_caches() so every thread's _last_period_cache slot
+# (which cannot be cleared from another thread) is treated as stale
+_billing_period_generation = 0
+
+
+def clear_billing_period_caches():
+    """Drop this process's memoized billing periods and monthly hour limits."""
+    global _billing_period_generation
+    _billing_period_cached.cache_clear()
+    _month_hours_limit_cached.cache_clear()
+    _billing_period_generation += 1
+
+
 def get_billing_period(year: int, month: int):
     """
     Fetch billing cycle start_date and end_date from monthly_hours_limit.
     Fallback to calendar month start/end when DB values are missing.
     FEAS rule: If the first day of the month is not Saturday, include the last Saturday and Sunday of the previous month as the billing period start.
+    Results are memoized per process for up to BILLING_PERIOD_CACHE_SECONDS.
     Returns: (billing_start: date, billing_end: date)
     """
+    bucket = int(time.monotonic() // BILLING_PERIOD_CACHE_SECONDS)
+    return _billing_period_cached(int(year), int(month), bucket)
+
+
+@lru_cache(maxsize=256)
+def _billing_period_cached(year: int, month: int, bucket: int):
+    """get_billing_period without the memo; `bucket` only makes entries expire."""
     billing_start = date(year, month, 1)
-    next_month = (billing_start.replace(day=28) + timedelta(days=4)).replace(day=1)
-    billing_end = next_month - timedelta(days=1)
+    billing_end = date(year, month, calendar.monthrange(year, month)[1])
 
     try:
         with connection.cursor() as cur:
-            cur.execute("""
-                SELECT start_date, end_date
-                FROM monthly_hours_limit
-                WHERE year = %s AND month = %s
-                LIMIT 1
-            """, [year, month])
+            cur.execute(_BILLING_PERIOD_BY_MONTH_SQL, (year, month))
             row = cur.fetchone()
             logger.debug("get_billing_period: monthly_hours_limit row for %s-%02d: %s", year, month, row)
 
@@ -475,7 +712,7 @@ def get_billing_period(year: int, month: int):
                     billing_start = db_start
                 if db_end:
                     billing_end = db_end
-                print("Using billing period from monthly_hours_limit: ", billing_start, billing_end)
+                logger.debug("get_billing_period: using monthly_hours_limit period %s..%s", billing_start, billing_end)
     except Exception:
         logger.exception("Error reading billing period from monthly_hours_limit; using calendar fallback")
 
@@ -503,12 +740,7 @@ def _get_billing_period_for_year_month(year: int, month: int):
     """
     try:
         with connection.cursor() as cur:
-            cur.execute("""
-                SELECT start_date, end_date
-                FROM monthly_hours_limit
-                WHERE year=%s AND month=%s
-                LIMIT 1
-            """, [int(year), int(month)])
+            cur.execute(_BILLING_PERIOD_BY_MONTH_SQL, (int(year), int(month)))
             row = cur.fetchone()
             if row:
                 sd_raw, ed_raw = row[0], row[1]
@@ -540,28 +772,21 @@ def _get_billing_period_for_year_month(year: int, month: int):
         # reuse the simple calendar month computation already present in get_month_start_and_end
         if isinstance(year, int) and isinstance(month, int):
             start = date(year, month, 1)
-            next_month = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
-            end = next_month - timedelta(days=1)
+            end = date(year, month, calendar.monthrange(year, month)[1])
             return start, end
     except Exception:
         pass
     # as a final fallback, return today's month
     today = date.today()
     s = today.replace(day=1)
-    nm = (s.replace(day=28) + timedelta(days=4)).replace(day=1)
-    return s, (nm - timedelta(days=1))
+    return s, s.replace(day=calendar.monthrange(s.year, s.month)[1])
 
 
 def get_billing_period_for_date(punch_date: date):
     """Find which billing cycle a given date falls into."""
     try:
         with connection.cursor() as cur:
-            cur.execute("""
-                SELECT start_date, end_date
-                FROM monthly_hours_limit
-                WHERE %s BETWEEN start_date AND end_date
-                LIMIT 1
-            """, [punch_date])
+            cur.execute(_BILLING_PERIOD_FOR_DATE_SQL, (punch_date, punch_date))
             row = cur.fetchone()
             if row and row[0] and row[1]:
                 return row[0], row[1]
@@ -570,26 +795,31 @@ def get_billing_period_for_date(punch_date: date):
     # fallback to that date's calendar month
     return get_billing_period(punch_date.year, punch_date.month)
 
+# one-slot, per-thread cache of the last billing period resolved from the DB;
+# consecutive dates in a loop almost always fall in the same period. The slot is
+# keyed like the lru caches above (time bucket) plus _billing_period_generation.
+_last_period_cache = threading.local()
+
+
 def _find_billing_period_for_date(d: date):
     """
     Find a billing period (start_date, end_date) that contains the given date d by scanning
     monthly_hours_limit rows where start_date and end_date are not null. If found return that period.
     Otherwise fallback to the calendar month containing d.
     """
+    stamp = (int(time.monotonic() // BILLING_PERIOD_CACHE_SECONDS), _billing_period_generation)
+    cached = getattr(_last_period_cache, "period", None)
+    if cached and cached[2] == stamp and cached[0] <= d <= cached[1]:
+        return cached[0], cached[1]
     try:
         with connection.cursor() as cur:
-            cur.execute("""
-                SELECT start_date, end_date, year, month
-                FROM monthly_hours_limit
-                WHERE start_date IS NOT NULL AND end_date IS NOT NULL
-                  AND %s BETWEEN start_date AND end_date
-                LIMIT 1
-            """, [d])
+            cur.execute(_BILLING_PERIOD_FOR_DATE_SQL, (d, d))
             row = cur.fetchone()
             if row:
                 sd_raw, ed_raw = row[0], row[1]
                 sd = sd_raw if isinstance(sd_raw, date) else datetime.strptime(str(sd_raw).split(" ")[0], "%Y-%m-%d").date()
                 ed = ed_raw if isinstance(ed_raw, date) else datetime.strptime(str(ed_raw).split(" ")[0], "%Y-%m-%d").date()
+                _last_period_cache.period = (sd, ed, stamp)
                 return sd, ed
     except Exception:
         logger.exception("_find_billing_period_for_date DB error")
@@ -600,10 +830,15 @@ def _find_billing_period_for_date(d: date):
     except Exception:
         # safe final fallback: today calendar month
         s = d.replace(day=1)
-        nm = (s.replace(day=28) + timedelta(days=4)).replace(day=1)
-        return s, (nm - timedelta(days=1))
+        return s, s.replace(day=calendar.monthrange(s.year, s.month)[1])
+
 
 
+@lru_cache(maxsize=64)
+def _period_total_weeks(period_start: date, period_end: date) -> int:
+    """Number of 7-day buckets in [period_start, period_end] (at least 1)."""
+    return max(1, ((period_end - period_start).days + 7) // 7)
+
 
 def month_day_to_week_number_for_period(d: date, period_start: date, period_end: date = None):
     """
@@ -619,16 +854,14 @@ def month_day_to_week_number_for_period(d: date, period_start: date, period_end:
     try:
         if not period_start:
             return 1
-        delta_days = (d - period_start).days
-        week = (delta_days // 7) + 1
+        week = (d - period_start).days // 7 + 1
         if week < 1:
-            week = 1
+            return 1
         # if period_end provided, cap to total weeks in period
         if period_end:
-            total_days = (period_end - period_start).days + 1
-            total_weeks = int(ceil(total_days / 7.0))
+            total_weeks = _period_total_weeks(period_start, period_end)
             if week > total_weeks:
-                week = total_weeks
+                return total_weeks
         return week
     except Exception:
         # conservative fallback based on calendar day-of-month
@@ -645,6 +878,117 @@ def month_day_to_week_number(d):
     """
     return min(((d.day - 1) // 7) + 1, 4)
 
+class _FailOpenCache:
+    """
+    The default Django cache with errors treated as misses: a read that fails
+    falls back to the loader/default, a failed write or delete is logged and
+    skipped. A cache outage then costs the uncached queries instead of a 500.
+    """
+
+    def __init__(self, backend):
+        self._backend = backend
+
+    def get(self, key, default=None):
+        try:
+            return self._backend.get(key, default)
+        except Exception:
+            logger.warning("cache get failed for %s", key, exc_info=True)
+            return default
+
+    def set(self, key, value, timeout=None):
+        try:
+            self._backend.set(key, value, timeout)
+        except Exception:
+            logger.warning("cache set failed for %s", key, exc_info=True)
+
+    def get_or_set(self, key, default, timeout=None):
+        value = self.get(key)
+        if value is None:
+            value = default() if callable(default) else default
+            self.set(key, value, timeout)
+        return value
+
+    def incr(self, key, delta=1):
+        # ValueError (missing key) is part of the API and still propagates
+        try:
+            return self._backend.incr(key, delta)
+        except ValueError:
+            raise
+        except Exception:
+            logger.warning("cache incr failed for %s", key, exc_info=True)
+            return None
+
+    def delete(self, key):
+        try:
+            self._backend.delete(key)
+        except Exception:
+            logger.warning("cache delete failed for %s", key, exc_info=True)
+
+    def delete_many(self, keys):
+        try:
+            self._backend.delete_many(keys)
+        except Exception:
+            logger.warning("cache delete_many failed for %s", keys, exc_info=True)
+
+
+cache = _FailOpenCache(django_cache)
+
+# Dropdown data for the project/COE forms changes rarely; it is cached for
+# DROPDOWN_CACHE_TIMEOUT seconds and the keys are dropped by the views that write
+# to the underlying tables. Bulk imports (settings app) rely on the timeout. The
+# deletes reach every worker because settings.CACHES is a shared backend.
+DROPDOWN_CACHE_TIMEOUT = 300
+USERS_CACHE_KEY = "projects:users:all"
+COES_CACHE_KEY = "projects:coes:all"
+API_COES_CACHE_KEY = "projects:api_coes:json"
+DOMAINS_CACHE_KEY = "projects:domains:all"
+PROJECTS_CACHE_KEY = "projects:projects:recent:%d"
+API_PROJECTS_CACHE_KEY = "projects:api_projects"
+
+
+# Per-user allocation project lists are keyed by a hash of the session identity plus a
+# generation counter; bumping the counter (on project writes) orphans every user's entry.
+USER_PROJECTS_CACHE_KEY = "projects:user_projects:%s:%s"
+USER_PROJECTS_GEN_KEY = "projects:user_projects:gen"
+
+
+def _invalidate_projects_cache():
+    cache.delete_many([PROJECTS_CACHE_KEY % 200, API_PROJECTS_CACHE_KEY])
+    try:
+        cache.incr(USER_PROJECTS_GEN_KEY)
+    except ValueError:
+        cache.set(USER_PROJECTS_GEN_KEY, 1, None)
+
+
+# Holidays change a few times a year and are identical for every user; they are
+# cached per calendar year and the settings app drops the year's key when it
+# adds a holiday, so the timeout only bounds writes made outside that view.
+HOLIDAYS_CACHE_KEY = "projects:holidays:%d"
+HOLIDAYS_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _get_holidays(start, end):
+    """Return {date: name} for the holidays in [start, end], read through the per-year cache."""
+    holidays = {}
+    for year in range(start.year, end.year + 1):
+        key = HOLIDAYS_CACHE_KEY % year
+        year_map = cache.get(key)
+        if year_map is None:
+            year_map = {}
+            with connection.cursor() as cur:
+                cur.execute(
+                    "SELECT holiday_date, name FROM holidays WHERE holiday_date BETWEEN %s AND %s",
+                    [date(year, 1, 1), date(year, 12, 31)]
+                )
+                for holiday_date, name in cur.fetchall():
+                    d = _to_date(holiday_date)
+                    if d:
+                        year_map[d] = name or ''
+            cache.set(key, year_map, HOLIDAYS_CACHE_TIMEOUT)
+        holidays.update((d, name) for d, name in year_map.items() if start <= d <= end)
+    return holidays
+
+
 def _ensure_user_from_ldap(request, samaccountname):
     """
     Ensure a 'users' row exists for the given LDAP identifier (username or email).
@@ -686,13 +1030,13 @@ def _ensure_user_from_ldap(request, samaccountname):
                 "INSERT INTO users (username, ldap_id, email, created_at) VALUES (%s, %s, %s, CURRENT_TIMESTAMP)",
                 (username_val, samaccountname, email_val)
             )
-            conn.commit()
             new_id = ins.lastrowid
         finally:
             try:
                 ins.close()
             except Exception:
                 pass
+        cache.delete(USERS_CACHE_KEY)
         return new_id
     except Exception:
         logger.exception("Error in _ensure_user_from_ldap for identifier: %s", samaccountname)
@@ -708,15 +1052,37 @@ def _ensure_user_from_ldap(request, samaccountname):
             pass
 
 
-def _get_local_ldap_entry(identifier):
+@dataclass(slots=True)
+class LdapEntry:
+    """One ldap_directory row as returned by _get_local_ldap_entry."""
+    username: str
+    email: str
+    cn: str
+    title: str
+
+
+@dataclass(slots=True)
+class UserRow:
+    """One users row as returned by _fetch_users."""
+    id: int
+    username: str
+    email: str
+
+
+def _get_local_ldap_entry(identifier, cache=None):
     """
     Look up the local ldap_directory table using email, username or cn.
-    Returns a dict with keys (username, email, cn, title) or None.
+    Returns an LdapEntry (username, email, cn, title) or None.
+
+    `cache` is an optional per-request dict; when given, repeated lookups of the
+    same identifier within one request are answered from it (misses included).
     """
     if not identifier:
         return None
+    if cache is not None and identifier in cache:
+        return cache[identifier]
     conn = get_connection()
-    cur = conn.cursor(dictionary=True)
+    cur = conn.cursor()
     try:
         cur.execute("""
             SELECT username, email, cn, title
@@ -724,7 +1090,11 @@ def _get_local_ldap_entry(identifier):
             WHERE email = %s OR username = %s OR cn = %s
             LIMIT 1
         """, (identifier, identifier, identifier))
-        return cur.fetchone()
+        row = cur.fetchone()
+        entry = LdapEntry(*row) if row else None
+        if cache is not None:
+            cache[identifier] = entry
+        return entry
     except Exception:
         logger.exception("Error reading ldap_directory for %s", identifier)
         return None
@@ -738,28 +1108,133 @@ def _get_local_ldap_entry(identifier):
         except Exception:
             pass
 
-def _fetch_users():
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
-    try:
+def _get_local_ldap_entries(identifiers, cache=None):
+    """
+    Batch form of _get_local_ldap_entry: resolve several identifiers (email,
+    username or cn) with a single query. Returns {identifier: LdapEntry or None}
+    and, when `cache` is given, stores every result there for later
+    _get_local_ldap_entry calls in the same request.
+    """
+    wanted = [i for i in dict.fromkeys(identifiers) if i and (cache is None or i not in cache)]
+    found = {}
+    if wanted:
+        ph = ",".join(["%s"] * len(wanted))
+        try:
+            with db_cursor() as cur:
+                cur.execute(f"""
+                    SELECT username, email, cn, title
+                    FROM ldap_directory
+                    WHERE email IN ({ph}) OR username IN ({ph}) OR cn IN ({ph})
+                """, wanted * 3)
+                rows = [LdapEntry(*r) for r in cur.fetchall()]
+        except Exception:
+            logger.exception("Error reading ldap_directory for %s", wanted)
+            rows = []
+        # same precedence as the single lookup: email, then username, then cn.
+        # The IN above matches case-insensitively (column collation), so match
+        # the rows back to the requested identifiers the same way.
+        by_key = {}
+        for attr in ("cn", "username", "email"):
+            for entry in rows:
+                key = getattr(entry, attr)
+                if key:
+                    by_key[key.casefold()] = entry
+        for ident in wanted:
+            entry = by_key.get(ident.casefold())
+            found[ident] = entry
+            if cache is not None:
+                cache[ident] = entry
+    if cache is not None:
+        return {i: cache.get(i) for i in identifiers if i}
+    return {i: found.get(i) for i in identifiers if i}
+
+def _load_users():
+    with db_cursor() as cur:
         cur.execute("SELECT id, username, email FROM users ORDER BY username LIMIT 500")
-        return cur.fetchall()
-    finally:
-        cur.close(); conn.close()
+        return [UserRow(*r) for r in cur.fetchall()]
+
+
+def _fetch_users(request=None):
+    """
+    Return up to 500 users as UserRow(id, username, email).
+    Served from the Django cache (see USERS_CACHE_KEY); when `request` is given the
+    result is also memoized on it for the rest of the request.
+    """
+    if request is not None:
+        cached = getattr(request, "_fetch_users_cache", None)
+        if cached is not None:
+            return cached
+    users = cache.get_or_set(USERS_CACHE_KEY, _load_users, DROPDOWN_CACHE_TIMEOUT)
+    if request is not None:
+        request._fetch_users_cache = users
+    return users
+
+
+def _ldap_request_cache(request):
+    """Per-request dict used to memoize _get_local_ldap_entry lookups."""
+    memo = getattr(request, "_ldap_cache", None)
+    if memo is None:
+        memo = {}
+        request._ldap_cache = memo
+    return memo
 
 
 def _fetch_project(project_id):
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
-    try:
+    with db_cursor(dictionary=True) as cur:
         cur.execute("SELECT * FROM projects WHERE id=%s LIMIT 1", (project_id,))
         return cur.fetchone()
-    finally:
-        cur.close(); conn.close()
 
 # projects/views.py
 from django.shortcuts import render
 
+
+def _iso_or_none(v):
+    return v.isoformat() if v else None
+
+
+def _str_or_empty(v):
+    return v or ""
+
+
+def _as_is(v):
+    return v
+
+
+# project_list row shape: SELECT column order and the JSON conversion for each column
+_PROJECT_LIST_SHAPE = (
+    ("id", _as_is),
+    ("name", _str_or_empty),
+    ("oem_name", _str_or_empty),
+    ("description", _str_or_empty),
+    ("start_date", _iso_or_none),
+    ("end_date", _iso_or_none),
+    ("pdl_name", _str_or_empty),
+    ("pm_user_id", _str_or_empty),
+    ("pm_name", _str_or_empty),
+    ("created_at", _iso_or_none),
+)
+_PROJECT_LIST_COLS = tuple(name for name, _ in _PROJECT_LIST_SHAPE)
+
+_PROJECT_LIST_BATCH = 500
+
+# same escaping as Django's json_script filter
+_JSON_SCRIPT_ESCAPES = {ord(">"): "\\u003E", ord("<"): "\\u003C", ord("&"): "\\u0026"}
+
+
+def _json_script_payload(data):
+    """Serialize data for a <script type="application/json"> block (orjson when available)."""
+    if orjson is not None:
+        raw = orjson.dumps(data, default=_json_default, option=_ORJSON_OPTS).decode()
+    else:
+        raw = json.dumps(data, default=_json_default)
+    return raw.translate(_JSON_SCRIPT_ESCAPES)
+
+
+def _json_script_array(items):
+    """Like _json_script_payload for a JSON array, consuming `items` lazily."""
+    return "[" + ",".join(_json_script_payload(item) for item in items) + "]"
+
+
 def project_list(request):
     """
     Return projects visible to the logged-in user:
@@ -787,74 +1262,71 @@ def project_list(request):
 
     # If neither ldap_username nor creator_name present, return empty list (no projects)
     if not ldap_username and not creator_name:
-        return render(request, "projects/project_list.html", {"projects": []})
+        return render(request, "projects/project_list.html", {"projects_json": "[]"})
 
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
-    projects = []
-    try:
-        # Build a safe SQL that selects projects satisfying either condition.
-        # Use parameter placeholders for both ldap_username and creator_name.
-        # We use LEFT JOIN with prism_wbs and GROUP BY project to avoid duplicates.
-        sql = """
-            SELECT DISTINCT p.id, p.name, p.oem_name, p.description,
-                   p.start_date, p.end_date, p.pdl_name, p.pdl_name,
-                   p.pm_user_id, p.pm_name, p.created_at
-            FROM projects p
-            LEFT JOIN prism_wbs w ON w.project_id = p.id
-            WHERE 1=0
-        """
-        params = []
+    # Build a safe SQL that selects projects satisfying either condition.
+    # Use parameter placeholders for both ldap_username and creator_name.
+    # The creator match is an EXISTS probe on prism_wbs(creator, project_id)
+    # rather than a LEFT JOIN + DISTINCT, so each branch can use its own index.
+    sql = f"""
+        SELECT {", ".join("p." + c for c in _PROJECT_LIST_COLS)}
+        FROM projects p
+        WHERE 1=0
+    """
+    params = []
 
-        if ldap_username:
-            sql += " OR (p.pdl_name = %s)"
-            params.append(ldap_username)
+    if ldap_username:
+        sql += " OR (p.pdl_name = %s)"
+        params.append(ldap_username)
 
-        if creator_name:
-            # match prism_wbs.creator exactly to converted creator name
-            sql += " OR (w.creator = %s)"
-            params.append(creator_name)
+    if creator_name:
+        # match prism_wbs.creator exactly to converted creator name
+        sql += " OR EXISTS (SELECT 1 FROM prism_wbs w WHERE w.project_id = p.id AND w.creator = %s)"
+        params.append(creator_name)
 
-        sql += " ORDER BY p.created_at DESC"
+    sql += " ORDER BY p.created_at DESC"
 
-        cur.execute(sql, tuple(params))
-        rows = cur.fetchall() or []
+    # rows are streamed from the server in batches and each one is serialized as it
+    # arrives; only the JSON text is accumulated, never the rows or row dicts
+    with closing(iter_rows(sql, params, batch=_PROJECT_LIST_BATCH)) as rows:
+        projects_json = _json_script_array(
+            {name: conv(v) for (name, conv), v in zip(_PROJECT_LIST_SHAPE, row)}
+            for row in rows
+        )
 
-        # normalize rows for JSON consumption (dates -> ISO)
-        for r in rows:
-            projects.append({
-                "id": r.get("id"),
-                "name": r.get("name") or "",
-                "oem_name": r.get("oem_name") or "",
-                "description": r.get("description") or "",
-                "start_date": (r.get("start_date").isoformat() if r.get("start_date") else None),
-                "end_date": (r.get("end_date").isoformat() if r.get("end_date") else None),
-                "pdl_name": r.get("pdl_name") or "",
-                "pdl_name": r.get("pdl_name") or "",
-                "pm_user_id": r.get("pm_user_id") or "",
-                "pm_name": r.get("pm_name") or "",
-                "created_at": (r.get("created_at").isoformat() if r.get("created_at") else None),
-            })
-    finally:
-        try:
-            cur.close()
-        except Exception:
-            pass
-        try:
-            conn.close()
-        except Exception:
-            pass
+    return render(request, "projects/project_list.html", {"projects_json": projects_json})
 
-    return render(request, "projects/project_list.html", {"projects": projects})
+def _load_all_coes():
+    with db_cursor(dictionary=True) as cur:
+        cur.execute("SELECT id, name FROM coes ORDER BY name")
+        return cur.fetchall()
 
 def _get_all_coes():
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
-    try:
-        cur.execute("SELECT id, name FROM coes ORDER BY name")
+    return cache.get_or_set(COES_CACHE_KEY, _load_all_coes, DROPDOWN_CACHE_TIMEOUT)
+
+def _load_all_domains():
+    with db_cursor(dictionary=True) as cur:
+        cur.execute("SELECT id, name, coe_id FROM domains ORDER BY name")
         return cur.fetchall()
-    finally:
-        cur.close(); conn.close()
+
+def _get_all_domains():
+    return cache.get_or_set(DOMAINS_CACHE_KEY, _load_all_domains, DROPDOWN_CACHE_TIMEOUT)
+
+def _insert_project_coes(cur, project_id, coe_ids):
+    """
+    Insert (project_id, coe_id) mappings with one multi-row INSERT on the given cursor.
+    executemany() lets mysql.connector rewrite the single-row INSERT into one
+    multi-row statement. Existing mappings are left untouched (ON DUPLICATE KEY),
+    so this is idempotent. The caller owns the transaction.
+    """
+    ids = list(dict.fromkeys(int(c) for c in coe_ids))
+    if not ids:
+        return
+    cur.executemany(
+        "INSERT INTO project_coes (project_id, coe_id) VALUES (%s, %s) "
+        "ON DUPLICATE KEY UPDATE coe_id=VALUES(coe_id)",
+        [(project_id, cid) for cid in ids],
+    )
 
 def _assign_coes_to_project(project_id, coe_ids):
     """
@@ -863,47 +1335,31 @@ def _assign_coes_to_project(project_id, coe_ids):
     """
     if not coe_ids:
         return
-    conn = get_connection()
-    cur = conn.cursor()
-    try:
-        for cid in coe_ids:
-            try:
-                cur.execute("INSERT INTO project_coes (project_id, coe_id) VALUES (%s, %s)", (project_id, cid))
-                # commit per batch later
-            except IntegrityError:
-                # mapping exists — ignore
-                continue
-        conn.commit()
-    finally:
-        cur.close(); conn.close()
+    with db_cursor(atomic=True) as cur:
+        # insert only the mappings that are not there yet (no duplicate-key work on the server)
+        cur.execute("SELECT coe_id FROM project_coes WHERE project_id=%s", (project_id,))
+        existing = {r[0] for r in cur.fetchall()}
+        missing = [c for c in coe_ids if int(c) not in existing]
+        if missing:
+            _insert_project_coes(cur, project_id, missing)
+    cache.delete(API_PROJECTS_CACHE_KEY)
 
 def _replace_project_coes(project_id, coe_ids):
     """
     Replace mappings for project: delete all existing and insert provided list (idempotent).
+    The DELETE and the INSERT run in a single transaction.
     """
-    conn = get_connection()
-    cur = conn.cursor()
-    try:
+    with db_cursor(atomic=True) as cur:
         cur.execute("DELETE FROM project_coes WHERE project_id=%s", (project_id,))
         if coe_ids:
-            for cid in coe_ids:
-                try:
-                    cur.execute("INSERT INTO project_coes (project_id, coe_id) VALUES (%s, %s)", (project_id, cid))
-                except IntegrityError:
-                    continue
-        conn.commit()
-    finally:
-        cur.close(); conn.close()
+            _insert_project_coes(cur, project_id, coe_ids)
+    cache.delete(API_PROJECTS_CACHE_KEY)
 
 @require_POST
 def delete_project(request, project_id):
-    conn = get_connection()
-    cur = conn.cursor()
-    try:
+    with db_cursor(prepared=True) as cur:
         cur.execute("DELETE FROM projects WHERE id=%s", (project_id,))
-        conn.commit()
-    finally:
-        cur.close(); conn.close()
+    _invalidate_projects_cache()
     return redirect(reverse("projects:list"))
 
 @require_POST
@@ -915,35 +1371,22 @@ def create_coe(request):
     if not name:
         return HttpResponseBadRequest("COE name required")
 
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
-    try:
-        cur.execute("SELECT id FROM coes WHERE name = %s LIMIT 1", (name,))
-        if cur.fetchone():
-            if request.headers.get("x-requested-with") == "XMLHttpRequest":
-                return JsonResponse({"success": False, "error": "COE with this name already exists."}, status=400)
-            return redirect(request.META.get("HTTP_REFERER", reverse("projects:create")))
-    finally:
-        cur.close(); conn.close()
-
     leader_user_id = None
     if leader_username:
         leader_user_id = _ensure_user_from_ldap(request,leader_username)
 
-    conn2 = get_connection()
-    cur2 = conn2.cursor()
-    try:
-        try:
-            cur2.execute("INSERT INTO coes (name, leader_user_id, description) VALUES (%s, %s, %s)",
-                         (name, leader_user_id, description))
-            conn2.commit()
-        except IntegrityError as e:
-            logger.warning("create_coe IntegrityError: %s", e)
-            if request.headers.get("x-requested-with") == "XMLHttpRequest":
-                return JsonResponse({"success": False, "error": "COE insert failed (duplicate)."}, status=400)
-            return redirect(request.META.get("HTTP_REFERER", reverse("projects:create")))
-    finally:
-        cur2.close(); conn2.close()
+    # coes.name is UNIQUE: let the insert detect duplicates. On a duplicate the
+    # no-op update leaves rowcount at 0 (1 means a new row was inserted).
+    with db_cursor() as cur:
+        cur.execute("INSERT INTO coes (name, leader_user_id, description) VALUES (%s, %s, %s) "
+                    "ON DUPLICATE KEY UPDATE id=LAST_INSERT_ID(id)",
+                    (name, leader_user_id, description))
+        duplicate = cur.rowcount != 1
+    if duplicate:
+        if request.headers.get("x-requested-with") == "XMLHttpRequest":
+            return JsonResponse({"success": False, "error": "COE with this name already exists."}, status=400)
+        return redirect(request.META.get("HTTP_REFERER", reverse("projects:create")))
+    cache.delete_many([COES_CACHE_KEY, API_COES_CACHE_KEY])
 
     if request.headers.get("x-requested-with") == "XMLHttpRequest":
         return JsonResponse({"success": True})
@@ -968,7 +1411,6 @@ def edit_coe(request, coe_id):
         try:
             cur.execute("UPDATE coes SET name=%s, leader_user_id=%s, description=%s WHERE id=%s",
                         (name, leader_user_id, description, coe_id))
-            conn.commit()
         except IntegrityError as e:
             logger.warning("edit_coe IntegrityError: %s", e)
             if request.headers.get("x-requested-with") == "XMLHttpRequest":
@@ -976,6 +1418,7 @@ def edit_coe(request, coe_id):
             return redirect(request.META.get("HTTP_REFERER", reverse("projects:create")))
     finally:
         cur.close(); conn.close()
+    cache.delete_many([COES_CACHE_KEY, API_COES_CACHE_KEY])
 
     if request.headers.get("x-requested-with") == "XMLHttpRequest":
         return JsonResponse({"success": True})
@@ -995,35 +1438,28 @@ def create_domain(request):
     except Exception:
         coe_id_int = None
 
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
-    try:
-        cur.execute("SELECT id FROM domains WHERE coe_id = %s AND name = %s LIMIT 1", (coe_id_int, name))
-        if cur.fetchone():
-            if request.headers.get("x-requested-with") == "XMLHttpRequest":
-                return JsonResponse({"success": False, "error": "Domain with this name already exists for the selected COE."}, status=400)
-            return redirect(request.META.get("HTTP_REFERER", reverse("projects:create")))
-    finally:
-        cur.close(); conn.close()
-
     lead_user_id = None
     if lead_username:
         lead_user_id = _ensure_user_from_ldap(request,lead_username)
 
-    conn2 = get_connection()
-    cur2 = conn2.cursor()
+    # (coe_id, name) is UNIQUE on domains; see create_coe for the rowcount check
     try:
-        try:
-            cur2.execute("INSERT INTO domains (coe_id, name, lead_user_id) VALUES (%s, %s, %s)",
-                         (coe_id_int if coe_id_int else None, name, lead_user_id))
-            conn2.commit()
-        except IntegrityError as e:
-            logger.warning("create_domain IntegrityError: %s", e)
-            if request.headers.get("x-requested-with") == "XMLHttpRequest":
-                return JsonResponse({"success": False, "error": "Domain insert failed (duplicate)."}, status=400)
-            return redirect(request.META.get("HTTP_REFERER", reverse("projects:create")))
-    finally:
-        cur2.close(); conn2.close()
+        with db_cursor() as cur:
+            cur.execute("INSERT INTO domains (coe_id, name, lead_user_id) VALUES (%s, %s, %s) "
+                        "ON DUPLICATE KEY UPDATE id=LAST_INSERT_ID(id)",
+                        (coe_id_int if coe_id_int else None, name, lead_user_id))
+            duplicate = cur.rowcount != 1
+    except IntegrityError as e:
+        # e.g. missing/unknown coe_id (NOT NULL / foreign key)
+        logger.warning("create_domain IntegrityError: %s", e)
+        if request.headers.get("x-requested-with") == "XMLHttpRequest":
+            return JsonResponse({"success": False, "error": "Domain insert failed (invalid COE)."}, status=400)
+        return redirect(request.META.get("HTTP_REFERER", reverse("projects:create")))
+    if duplicate:
+        if request.headers.get("x-requested-with") == "XMLHttpRequest":
+            return JsonResponse({"success": False, "error": "Domain with this name already exists for the selected COE."}, status=400)
+        return redirect(request.META.get("HTTP_REFERER", reverse("projects:create")))
+    cache.delete(DOMAINS_CACHE_KEY)
 
     if request.headers.get("x-requested-with") == "XMLHttpRequest":
         return JsonResponse({"success": True})
@@ -1053,7 +1489,6 @@ def edit_domain(request, domain_id):
         try:
             cur.execute("UPDATE domains SET coe_id=%s, name=%s, lead_user_id=%s WHERE id=%s",
                         (coe_id_int if coe_id_int else None, name, lead_user_id, domain_id))
-            conn.commit()
         except IntegrityError as e:
             logger.warning("edit_domain IntegrityError: %s", e)
             if request.headers.get("x-requested-with") == "XMLHttpRequest":
@@ -1061,11 +1496,137 @@ def edit_domain(request, domain_id):
             return redirect(request.META.get("HTTP_REFERER", reverse("projects:create")))
     finally:
         cur.close(); conn.close()
+    cache.delete(DOMAINS_CACHE_KEY)
 
     if request.headers.get("x-requested-with") == "XMLHttpRequest":
         return JsonResponse({"success": True})
     return redirect(request.META.get("HTTP_REFERER", reverse("projects:create")))
 
+# column order of the autocomplete results (keys of the JSON objects)
+_LDAP_RESULT_KEYS = ("sAMAccountName", "mail", "cn", "title")
+
+# the COALESCEs produce exactly the JSON values ldap_search returns
+_LDAP_DIRECTORY_SEARCH_SQL = """
+    SELECT COALESCE(username, '') AS sAMAccountName,
+           COALESCE(email, '') AS mail,
+           COALESCE(cn, username, '') AS cn,
+           COALESCE(title, '') AS title
+    FROM ldap_directory
+    WHERE {where}
+    ORDER BY username LIMIT 40
+"""
+
+# word characters only: everything else is either a FULLTEXT delimiter or a
+# MATCH ... IN BOOLEAN MODE operator
+_FULLTEXT_WORD_RE = re.compile(r"\w+")
+
+
+def _fulltext_prefix_terms(q):
+    """Turn free text into a boolean-mode query requiring every word as a prefix."""
+    return " ".join(f"+{w}*" for w in _FULLTEXT_WORD_RE.findall(q))
+
+
+def _like_escape(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+LDAP_SEARCH_CACHE_SECONDS = 30
+
+
+@lru_cache(maxsize=512)
+def _ldap_directory_search(q, bucket):
+    """
+    Search the local ldap_directory for the autocomplete text `q` (FULLTEXT prefix
+    match, then a plain prefix LIKE). `bucket` is a time slot that only serves as
+    part of the cache key, so entries expire after LDAP_SEARCH_CACHE_SECONDS.
+    Results do not depend on the caller. Returns a tuple of row tuples in
+    _LDAP_RESULT_KEYS order.
+    """
+    with db_cursor() as cur:
+        rows = []
+        terms = _fulltext_prefix_terms(q)
+        if terms:
+            try:
+                cur.execute(_LDAP_DIRECTORY_SEARCH_SQL.format(
+                    where="MATCH(username, email, cn) AGAINST (%s IN BOOLEAN MODE)"), (terms,))
+                rows = cur.fetchall() or []
+            except Error as ex:
+                # FULLTEXT index not created yet on this DB: use the prefix match below
+                logger.warning("ldap_search: FULLTEXT lookup failed: %s", ex)
+                rows = []
+        if not rows:
+            # words shorter than the FULLTEXT token size: prefix match (no leading wildcard)
+            prefix = _like_escape(q) + "%"
+            cur.execute(_LDAP_DIRECTORY_SEARCH_SQL.format(
+                where="username LIKE %s OR email LIKE %s OR cn LIKE %s"), (prefix, prefix, prefix))
+            rows = cur.fetchall() or []
+        return tuple(rows)
+
+
+def _live_ldap_search(q, username, password):
+    """
+    Search the live directory for the autocomplete text `q`; uses a pooled
+    service-account connection, or binds as the session user when no service
+    account is configured. Returns a list of result dicts ([] when neither works).
+    """
+    from accounts import ldap_utils
+    results = []
+    with ldap_utils.get_pooled_conn() as pooled:
+        conn_ldap = pooled
+        # no service account configured: bind as the session user (skip if no creds)
+        if conn_ldap is None and username and password:
+            conn_ldap = ldap_utils._get_ldap_connection(username, password)
+        if conn_ldap is None:
+            return results
+        try:
+            base_dn = getattr(settings, "LDAP_BASE_DN", "")
+            conn_ldap.search(
+                search_base=base_dn,
+                search_filter=ldap_utils.people_search_filter(q),
+                search_scope='SUBTREE',
+                attributes=['sAMAccountName', 'mail', 'cn', 'title']
+            )
+            for e in conn_ldap.entries:
+                results.append({
+                    "sAMAccountName": str(getattr(e, 'sAMAccountName', '')) or "",
+                    "mail": str(getattr(e, 'mail', '')) or "",
+                    "cn": str(getattr(e, 'cn', '')) or "",
+                    "title": str(getattr(e, 'title', '')) or "",
+                })
+        finally:
+            if conn_ldap is not pooled:
+                try:
+                    conn_ldap.unbind()
+                except Exception:
+                    pass
+    logger.debug("ldap_search: %d live LDAP results for %r", len(results), q)
+    return results
+
+
+# Background workers for live LDAP searches started alongside the local lookup.
+_LDAP_SEARCH_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ldap-search")
+
+# Recent queries the local directory could not answer. Autocomplete only extends
+# the text, so once a prefix misses, longer queries are likely to miss too and the
+# live search is started in parallel instead of after the local one.
+# Shared by request threads, so every access holds _LOCAL_MISS_LOCK.
+_LOCAL_MISS_PREFIXES = OrderedDict()
+_LOCAL_MISS_PREFIXES_MAX = 256
+_LOCAL_MISS_LOCK = threading.Lock()
+
+
+def _likely_local_miss(q):
+    with _LOCAL_MISS_LOCK:
+        return any(q.startswith(p) for p in _LOCAL_MISS_PREFIXES)
+
+
+def _remember_local_miss(q):
+    with _LOCAL_MISS_LOCK:
+        _LOCAL_MISS_PREFIXES[q] = None
+        while len(_LOCAL_MISS_PREFIXES) > _LOCAL_MISS_PREFIXES_MAX:
+            _LOCAL_MISS_PREFIXES.popitem(last=False)
+
+
 @require_GET
 def ldap_search(request):
     """
@@ -1073,160 +1634,114 @@ def ldap_search(request):
 
     - Expects query param 'q'
     - Requires minimum 3 characters to search (client enforces this too)
-    - First looks up the local `ldap_directory` table (username, email, cn, title)
+    - First looks up the local `ldap_directory` table (username, email, cn, title) through its
+      FULLTEXT index, falling back to a prefix LIKE for words below the FULLTEXT token size
     - Returns JSON: {"results": [ {sAMAccountName, mail, cn, title}, ... ] }
-    - If local table returns no rows, falls back to live LDAP via accounts.ldap_utils (if available)
+    - If local table returns no rows, falls back to live LDAP via accounts.ldap_utils (if available);
+      when a shorter prefix already missed locally, the live search runs concurrently
+      with the local one so the response takes max(db, ldap) instead of db + ldap
     """
     q = (request.GET.get("q") or "").strip()
     if len(q) < 3:
         # Return empty results for short queries (client requires min 3 chars)
-        return JsonResponse({"results": []})
+        return fast_json({"results": []})
+
+    q_key = q.lower()
+    username = request.session.get("ldap_username")
+    password = request.session.get("ldap_password")
+    live = None
+    if _likely_local_miss(q_key):
+        live = _LDAP_SEARCH_EXECUTOR.submit(_live_ldap_search, q, username, password)
 
     results = []
     try:
-        # 1) Query local ldap_directory table (preferred)
-        conn = get_connection()
-        cur = conn.cursor(dictionary=True)
-        try:
-            like = f"%{q}%"
-            cur.execute("""
-                SELECT username AS sAMAccountName,
-                       COALESCE(email, '') AS mail,
-                       COALESCE(cn, username) AS cn,
-                       COALESCE(title, '') AS title
-                FROM ldap_directory
-                WHERE username LIKE %s OR email LIKE %s OR cn LIKE %s
-                ORDER BY username LIMIT 40
-            """, (like, like, like))
-            rows = cur.fetchall() or []
-            for r in rows:
-                results.append({
-                    "sAMAccountName": r.get("sAMAccountName") or "",
-                    "mail": r.get("mail") or "",
-                    "cn": r.get("cn") or "",
-                    "title": r.get("title") or "",
-                })
-            print("Results from local ldap_directory:", results)
-        finally:
-            try:
-                cur.close()
-            except Exception:
-                pass
-            try:
-                conn.close()
-            except Exception:
-                pass
+        # 1) Query local ldap_directory table (preferred); successive keystrokes
+        #    within LDAP_SEARCH_CACHE_SECONDS are answered from the process cache
+        bucket = int(time.monotonic() // LDAP_SEARCH_CACHE_SECONDS)
+        results = [dict(zip(_LDAP_RESULT_KEYS, r)) for r in _ldap_directory_search(q_key, bucket)]
 
-        # 2) If no local results, optionally fall back to live LDAP (keeps previous behavior)
+        # 2) If no local results, fall back to live LDAP (keeps previous behavior)
         if not results:
+            _remember_local_miss(q_key)
             try:
-                from accounts import ldap_utils
-                username = request.session.get("ldap_username")
-                password = request.session.get("ldap_password")
-                # if no session creds, skip live LDAP
-                if username and password:
-                    conn_ldap = ldap_utils._get_ldap_connection(username, password)
-                    base_dn = getattr(settings, "LDAP_BASE_DN", "")
-                    conn_ldap.search(
-                        search_base=base_dn,
-                        search_filter=f"(|(sAMAccountName=*{q}*)(cn=*{q}*)(mail=*{q}*))",
-                        search_scope='SUBTREE',
-                        attributes=['sAMAccountName', 'mail', 'cn', 'title']
-                    )
-                    for e in conn_ldap.entries:
-                        results.append({
-                            "sAMAccountName": str(getattr(e, 'sAMAccountName', '')) or "",
-                            "mail": str(getattr(e, 'mail', '')) or "",
-                            "cn": str(getattr(e, 'cn', '')) or "",
-                            "title": str(getattr(e, 'title', '')) or "",
-                        })
-                    print("Results from live LDAP:", results)
-                    try:
-                        conn_ldap.unbind()
-                    except Exception:
-                        pass
+                if live is not None:
+                    results = live.result()
+                else:
+                    results = _live_ldap_search(q, username, password)
             except Exception as ex:
                 logger.warning("Live LDAP fallback failed or not available: %s", ex)
+        # otherwise a live search started above is left to finish on its worker
+        # (an already-running LDAP search cannot be cancelled); its result is unused
 
     except Exception as ex:
         # In case of unexpected DB failure, log and return empty list (avoid breaking UI)
         logger.exception("ldap_search: unexpected error: %s", ex)
-        return JsonResponse({"results": []}, status=200)
+        return fast_json({"results": []})
 
-    return JsonResponse({"results": results})
+    return fast_json({"results": results})
 
 @require_GET
 def ldap_search_server(request):
     q = (request.GET.get("q") or "").strip()
     if len(q) < 1:
-        return JsonResponse({"results": []})
+        return fast_json({"results": []})
 
     results = []
     try:
         from accounts import ldap_utils
         username = request.session.get("ldap_username")
         password = request.session.get("ldap_password")
-        conn = ldap_utils._get_ldap_connection(username, password)
-        base_dn = getattr(settings, "LDAP_BASE_DN", "")
-        conn.search(
-            search_base=base_dn,
-            search_filter=f"(|(sAMAccountName=*{q}*)(cn=*{q}*)(mail=*{q}*))",
-            search_scope='SUBTREE',
-            attributes=['sAMAccountName', 'mail', 'cn', 'title']
-        )
-        for e in conn.entries:
-            results.append({
-                "sAMAccountName": str(getattr(e, 'sAMAccountName', '')),
-                "mail": str(getattr(e, 'mail', '')),
-                "cn": str(getattr(e, 'cn', '')),
-                "title": str(getattr(e, 'title', '')),
-            })
-        try:
-            conn.unbind()
-        except Exception:
-            pass
+        with ldap_utils.get_pooled_conn() as pooled:
+            conn = pooled or ldap_utils._get_ldap_connection(username, password)
+            if conn is None:
+                raise RuntimeError("no LDAP connection available")
+            try:
+                base_dn = getattr(settings, "LDAP_BASE_DN", "")
+                conn.search(
+                    search_base=base_dn,
+                    search_filter=ldap_utils.people_search_filter(q),
+                    search_scope='SUBTREE',
+                    attributes=['sAMAccountName', 'mail', 'cn', 'title']
+                )
+                for e in conn.entries:
+                    results.append({
+                        "sAMAccountName": str(getattr(e, 'sAMAccountName', '')),
+                        "mail": str(getattr(e, 'mail', '')),
+                        "cn": str(getattr(e, 'cn', '')),
+                        "title": str(getattr(e, 'title', '')),
+                    })
+            finally:
+                # the pooled connection is handled by get_pooled_conn
+                if conn is not pooled:
+                    try:
+                        conn.unbind()
+                    except Exception:
+                        pass
     except Exception as ex:
         logger.warning("LDAP search failed, falling back to users table: %s", ex)
-        conn = get_connection()
-        cur = conn.cursor(dictionary=True)
-        try:
-            like = f"%{q}%"
+        results = []
+        with db_cursor() as cur:
+            like = f"%{_like_escape(q)}%"
             cur.execute(
-                "SELECT username as sAMAccountName, email as mail, username as cn "
+                "SELECT username, email, username, '' "
                 "FROM users WHERE username LIKE %s OR email LIKE %s LIMIT 40",
                 (like, like)
             )
-            rows = cur.fetchall()
-            for r in rows:
-                results.append({
-                    "sAMAccountName": r.get("sAMAccountName"),
-                    "mail": r.get("mail"),
-                    "cn": r.get("cn"),
-                    "title": ""
-                })
-        finally:
-            cur.close(); conn.close()
+            results.extend(dict(zip(_LDAP_RESULT_KEYS, r)) for r in cur.fetchall())
 
-    return JsonResponse({"results": results})
+    return fast_json({"results": results})
 
 def _get_all_projects(limit=200):
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
-    try:
-        cur.execute("SELECT id, name FROM projects ORDER BY created_at DESC LIMIT %s", (limit,))
-        return cur.fetchall()
-    finally:
-        cur.close(); conn.close()
+    def load():
+        with db_cursor(dictionary=True) as cur:
+            cur.execute("SELECT id, name FROM projects ORDER BY created_at DESC LIMIT %s", (limit,))
+            return cur.fetchall()
+    return cache.get_or_set(PROJECTS_CACHE_KEY % limit, load, DROPDOWN_CACHE_TIMEOUT)
 
 def _get_project_coe_ids(project_id):
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
-    try:
+    with db_cursor() as cur:
         cur.execute("SELECT coe_id FROM project_coes WHERE project_id=%s", (project_id,))
-        rows = cur.fetchall()
-        return [r['coe_id'] for r in rows] if rows else []
-    finally:
-        cur.close(); conn.close()
+        return [r[0] for r in cur.fetchall()]
 
 def create_project(request):
     if request.method == "POST":
@@ -1238,16 +1753,10 @@ def create_project(request):
         mapped_coe_ids = request.POST.getlist("mapped_coe_ids")
 
         if not name:
-            users = _fetch_users()
+            users = _fetch_users(request)
             coes = _get_all_coes()
             projects = _get_all_projects()
-            conn = get_connection()
-            cur = conn.cursor(dictionary=True)
-            try:
-                cur.execute("SELECT id, name, coe_id FROM domains ORDER BY name")
-                domains = cur.fetchall()
-            finally:
-                cur.close(); conn.close()
+            domains = _get_all_domains()
             return render(request, "projects/create_project.html", {
                 "users": users, "coes": coes, "projects": projects, "domains": domains, "error": "Project name is required."
             })
@@ -1255,21 +1764,19 @@ def create_project(request):
         pdl_name = None
         if pdl_username:
             # prefer local ldap_directory email; otherwise use the supplied identifier
-            pdl_name = None
-            if pdl_username:
-                local = _get_local_ldap_entry(pdl_username)
-                if local:
-                    pdl_name = local.get("email") or local.get("username")
-                    try:
-                        _ensure_user_from_ldap(request, pdl_name)
-                    except Exception:
-                        logger.exception("Failed to ensure users row for pdl %s", pdl_name)
-                else:
-                    pdl_name = pdl_username if "@" in pdl_username else pdl_username
-                    try:
-                        _ensure_user_from_ldap(request, pdl_username)
-                    except Exception:
-                        logger.exception("Failed to ensure users row for pdl (fallback) %s", pdl_username)
+            local = _get_local_ldap_entry(pdl_username, cache=_ldap_request_cache(request))
+            if local:
+                pdl_name = local.email or local.username
+                try:
+                    _ensure_user_from_ldap(request, pdl_name)
+                except Exception:
+                    logger.exception("Failed to ensure users row for pdl %s", pdl_name)
+            else:
+                pdl_name = pdl_username
+                try:
+                    _ensure_user_from_ldap(request, pdl_username)
+                except Exception:
+                    logger.exception("Failed to ensure users row for pdl (fallback) %s", pdl_username)
 
         conn = get_connection()
         cur = conn.cursor()
@@ -1279,10 +1786,10 @@ def create_project(request):
                 "INSERT INTO projects (name, description, start_date, end_date, pdl_name) VALUES (%s, %s, %s, %s, %s)",
                 (name, desc or None, start_date, end_date, pdl_name)
             )
-            conn.commit()
             project_id = cur.lastrowid
         finally:
             cur.close(); conn.close()
+        _invalidate_projects_cache()
 
         try:
             int_coe_ids = [int(x) for x in mapped_coe_ids if x]
@@ -1295,16 +1802,10 @@ def create_project(request):
             return JsonResponse({"success": True, "project_id": project_id})
         return redirect(reverse("projects:list"))
 
-    users = _fetch_users()
+    users = _fetch_users(request)
     coes = _get_all_coes()
     projects = _get_all_projects()
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
-    try:
-        cur.execute("SELECT id, name, coe_id FROM domains ORDER BY name")
-        domains = cur.fetchall()
-    finally:
-        cur.close(); conn.close()
+    domains = _get_all_domains()
 
     return render(request, "projects/create_project.html", {
         "users": users, "coes": coes, "projects": projects, "domains": domains
@@ -1333,24 +1834,21 @@ def edit_project(request, project_id=None):
             return " ".join(parts[1:]) + " " + parts[0]
         return cn
 
-    # fetch projects where this session user is creator in prism_wbs
+    # fetch projects where this session user is creator in prism_wbs. Full rows are
+    # selected so the GET branch can take the selected project from this list
+    # instead of a second round-trip. prism_wbs.creator is stored trimmed (PRISM
+    # import + db_initializer), so the comparison can use idx_prism_wbs_creator_project.
     editable_projects = []
     try:
         creator_name = cn_to_creator(session_cn)
-        conn = get_connection()
-        cur = conn.cursor(dictionary=True)
-        try:
-            # join prism_wbs -> projects to list unique projects where creator matches
+        with db_cursor(dictionary=True) as cur:
             cur.execute("""
-                SELECT DISTINCT p.id, p.name
-                FROM prism_wbs pw
-                JOIN projects p ON pw.project_id = p.id
-                WHERE TRIM(pw.creator) = %s
+                SELECT p.*
+                FROM projects p
+                WHERE p.id IN (SELECT pw.project_id FROM prism_wbs pw WHERE pw.creator = %s)
                 ORDER BY p.name
             """, (creator_name,))
             editable_projects = cur.fetchall() or []
-        finally:
-            cur.close(); conn.close()
     except Exception:
         logger.exception("Failed to fetch editable projects for creator=%s", creator_name)
         editable_projects = []
@@ -1376,6 +1874,11 @@ def edit_project(request, project_id=None):
         end_date = request.POST.get("end_date") or None
         description = (request.POST.get("description") or "").strip() or None
 
+        # per-request ldap_directory lookups (PDL and PM are frequently the same person);
+        # both are resolved up front in one query and served from ldap_cache below
+        ldap_cache = _ldap_request_cache(request)
+        _get_local_ldap_entries([pdl_sel, pm_sel], cache=ldap_cache)
+
         # helper: ensure user exists in users table and return user_id (re-uses existing helper)
         pdl_name_db = None
         pm_user_id_db = None
@@ -1389,11 +1892,11 @@ def edit_project(request, project_id=None):
         pdl_name_val = None
         if pdl_sel:
             # first try local ldap_directory (preferred)
-            local = _get_local_ldap_entry(pdl_sel)
+            local = _get_local_ldap_entry(pdl_sel, cache=ldap_cache)
             if local:
                 # prefer email from local directory
-                pdl_name_db = local.get("email") or local.get("username") or pdl_sel
-                pdl_name_val = local.get("cn") or local.get("username")
+                pdl_name_db = local.email or local.username or pdl_sel
+                pdl_name_val = local.cn or local.username
                 # ensure users row exists (do not use its id for saving - we store email string)
                 try:
                     _ensure_user_from_ldap(request, pdl_name_db)
@@ -1438,10 +1941,10 @@ def edit_project(request, project_id=None):
         pm_user_id_db = None
         pm_name_val = None
         if pm_sel:
-            local = _get_local_ldap_entry(pm_sel)
+            local = _get_local_ldap_entry(pm_sel, cache=ldap_cache)
             if local:
-                pm_user_id_db = local.get("email") or local.get("username") or pm_sel
-                pm_name_val = local.get("cn") or local.get("username")
+                pm_user_id_db = local.email or local.username or pm_sel
+                pm_name_val = local.cn or local.username
                 try:
                     _ensure_user_from_ldap(request, pm_user_id_db)
                 except Exception:
@@ -1479,9 +1982,7 @@ def edit_project(request, project_id=None):
 
         # persist update to projects table
         try:
-            conn = get_connection()
-            cur = conn.cursor()
-            try:
+            with db_cursor(prepared=True) as cur:
                 cur.execute("""
                     UPDATE projects
                     SET oem_name=%s,
@@ -1494,9 +1995,8 @@ def edit_project(request, project_id=None):
                         description=%s
                     WHERE id=%s
                 """, (oem_name, pdl_name_db, pdl_name_val, pm_user_id_db, pm_name_val, start_date, end_date, description, form_project_id))
-                conn.commit()
-            finally:
-                cur.close(); conn.close()
+            # pdl_name / pm_name decide who sees the project in the allocation dropdowns
+            _invalidate_projects_cache()
             messages.success(request, "Project updated successfully.")
             # after successful save, redirect to same page to display latest details
             return redirect(reverse("projects:edit", args=[form_project_id]))
@@ -1514,9 +2014,9 @@ def edit_project(request, project_id=None):
     selected_project_id = project_id or (editable_projects[0]["id"] if editable_projects else None)
     project = None
     if selected_project_id:
-        project = _fetch_project(selected_project_id)
-    else:
-        project = None
+        project = next((p for p in editable_projects if p["id"] == int(selected_project_id)), None)
+        if project is None:
+            project = _fetch_project(selected_project_id)
 
     # Also include list of editable projects for dropdown
     return render(request, "projects/edit_project.html", {
@@ -1532,22 +2032,39 @@ def map_coes(request):
       - project_choice: 'new' or existing project id
       - if 'new', also requires name (and optional description, start/end, pdl_username)
       - mapped_coe_ids: multiple values OK
+    The same fields may be sent as a JSON object (Content-Type: application/json),
+    with mapped_coe_ids as a list of integers; form posts are still accepted.
     """
-    project_choice = (request.POST.get("project_choice") or "").strip()
-    selected_coes = request.POST.getlist("mapped_coe_ids")
-    try:
-        coe_ids = [int(x) for x in selected_coes if x]
-    except Exception:
-        coe_ids = []
+    if request.content_type == "application/json":
+        try:
+            data = fast_json_loads(request.body or b"{}")
+        except ValueError:
+            return JsonResponse({"success": False, "error": "invalid JSON body"}, status=400)
+        if not isinstance(data, dict):
+            return JsonResponse({"success": False, "error": "invalid JSON body"}, status=400)
+        coe_ids = data.get("mapped_coe_ids") or []
+        # bool is an int subclass; reject it explicitly
+        if not isinstance(coe_ids, list) or not all(type(x) is int for x in coe_ids):
+            return JsonResponse({"success": False, "error": "invalid coe id"}, status=400)
+        coe_ids = list(set(coe_ids))
+    else:
+        data = request.POST
+        selected_coes = request.POST.getlist("mapped_coe_ids")
+        try:
+            coe_ids = list({int(x) for x in selected_coes if x})
+        except ValueError:
+            return JsonResponse({"success": False, "error": "invalid coe id"}, status=400)
+
+    project_choice = str(data.get("project_choice") or "").strip()
 
     if project_choice == "new":
-        name = (request.POST.get("name") or "").strip()
+        name = str(data.get("name") or "").strip()
         if not name:
             return JsonResponse({"success": False, "error": "Project name required."}, status=400)
-        desc = (request.POST.get("description") or "").strip()
-        start_date = request.POST.get("start_date") or None
-        end_date = request.POST.get("end_date") or None
-        pdl_username = request.POST.get("pdl_username") or None
+        desc = str(data.get("description") or "").strip()
+        start_date = data.get("start_date") or None
+        end_date = data.get("end_date") or None
+        pdl_username = data.get("pdl_username") or None
         pdl_name = None
         if pdl_username:
             pdl_name = _ensure_user_from_ldap(request.pdl_username)
@@ -1560,12 +2077,13 @@ def map_coes(request):
                 "INSERT INTO projects (name, description, start_date, end_date, pdl_name) VALUES (%s, %s, %s, %s, %s)",
                 (name, desc or None, start_date, end_date, pdl_name)
             )
-            conn.commit()
             project_id = cur.lastrowid
         finally:
             cur.close(); conn.close()
+        _invalidate_projects_cache()
 
-        if project_id:
+        # a brand-new project has no mappings to clear, so only write when COEs were picked
+        if project_id and coe_ids:
             _replace_project_coes(project_id, coe_ids)
         return JsonResponse({"success": True, "project_id": project_id})
 
@@ -1582,23 +2100,30 @@ def map_coes(request):
 
 @require_GET
 def api_coes(request):
-    coes = _get_all_coes()
-    return JsonResponse({"coes": coes})
+    # cache the serialized body: a hit skips both the query and the JSON encoding
+    body = cache.get(API_COES_CACHE_KEY)
+    if body is None:
+        body = fast_json({"coes": _get_all_coes()}).content
+        cache.set(API_COES_CACHE_KEY, body, DROPDOWN_CACHE_TIMEOUT)
+    return HttpResponse(body, content_type="application/json")
 
 @require_GET
 def api_projects(request):
-    projects = _get_all_projects()
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
-    try:
-        cur.execute("SELECT project_id, COUNT(*) as cnt FROM project_coes GROUP BY project_id")
-        rows = cur.fetchall()
-        counts = {r['project_id']: r['cnt'] for r in rows} if rows else {}
-    finally:
-        cur.close(); conn.close()
-    for p in projects:
-        p['mapped_coe_count'] = counts.get(p['id'], 0)
-    return JsonResponse({"projects": projects})
+    projects = cache.get(API_PROJECTS_CACHE_KEY)
+    if projects is None:
+        # recent projects (same set as _get_all_projects) with their COE counts in one query
+        with db_cursor(dictionary=True) as cur:
+            cur.execute("""
+                SELECT p.id, p.name, COUNT(pc.coe_id) AS mapped_coe_count
+                FROM projects p
+                LEFT JOIN project_coes pc ON pc.project_id = p.id
+                GROUP BY p.id, p.name, p.created_at
+                ORDER BY p.created_at DESC
+                LIMIT 200
+            """)
+            projects = cur.fetchall()
+        cache.set(API_PROJECTS_CACHE_KEY, projects, DROPDOWN_CACHE_TIMEOUT)
+    return fast_json({"projects": projects})
 
 # in views.py (or utils used by monthly_allocations view)
 from django.db import connection
@@ -1613,21 +2138,17 @@ def get_user_projects_with_bgcode(request):
     if not username:
         return []
 
+    # one pass over the creator's prism_wbs rows; MAX(NULLIF(...)) picks a non-empty bg_code
     sql = """
     SELECT p.id AS id,
            p.name AS name,
-           COALESCE(
-              (SELECT pw.bg_code FROM prism_wbs pw
-                 WHERE pw.project_id = p.id AND pw.creator = %s
-                 AND COALESCE(pw.bg_code,'') <> ''
-                 LIMIT 1),
-              '' ) AS bg_code
+           COALESCE(MAX(NULLIF(pw.bg_code, '')), '') AS bg_code
     FROM projects p
-    INNER JOIN prism_wbs pw_by_creator ON pw_by_creator.project_id = p.id AND pw_by_creator.creator = %s
+    INNER JOIN prism_wbs pw ON pw.project_id = p.id AND pw.creator = %s
     GROUP BY p.id, p.name
     ORDER BY p.name
     """
-    params = [username, username]
+    params = [username]
     out = []
     with connection.cursor() as cur:
         cur.execute(sql, params)
@@ -1649,143 +2170,55 @@ def api_subprojects(request):
     Matching rule: subprojects.mdm_code = bg_code
     If project_id provided but bg_code missing, derive bg_code from prism_wbs.bg_code
     """
-    print("\n" + "="*80)
-    print("=== api_subprojects START ===")
-    print("="*80)
-
     bg_code = (request.GET.get('bg_code') or '').strip()
     project_id = (request.GET.get('project_id') or '').strip()
 
-    print(f"Request params:")
-    print(f"  bg_code: '{bg_code}'")
-    print(f"  project_id: '{project_id}'")
-
     try:
         project_id = int(project_id) if project_id else None
     except ValueError:
-        print(f"ERROR: Invalid project_id '{project_id}' (not an integer)")
-        return JsonResponse({"ok": False, "error": "Invalid project_id", "subprojects": []})
-
-    # Step 1: If bg_code missing but project_id provided, fetch bg_code from prism_wbs
-    if not bg_code and project_id:
-        print(f"\n--- Fetching bg_code from prism_wbs for project_id={project_id} ---")
-        try:
-            with connection.cursor() as cur:
-                cur.execute("""
-                    SELECT bg_code 
-                    FROM prism_wbs 
-                    WHERE project_id = %s AND bg_code IS NOT NULL AND TRIM(bg_code) != ''
-                    LIMIT 1
-                """, [project_id])
-                row = cur.fetchone()
-                if row:
-                    bg_code = (row[0] or '').strip()
-                    print(f"✓ Found bg_code from prism_wbs: '{bg_code}'")
-                else:
-                    print(f"⚠ No bg_code found in prism_wbs for project_id={project_id}")
-        except Exception as ex:
-            print(f"ERROR: Failed to fetch bg_code from prism_wbs: {ex}")
-            import traceback
-            print(traceback.format_exc())
-
-    # Step 2: Query subprojects table
-    print(f"\n--- Querying subprojects table ---")
-    if not bg_code:
-        print("⚠ No bg_code available - returning empty subprojects list")
-        return JsonResponse({"ok": True, "subprojects": [], "message": "No bg_code found"})
-
-    rows = []
-    try:
-        with connection.cursor() as cur:
-            # Check if subprojects table exists
-            cur.execute("""
-                SELECT COUNT(*) 
-                FROM information_schema.tables 
-                WHERE table_schema = DATABASE() AND table_name = 'subprojects'
-            """)
-            table_exists = cur.fetchone()[0] > 0
-            print(f"subprojects table exists: {table_exists}")
-
-            if not table_exists:
-                print("ERROR: subprojects table does not exist")
-                return JsonResponse({"ok": False, "error": "subprojects table missing", "subprojects": []})
-
-            # Check total subprojects in table
-            cur.execute("SELECT COUNT(*) FROM subprojects")
-            total_count = cur.fetchone()[0]
-            print(f"Total subprojects in database: {total_count}")
-
-            # Check subprojects with this mdm_code
-            cur.execute("""
-                SELECT COUNT(*) 
-                FROM subprojects 
-                WHERE mdm_code = %s
-            """, [bg_code])
-            matching_count = cur.fetchone()[0]
-            print(f"Subprojects matching bg_code '{bg_code}': {matching_count}")
-
-            # Get sample mdm_codes to see format differences
-            cur.execute("""
-                SELECT DISTINCT mdm_code 
-                FROM subprojects 
-                WHERE mdm_code IS NOT NULL 
-                LIMIT 10
-            """)
-            sample_codes = [r[0] for r in cur.fetchall()]
-            print(f"Sample mdm_codes in subprojects table: {sample_codes}")
+        return fast_json({"ok": False, "error": "Invalid project_id", "subprojects": []})
 
-            # Try exact match
-            print(f"\nQuerying: SELECT id, name, mdm_code FROM subprojects WHERE mdm_code = '{bg_code}'")
+    rows = []
+    try:
+        with connection.cursor() as cur:
+            # One round-trip: resolve the code (given, else the project's first non-empty
+            # prism_wbs.bg_code) and its subprojects. The derived table always yields one
+            # row, so the resolved code comes back even when nothing matches.
             cur.execute("""
-                SELECT id, name, mdm_code 
-                FROM subprojects 
-                WHERE mdm_code = %s
-            """, [bg_code])
-            rows = cur.fetchall()
-            print(f"✓ Query executed, returned {len(rows)} rows")
-
-            if not rows:
-                # Try case-insensitive match
-                print(f"\nTrying case-insensitive match...")
-                cur.execute("""
-                    SELECT id, name, mdm_code 
-                    FROM subprojects 
-                    WHERE LOWER(mdm_code) = LOWER(%s)
-                """, [bg_code])
-                rows = cur.fetchall()
-                print(f"Case-insensitive match returned {len(rows)} rows")
+                SELECT code.c, s.id, s.name, s.mdm_code
+                FROM (
+                    SELECT COALESCE(NULLIF(%s, ''), (
+                        SELECT TRIM(pw.bg_code)
+                        FROM prism_wbs pw
+                        WHERE pw.project_id = %s AND TRIM(COALESCE(pw.bg_code, '')) <> ''
+                        LIMIT 1
+                    )) AS c
+                ) code
+                LEFT JOIN subprojects s ON s.mdm_code = code.c
+                ORDER BY s.priority DESC, s.name
+            """, [bg_code, project_id])
+            result = cur.fetchall()
+            bg_code = (result[0][0] or '') if result else ''
+            if not bg_code:
+                return fast_json({"ok": True, "subprojects": [], "message": "No bg_code found"})
+            rows = [r[1:] for r in result if r[1] is not None]
 
             if not rows:
-                # Try partial match
-                print(f"\nTrying partial match (LIKE)...")
+                # no exact match (comparison is already case-insensitive): try a partial match
                 cur.execute("""
-                    SELECT id, name, mdm_code 
-                    FROM subprojects 
+                    SELECT id, name, mdm_code
+                    FROM subprojects
                     WHERE mdm_code LIKE %s
-                """, [f"%{bg_code}%"])
+                    ORDER BY priority DESC, name
+                """, [f"%{_like_escape(bg_code)}%"])
                 rows = cur.fetchall()
-                print(f"Partial match returned {len(rows)} rows")
-
     except Exception as e:
-        print(f"ERROR: Database query failed: {e}")
-        import traceback
-        print(traceback.format_exc())
-        return JsonResponse({"ok": False, "error": str(e), "subprojects": []})
-
-    # Step 3: Format results
-    subs = []
-    for r in rows:
-        sub = {"id": r[0], "name": r[1], "mdm_code": r[2] or ""}
-        subs.append(sub)
-        if len(subs) <= 5:  # Print first 5
-            print(f"  Subproject {sub['id']}: {sub['name']} (mdm_code: {sub['mdm_code']})")
-
-    print(f"\n--- RESULT: Returning {len(subs)} subprojects ---")
-    print("="*80)
-    print("=== api_subprojects END ===")
-    print("="*80 + "\n")
+        logger.exception("api_subprojects failed (bg_code=%r, project_id=%r): %s", bg_code, project_id, e)
+        return fast_json({"ok": False, "error": str(e), "subprojects": []})
 
-    return JsonResponse({"ok": True, "subprojects": subs})
+    subs = [{"id": r[0], "name": r[1], "mdm_code": r[2] or ""} for r in rows]
+    logger.debug("api_subprojects: %d subprojects for bg_code=%r", len(subs), bg_code)
+    return fast_json({"ok": True, "subprojects": subs})
 
 
 # PUT THIS in projects/views.py (replace existing get_allocations_for_iom)
@@ -1793,9 +2226,7 @@ from django.http import JsonResponse, HttpResponseBadRequest
 from django.views.decorators.http import require_GET
 from django.db import connection
 from datetime import datetime, date
-import logging
 
-logger = logging.getLogger(__name__)
 
 def _parse_month_start(raw):
     if not raw:
@@ -1822,6 +2253,51 @@ def _parse_month_start(raw):
     except Exception:
         return None
 
+# monthly_allocation_entries statements shared by get_allocations_for_iom /
+# save_monthly_allocations. "subproject matches" treats NULL as its own bucket.
+_SQL_GET_ALLOCATIONS = """
+    SELECT id, project_id, subproject_id, iom_id, month_start, user_ldap, total_hours, created_at
+    FROM monthly_allocation_entries
+    WHERE project_id = %s
+      AND iom_id = %s
+      AND month_start = %s
+    ORDER BY user_ldap
+"""
+_SQL_GET_ALLOCATIONS_SUB = """
+    SELECT id, project_id, subproject_id, iom_id, month_start, user_ldap, total_hours, created_at
+    FROM monthly_allocation_entries
+    WHERE project_id = %s
+      AND iom_id = %s
+      AND month_start = %s
+      AND subproject_id = %s
+    ORDER BY user_ldap
+"""
+# {in_frag} comes from _sql_in_clause
+_SQL_DELETE_MAE = """
+    DELETE FROM monthly_allocation_entries
+    WHERE project_id=%s
+      AND month_start=%s
+      AND (subproject_id=%s OR (%s IS NULL AND subproject_id IS NULL))
+      AND iom_id IN {in_frag}
+"""
+# only placeholders in VALUES so executemany sends one multi-row INSERT
+# (created_at uses its column default)
+_SQL_INSERT_MAE = """
+    INSERT INTO monthly_allocation_entries
+      (project_id, subproject_id, iom_id, month_start, user_ldap, total_hours)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+_SQL_MAE_USER_TOTALS = """
+    SELECT user_ldap, COALESCE(SUM(total_hours), 0) AS total_hours
+    FROM monthly_allocation_entries
+    WHERE project_id=%s
+      AND month_start=%s
+      AND (subproject_id=%s OR (%s IS NULL AND subproject_id IS NULL))
+    GROUP BY user_ldap
+    ORDER BY user_ldap
+"""
+
+
 @require_GET
 def get_allocations_for_iom(request):
     # Accept multiple parameter names used across UI
@@ -1855,46 +2331,43 @@ def get_allocations_for_iom(request):
         logger.warning("Invalid month_start: %r", month_start_raw)
         return HttpResponseBadRequest("Invalid month_start")
 
-    # Query DB; use DATE() to match date portion only
+    # month_start is a DATE column; compare it directly so the composite index is usable
     try:
         with connection.cursor() as cur:
             if subp is None:
-                cur.execute("""
-                    SELECT id, project_id, subproject_id, iom_id, month_start, user_ldap, total_hours, created_at
-                    FROM monthly_allocation_entries
-                    WHERE project_id = %s
-                      AND iom_id = %s
-                      AND DATE(month_start) = %s
-                    ORDER BY user_ldap
-                """, [project_id, iom_row_id, month_start])
+                cur.execute(_SQL_GET_ALLOCATIONS, [project_id, iom_row_id, month_start])
             else:
-                cur.execute("""
-                    SELECT id, project_id, subproject_id, iom_id, month_start, user_ldap, total_hours, created_at
-                    FROM monthly_allocation_entries
-                    WHERE project_id = %s
-                      AND iom_id = %s
-                      AND DATE(month_start) = %s
-                      AND subproject_id = %s
-                    ORDER BY user_ldap
-                """, [project_id, iom_row_id, month_start, subp])
-
-            cols = [c[0] for c in cur.description] if cur.description else []
-            rows = [dict(zip(cols, r)) for r in cur.fetchall()]
+                cur.execute(_SQL_GET_ALLOCATIONS_SUB, [project_id, iom_row_id, month_start, subp])
+            # fixed column list: build the row dicts directly, dates as ISO strings
+            rows = [
+                {
+                    "id": r[0],
+                    "project_id": r[1],
+                    "subproject_id": r[2],
+                    "iom_id": r[3],
+                    "month_start": r[4].isoformat() if r[4] else None,
+                    "user_ldap": r[5],
+                    "total_hours": float(r[6] or 0),
+                    "created_at": r[7].isoformat() if r[7] else None,
+                }
+                for r in cur.fetchall()
+            ]
     except Exception as exc:
         logger.exception("get_allocations_for_iom DB error: %s", exc)
         return JsonResponse({"ok": False, "error": str(exc)}, status=500)
 
-    # convert dates to ISO strings
-    for r in rows:
-        if isinstance(r.get("month_start"), (datetime, date)):
-            r["month_start"] = r["month_start"].isoformat()
-        if isinstance(r.get("created_at"), datetime):
-            r["created_at"] = r["created_at"].isoformat()
-
-    print("get_allocations_for_iom returning rows", rows)
+    logger.debug("get_allocations_for_iom returning %d rows", len(rows))
     return JsonResponse({"ok": True, "rows": rows})
 
 
+def _as_hours(value):
+    """Coerce a posted hours value to float; blanks and junk count as 0."""
+    try:
+        return float(value or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
 @require_POST
 def save_monthly_allocations(request):
     """
@@ -1907,7 +2380,6 @@ def save_monthly_allocations(request):
     - Returns saved_items list with fte computed for the billing month.
     """
     # Local imports so this function is self-contained if pasted directly
-    import json
     import logging
     from datetime import datetime, date
     from django.db import transaction, connection
@@ -1916,14 +2388,14 @@ def save_monthly_allocations(request):
     logger = logging.getLogger(__name__)
 
     try:
-        # Parse body if any (accept JSON payloads)
-        body_raw = request.body.decode("utf-8").strip() if request.body else ""
+        # Parse body if any (accept JSON payloads); form posts fail to parse and fall back to {}
         data = {}
-        if body_raw:
+        if request.body:
             try:
-                data = json.loads(body_raw)
-            except Exception:
-                # fallback to empty dict if JSON decode fails
+                data = fast_json_loads(request.body)
+            except ValueError:
+                data = {}
+            if not isinstance(data, dict):
                 data = {}
 
         # Inputs (try JSON -> POST -> GET)
@@ -2005,8 +2477,8 @@ def save_monthly_allocations(request):
             items_json = request.POST.get("items_json") or None
             if items_json:
                 try:
-                    items = json.loads(items_json)
-                except Exception:
+                    items = fast_json_loads(items_json)
+                except ValueError:
                     items = []
             else:
                 # fallback to incremental form fields
@@ -2018,11 +2490,7 @@ def save_monthly_allocations(request):
                     iom_field = request.POST.get(f'iom_id{i}')
                     if not user_field:
                         break
-                    try:
-                        hrs = float(hours_field or 0)
-                    except Exception:
-                        hrs = 0.0
-                    items.append({"iom_id": iom_field, "user_ldap": user_field, "total_hours": hrs})
+                    items.append({"iom_id": iom_field, "user_ldap": user_field, "total_hours": hours_field})
                     i += 1
 
         # Validate required inputs
@@ -2031,56 +2499,44 @@ def save_monthly_allocations(request):
         if items is None:
             return JsonResponse({"ok": False, "error": "items are required"}, status=400)
 
-        # Begin DB transaction: delete old entries per IOM and insert new ones
+        # Normalize in one pass: IOMs to clear (any item naming one), and the complete rows to insert
+        # (user_ldap stored lower-cased so readers can compare it without LOWER())
+        items = [it for it in items if isinstance(it, dict)]
+        iom_ids = sorted({it.get("iom_id") for it in items if it.get("iom_id")})
+        insert_params = [
+            (project_id, subproject_id, iom_id, billing_start, user_ldap, _as_hours(it.get("total_hours")))
+            for it in items
+            if (iom_id := it.get("iom_id")) and (user_ldap := (it.get("user_ldap") or "").strip().lower())
+        ]
+
+        # Delete existing entries for this project+billing_start+subproject (supports subproject null)
+        # for all touched IOMs in one statement
+        in_params = list(iom_ids)
+        delete_sql = _sql_with_in(_SQL_DELETE_MAE, len(in_params))
+        delete_params = [project_id, billing_start, subproject_id, subproject_id, *in_params]
+
+        # Nothing to insert ("clear all" or a no-op save): a lone DELETE needs no explicit
+        # transaction, and there is no fresh total to report back
+        if not insert_params:
+            if iom_ids:
+                with connection.cursor() as cur:
+                    cur.execute(delete_sql, delete_params)
+            return JsonResponse({"ok": True, "saved_items": [], "billing_start": billing_start.strftime("%Y-%m-%d")})
+
+        # Begin DB transaction: delete old entries per IOM, insert new ones, and read back
+        # the per-user totals on the same cursor
+        saved_items = []
         with transaction.atomic():
             with connection.cursor() as cur:
-                # Build list of IOMs we will update (unique, non-empty)
-                iom_ids = sorted({it.get("iom_id") for it in items if it.get("iom_id")})
                 if iom_ids:
-                    for iom_id in iom_ids:
-                        # Delete existing entries for this project+iom+billing_start+subproject (supports subproject null)
-                        cur.execute("""
-                            DELETE FROM monthly_allocation_entries
-                            WHERE project_id=%s
-                              AND iom_id=%s
-                              AND month_start=%s
-                              AND (subproject_id=%s OR (%s IS NULL AND subproject_id IS NULL))
-                        """, [project_id, iom_id, billing_start, subproject_id, subproject_id])
-
-                # Insert each item row
-                for it in items:
-                    iom_id = it.get("iom_id")
-                    user_ldap = (it.get("user_ldap") or "").strip()
-                    if not iom_id or not user_ldap:
-                        # skip incomplete rows
-                        continue
-                    try:
-                        total_hours = float(it.get("total_hours") or 0.0)
-                    except Exception:
-                        total_hours = 0.0
+                    cur.execute(delete_sql, delete_params)
 
-                    # Defensive: ensure billing_start is a date or convertible string
-                    param_billing_start = billing_start
-                    # Insert using parameterized query (Django DB API will convert date -> SQL date)
-                    cur.execute("""
-                        INSERT INTO monthly_allocation_entries
-                          (project_id, subproject_id, iom_id, month_start, user_ldap, total_hours, created_at)
-                        VALUES (%s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
-                    """, [project_id, subproject_id, iom_id, param_billing_start, user_ldap, total_hours])
+                # executemany: the MySQL driver sends a single multi-row INSERT
+                cur.executemany(_SQL_INSERT_MAE, insert_params)
 
-        # After insert, fetch saved items summary for response: user_ldap -> total_hours for the (project, billing_start, subproject)
-        saved_items = []
-        with connection.cursor() as cur:
-            cur.execute("""
-                SELECT user_ldap, COALESCE(SUM(total_hours), 0) AS total_hours
-                FROM monthly_allocation_entries
-                WHERE project_id=%s
-                  AND month_start=%s
-                  AND (subproject_id=%s OR (%s IS NULL AND subproject_id IS NULL))
-                GROUP BY user_ldap
-                ORDER BY user_ldap
-            """, [project_id, billing_start, subproject_id, subproject_id])
-            rows = cur.fetchall() or []
+                # saved items summary for response: user_ldap -> total_hours for the (project, billing_start, subproject)
+                cur.execute(_SQL_MAE_USER_TOTALS, [project_id, billing_start, subproject_id, subproject_id])
+                rows = cur.fetchall() or []
 
         # Compute billing hours for FTE calculation (use _get_month_hours_limit if present)
         try:
@@ -2114,8 +2570,23 @@ def _sql_in_clause(items):
     """
     if not items:
         return "(NULL)", []
-    placeholders = ",".join(["%s"] * len(items))
-    return f"({placeholders})", list(items)
+    return _in_placeholders(len(items)), list(items)
+
+
+@lru_cache(maxsize=128)
+def _in_placeholders(n):
+    """Return the "(%s,...,%s)" fragment for an n-item IN list, memoized per arity."""
+    return "(" + ",".join(["%s"] * n) + ")"
+
+
+@lru_cache(maxsize=256)
+def _sql_with_in(template, n):
+    """
+    Return `template` with every {in_frag} filled in for an n-item IN list
+    (as built by _sql_in_clause), memoized per (template, arity) so fixed-shape
+    queries are not re-formatted on every request.
+    """
+    return template.format(in_frag=_in_placeholders(n) if n else "(NULL)")
 
 
 def is_pdl_user(ldap_entry):
@@ -2167,13 +2638,134 @@ def is_pdl_user(ldap_entry):
 
 # ---- Main view ---------------------------------------------------------
 
-import json
 from datetime import date
 from django.shortcuts import render, redirect
 from django.db import connection
 # ensure you have logger, dictfetchall, get_billing_period, get_user_entry_by_username,
 # get_reportees_for_user_dn, _get_month_hours_limit in your module scope
 
+REPORTEES_CACHE_KEY = "projects:reportees:%s"
+REPORTEES_CACHE_TIMEOUT = 1800
+
+
+def _get_direct_reportees(session_ldap, creds):
+    """
+    Return (reportees_ldaps, reportees_map) for the direct reportees of session_ldap,
+    keyed by lower-cased mail/sAMAccountName, or None when the user has no LDAP entry.
+    Reporting lines rarely change within a day, so the result is cached for
+    REPORTEES_CACHE_TIMEOUT seconds to spare the two LDAP round-trips per page load.
+    """
+    session_ldap_l = (session_ldap or "").lower()
+    key = REPORTEES_CACHE_KEY % session_ldap_l
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    user_entry = get_user_entry_by_username(session_ldap, username_password_for_conn=creds)
+    if not user_entry:
+        logger.warning("team_allocations: no LDAP entry for %s", session_ldap)
+        return None
+
+    try:
+        reportees_entries = get_reportees_for_user_dn(getattr(user_entry, "entry_dn", None),
+                                                      username_password_for_conn=creds) or []
+    except Exception as ex:
+        # don't cache a failed lookup; the next page load retries
+        logger.exception("team_allocations: get_reportees_for_user_dn failed: %s", ex)
+        return [], {}
+
+    # Normalize reportees (dict keeps insertion order and gives O(1) de-dup)
+    reportees_map = {}
+    for ent in reportees_entries:
+        mail = None; cn = None; sam = None
+        try:
+            if isinstance(ent, dict):
+                mail = ent.get("mail") or ent.get("email") or ent.get("userPrincipalName")
+                cn = ent.get("cn") or ent.get("displayName")
+                sam = ent.get("sAMAccountName")
+            else:
+                mail = getattr(ent, "mail", None) or getattr(ent, "email", None) or getattr(ent, "userPrincipalName", None)
+                cn = getattr(ent, "cn", None) or getattr(ent, "displayName", None)
+                sam = getattr(ent, "sAMAccountName", None)
+        except Exception:
+            pass
+        identifier = (mail or sam or "").strip()
+        if not identifier:
+            continue
+        l = identifier.lower()
+        if l in reportees_map:
+            continue
+        reportees_map[l] = {"ldap": identifier, "mail": mail or "", "cn": cn or "", "sAMAccountName": sam or ""}
+
+    reportees_map.pop(session_ldap_l, None)
+    result = (list(reportees_map), reportees_map)
+    cache.set(key, result, REPORTEES_CACHE_TIMEOUT)
+    return result
+
+
+# team_allocations: all three reads in one statement, rows tagged by `kind`.
+# Columns: kind, id, sub_id, ldap, name, extra, num (+ s1/s2 for ordering).
+#   alloc: one row per reportee: -, -, user_ldap, username, email, SUM(total_hours)
+#   dist:  team_distributions.id, subproject_id, reportee_ldap, -, -, hours
+#   lead:  -, subproject_id, -, subproject name, project name, SUM(total_hours)
+# {in_frag} is an _sql_in_clause fragment. The ldap columns use a
+# case-insensitive collation, so they are compared bare (no LOWER()) to keep the
+# (month_start, user_ldap) / (lead_ldap, month_start) indexes usable.
+_TEAM_ALLOCATIONS_SQL = """
+    SELECT kind, id, sub_id, ldap, name, extra, num
+    FROM (
+        SELECT 'alloc' AS kind, NULL AS id, NULL AS sub_id, MAX(mae.user_ldap) AS ldap,
+               COALESCE(MAX(u.username), MAX(mae.user_ldap)) AS name,
+               COALESCE(MAX(u.email), MAX(mae.user_ldap)) AS extra,
+               SUM(COALESCE(mae.total_hours, 0)) AS num,
+               LOWER(MAX(mae.user_ldap)) AS s1, NULL AS s2
+        FROM monthly_allocation_entries mae
+        LEFT JOIN users u ON u.email = mae.user_ldap
+        WHERE mae.month_start = %s
+          AND mae.user_ldap IN {in_frag}
+        GROUP BY mae.user_ldap
+        UNION ALL
+        SELECT 'dist', td.id, td.subproject_id, td.reportee_ldap, NULL, NULL, td.hours, NULL, NULL
+        FROM team_distributions td
+        WHERE td.lead_ldap = %s AND td.month_start = %s
+        UNION ALL
+        SELECT 'lead', NULL, mae.subproject_id, NULL,
+               COALESCE(sp.name, '(no subproject)'),
+               COALESCE(p.name, '(no project)'),
+               SUM(COALESCE(mae.total_hours, 0)), p.name, sp.name
+        FROM monthly_allocation_entries mae
+        LEFT JOIN projects p ON mae.project_id = p.id
+        LEFT JOIN subprojects sp ON mae.subproject_id = sp.id
+        WHERE mae.month_start = %s
+          AND mae.user_ldap = %s
+        GROUP BY mae.subproject_id, sp.name, p.name
+    ) t
+    ORDER BY kind, s1, s2
+"""
+
+
+@dataclass(slots=True)
+class DistItem:
+    """One reportee's team_distributions row in a team_allocations lead allocation."""
+    id: int | None
+    allocation_id: int | None
+    reportee_ldap: str
+    username: str
+    email: str
+    hours: float
+    week_perc: list
+
+
+@dataclass(slots=True)
+class LeadAllocation:
+    """The lead's own allocation for one subproject, with its distribution to reportees."""
+    subproject_id: int | None
+    project_name: str
+    subproject_name: str
+    total_hours: float
+    distribution: list = field(default_factory=list)
+
+
 @require_GET
 def team_allocations(request):
     """
@@ -2231,94 +2823,29 @@ def team_allocations(request):
     except Exception:
         billing_period_display = ""
 
-    # Get LDAP entry for current user
+    # Direct reportees of the current user (LDAP, cached per user)
     try:
-        user_entry = get_user_entry_by_username(session_ldap, username_password_for_conn=creds)
-        if not user_entry:
-            logger.warning("team_allocations: no LDAP entry for %s", session_ldap)
-            return render(request, "projects/team_allocations.html", {
-                "month_start": month_start, "month_end": month_end,
-                "billing_month": billing_month, "billing_period_display": billing_period_display,
-                "rows": [], "summary": {}, "weekly_map": {}, "lead_allocations": [], "reportees_json": "[]", "monthly_hours": 183.75
-            })
+        reportees = _get_direct_reportees(session_ldap, creds)
     except Exception as ex:
         logger.exception("team_allocations: error fetching own LDAP entry: %s", ex)
+        reportees = None
+    if reportees is None:
         return render(request, "projects/team_allocations.html", {
             "month_start": month_start, "month_end": month_end,
             "billing_month": billing_month, "billing_period_display": billing_period_display,
-            "rows": [], "summary": {}, "weekly_map": {}, "lead_allocations": [], "reportees_json": "[]", "monthly_hours": 183.75
+            "summary": {}, "lead_allocations": [], "reportees_json": "[]", "monthly_hours": 183.75
         })
+    reportees_ldaps, reportees_map = reportees
 
-    # Get direct reportees via your helper
-    try:
-        reportees_entries = get_reportees_for_user_dn(getattr(user_entry, "entry_dn", None),
-                                                      username_password_for_conn=creds) or []
-    except Exception as ex:
-        logger.exception("team_allocations: get_reportees_for_user_dn failed: %s", ex)
-        reportees_entries = []
-
-    # Normalize reportees
-    reportees_ldaps = []
-    reportees_map = {}
-    for ent in reportees_entries:
-        mail = None; cn = None; sam = None
-        try:
-            if isinstance(ent, dict):
-                mail = ent.get("mail") or ent.get("email") or ent.get("userPrincipalName")
-                cn = ent.get("cn") or ent.get("displayName")
-                sam = ent.get("sAMAccountName")
-            else:
-                mail = getattr(ent, "mail", None) or getattr(ent, "email", None) or getattr(ent, "userPrincipalName", None)
-                cn = getattr(ent, "cn", None) or getattr(ent, "displayName", None)
-                sam = getattr(ent, "sAMAccountName", None)
-        except Exception:
-            pass
-        identifier = (mail or sam or "").strip()
-        if not identifier:
-            continue
-        l = identifier.lower()
-        if l not in reportees_ldaps:
-            reportees_ldaps.append(l)
-            reportees_map[l] = {"ldap": identifier, "mail": mail or "", "cn": cn or "", "sAMAccountName": sam or ""}
-
-    session_ldap_l = (session_ldap or "").lower()
-    if session_ldap_l in reportees_ldaps:
-        reportees_ldaps.remove(session_ldap_l)
-        reportees_map.pop(session_ldap_l, None)
-
-    # Fetch monthly_allocation_entries for these reportees (as before)
-    rows = []
-    if reportees_ldaps:
-        try:
-            placeholders = ",".join(["%s"] * len(reportees_ldaps))
-            sql = f"""
-                SELECT mae.id AS allocation_id,
-                       mae.user_ldap,
-                       COALESCE(u.username, mae.user_ldap) AS username,
-                       COALESCE(u.email, mae.user_ldap) AS email,
-                       mae.subproject_id AS subproject_id,
-                       p.name AS project_name,
-                       sp.name AS subproject_name,
-                       pw.department AS domain_name,
-                       COALESCE(mae.total_hours, 0) AS total_hours
-                FROM monthly_allocation_entries mae
-                LEFT JOIN users u ON LOWER(u.email) = LOWER(mae.user_ldap)
-                LEFT JOIN projects p ON mae.project_id = p.id
-                LEFT JOIN subprojects sp ON mae.subproject_id = sp.id
-                LEFT JOIN prism_wbs pw ON mae.iom_id = pw.iom_id
-                WHERE mae.month_start = %s
-                  AND LOWER(mae.user_ldap) IN ({placeholders})
-                ORDER BY LOWER(mae.user_ldap), p.name
-            """
-            params = [month_start] + reportees_ldaps
-            with connection.cursor() as cur:
-                cur.execute(sql, params)
-                rows = dictfetchall(cur)
-        except Exception as ex:
-            logger.exception("team_allocations: allocations query failed: %s", ex)
-            rows = []
-    else:
-        rows = []
+    # flat display lookups, built once from reportees_map and shared by every loop below
+    cn_by_ldap = {}
+    mail_by_ldap = {}
+    reportees_json_list = []  # for the frontend selects
+    for k, v in reportees_map.items():
+        ldap = v.get("ldap") or k
+        cn_by_ldap[k] = v.get("cn") or ldap
+        mail_by_ldap[k] = v.get("mail") or ldap
+        reportees_json_list.append({"ldap": ldap, "mail": v.get("mail") or "", "cn": cn_by_ldap[k]})
 
     # monthly hours limit
     try:
@@ -2326,59 +2853,63 @@ def team_allocations(request):
     except Exception:
         month_hours = 183.75
 
-    # summary aggregation from monthly_allocation_entries
+    # One round-trip for everything below: the reportees' monthly_allocation_entries ('alloc'),
+    # this lead's team_distributions ('dist') and the lead's own allocations per subproject
+    # ('lead'), tagged by kind (see _TEAM_ALLOCATIONS_SQL).
+    # Being a single statement, there is nothing left to overlap across threads/connections.
+    # Rows are read through iter_rows (unbuffered, fetchmany batches) and folded into the
+    # maps below as they arrive.
     summary = {}
-    for r in rows:
-        u = (r.get("user_ldap") or "").strip()
-        if not u:
-            continue
-        key = u.lower()
-        summary.setdefault(key, {
-            "name": r.get("username") or reportees_map.get(key, {}).get("cn") or u,
-            "email": r.get("email") or reportees_map.get(key, {}).get("mail") or u,
-            "total_hours": 0.0
-        })
-        try:
-            summary[key]["total_hours"] += float(r.get("total_hours") or 0.0)
-        except Exception:
-            pass
+    team_dist_map = {}  # subproject_id -> list of {reportee_ldap, hours}
+    la_rows = []
+    in_params = list(reportees_ldaps)
+    params = [month_start, *in_params, session_ldap, month_start, month_start, session_ldap]
+    try:
+        with closing(iter_rows(_sql_with_in(_TEAM_ALLOCATIONS_SQL, len(in_params)), params)) as rows:
+            for kind, row_id, sub_id, ldap, name, extra, num in rows:
+                if kind == "alloc":
+                    # per-reportee totals, already summed by the database
+                    u = (ldap or "").strip()
+                    if not u:
+                        continue
+                    key = u.lower()
+                    summary[key] = {
+                        "name": name or cn_by_ldap.get(key, u),
+                        "email": extra or mail_by_ldap.get(key, u),
+                        "total_hours": float(num or 0.0)
+                    }
+                elif kind == "dist":
+                    # existing team_distributions assigned by this lead for this billing month
+                    # (so we can pre-populate the distribution table and reflect totals)
+                    team_dist_map.setdefault(str(sub_id or 'none'), []).append({
+                        "id": int(row_id) if row_id is not None else None,
+                        "reportee_ldap": (ldap or "").strip(),
+                        "hours": float(num or 0.0),
+                        # week_perc not stored here in this table; frontend will keep zeros or user-entered
+                        "week_perc": [0, 0, 0, 0]
+                    })
+                else:
+                    # lead's own monthly_allocation_entries grouped by subproject
+                    la_rows.append({
+                        "subproject_id": sub_id,
+                        "subproject_name": name,
+                        "project_name": extra,
+                        "total_hours": num,
+                    })
+    except Exception as ex:
+        logger.exception("team_allocations: allocations query failed: %s", ex)
+        summary, team_dist_map, la_rows = {}, {}, []
 
     # ensure reportees with no allocations are present
     for rldap in reportees_ldaps:
         if rldap not in summary:
-            entry = reportees_map.get(rldap, {"ldap": rldap, "mail": rldap, "cn": rldap})
             summary[rldap] = {
-                "name": entry.get("cn") or entry.get("ldap"),
-                "email": entry.get("mail") or entry.get("ldap"),
+                "name": cn_by_ldap.get(rldap, rldap),
+                "email": mail_by_ldap.get(rldap, rldap),
                 "total_hours": 0.0,
                 "no_allocation": True
             }
 
-    # Now read existing team_distributions assigned by this lead for this billing month
-    # (so we can pre-populate the distribution table and reflect totals)
-    team_dist_map = {}  # subproject_id -> list of {reportee_ldap, hours}
-    try:
-        with connection.cursor() as cur:
-            cur.execute("""
-                SELECT id, subproject_id, reportee_ldap, hours
-                FROM team_distributions
-                WHERE lead_ldap = %s AND month_start = %s
-            """, [session_ldap, month_start])
-            trows = dictfetchall(cur)
-            for tr in trows:
-                sp = tr.get('subproject_id') or 'none'
-                team_dist_map.setdefault(str(sp), []).append({
-                    "id": int(tr.get("id")) if tr.get("id") is not None else None,
-                    "reportee_ldap": (tr.get("reportee_ldap") or "").strip(),
-                    "hours": float(tr.get("hours") or 0.0),
-                    # week_perc not stored here in this table; frontend will keep zeros or user-entered
-                    "week_perc": [0, 0, 0, 0]
-                })
-
-    except Exception as ex:
-        logger.exception("team_allocations: team_distributions read failed: %s", ex)
-        team_dist_map = {}
-
     # Add team distribution hours to summary totals (so reportee cards show what lead allocated)
     for spid, dlist in team_dist_map.items():
         for d in dlist:
@@ -2409,111 +2940,52 @@ def team_allocations(request):
         else:
             s["color"] = "light-red"
 
-    # Weekly map reading (unchanged)
-    weekly_map = {}
-    allocation_ids = [r["allocation_id"] for r in rows if r.get("allocation_id")]
-    if allocation_ids:
-        try:
-            placeholders = ",".join(["%s"]*len(allocation_ids))
-            with connection.cursor() as cur:
-                cur.execute(f"""
-                    SELECT allocation_id, week_number, percent
-                    FROM weekly_allocations
-                    WHERE allocation_id IN ({placeholders})
-                """, allocation_ids)
-                wrows = dictfetchall(cur)
-                for w in wrows:
-                    aid = w["allocation_id"]
-                    weekly_map.setdefault(aid, {})[int(w["week_number"])] = {"percent": float(w["percent"] or 0)}
-        except Exception as ex:
-            logger.exception("team_allocations: weekly_allocations read failed: %s", ex)
-
-    # Build lead_allocations (lead's own monthly_allocation_entries) grouped by subproject
-    lead_allocations = []
-    try:
-        with connection.cursor() as cur:
-            cur.execute("""
-                SELECT mae.subproject_id,
-                       COALESCE(sp.name, '(no subproject)') AS subproject_name,
-                       COALESCE(p.name, '(no project)') AS project_name,
-                       SUM(COALESCE(mae.total_hours,0)) AS total_hours
-                FROM monthly_allocation_entries mae
-                LEFT JOIN projects p ON mae.project_id = p.id
-                LEFT JOIN subprojects sp ON mae.subproject_id = sp.id
-                WHERE mae.month_start = %s
-                  AND LOWER(mae.user_ldap) = LOWER(%s)
-                GROUP BY mae.subproject_id, sp.name, p.name
-                ORDER BY p.name, sp.name
-            """, [month_start, session_ldap])
-            la_rows = dictfetchall(cur) or []
-    except Exception as ex:
-        logger.exception("team_allocations: lead allocations fetch failed: %s", ex)
-        la_rows = []
-
     # Build the lead_allocations_final structure and attach distribution items from team_dist_map when present
     lad_map = {}
     for la in la_rows:
         key = str(la.get("subproject_id") or "none")
-        lad_map[key] = {
-            "subproject_id": la.get("subproject_id"),
-            "project_name": la.get("project_name"),
-            "subproject_name": la.get("subproject_name"),
-            "total_hours": float(la.get("total_hours") or 0.0),
-            "distribution": []
-        }
+        lad_map[key] = LeadAllocation(
+            la.get("subproject_id"),
+            la.get("project_name"),
+            la.get("subproject_name"),
+            float(la.get("total_hours") or 0.0),
+        )
     # if lead has no explicit monthly allocation row but there are team_distributions, show those subprojects too
     for spkey in team_dist_map.keys():
         if spkey not in lad_map:
-            lad_map[spkey] = {
-                "subproject_id": (int(spkey) if spkey.isdigit() else None),
-                "project_name": "(unknown)",
-                "subproject_name": "(unknown)",
-                "total_hours": 0.0,
-                "distribution": []
-            }
+            lad_map[spkey] = LeadAllocation(
+                (int(spkey) if spkey.isdigit() else None), "(unknown)", "(unknown)", 0.0
+            )
 
     # Now populate distribution lists for each subproject: prefer team_distributions entries (what lead previously assigned)
     for spkey, la in lad_map.items():
         dlist = team_dist_map.get(spkey, [])
-        # Convert dlist items to include username/email if possible using reportees_map
+        # Convert dlist items to include username/email if possible using the reportee lookups
         dist_items = []
         for d in dlist:
             ldap = (d.get("reportee_ldap") or "").lower()
-            cn = reportees_map.get(ldap, {}).get("cn") or ldap
-            mail = reportees_map.get(ldap, {}).get("mail") or ldap
-            dist_items.append({
-                "id": int(d.get("id")) if d.get("id") is not None else None,  # <-- NEW: DB PK of team_distributions
-                "allocation_id": None,
-                "reportee_ldap": ldap,
-                "username": cn,
-                "email": mail,
-                "hours": float(d.get("hours") or 0.0),
-                "week_perc": d.get("week_perc") or [0, 0, 0, 0]
-            })
-
-        la["distribution"] = dist_items
+            dist_items.append(DistItem(
+                int(d.get("id")) if d.get("id") is not None else None,  # DB PK of team_distributions
+                None,
+                ldap,
+                cn_by_ldap.get(ldap, ldap),
+                mail_by_ldap.get(ldap, ldap),
+                float(d.get("hours") or 0.0),
+                d.get("week_perc") or [0, 0, 0, 0],
+            ))
+
+        la.distribution = dist_items
 
     lead_allocations_final = list(lad_map.values())
 
-    # reportees_json for frontend selects
-    reportees_json_list = []
-    for k, v in reportees_map.items():
-        reportees_json_list.append({
-            "ldap": v.get("ldap") or k,
-            "mail": v.get("mail") or "",
-            "cn": v.get("cn") or v.get("ldap") or k
-        })
-
     context = {
         "month_start": month_start,
         "month_end": month_end,
         "billing_month": billing_month,
         "billing_period_display": billing_period_display,
-        "rows": rows,
         "summary": summary,
-        "weekly_map": weekly_map,
         "lead_allocations": lead_allocations_final,
-        "reportees_json": json.dumps(reportees_json_list),
+        "reportees_json": fast_json_dumps(reportees_json_list),
         "monthly_hours": month_hours,
     }
     return render(request, "projects/team_allocations.html", context)
@@ -2564,47 +3036,48 @@ def save_team_allocation(request):
     try:
         total_hours_dec = Decimal(str(total_hours_raw or '0.00'))
     except Exception:
-        total_hours_dec = Decimal('0.00')
+        total_hours_dec = _D0
 
     result_weeks = {}
+    upsert_rows = []
+    for wk_key, pct_val in weekly.items():
+        # normalize week number
+        try:
+            week_num = int(wk_key)
+        except Exception:
+            # skip invalid week keys
+            continue
+        # coerce percent to Decimal and clamp
+        try:
+            pct_dec = Decimal(str(pct_val))
+        except Exception:
+            pct_dec = _D0
+        if pct_dec < _D0:
+            pct_dec = _D0
+        if pct_dec > _D100:
+            pct_dec = _D100
 
-    try:
-        with transaction.atomic():
-            with connection.cursor() as cur:
-                for wk_key, pct_val in weekly.items():
-                    # normalize week number
-                    try:
-                        week_num = int(wk_key)
-                    except Exception:
-                        # skip invalid week keys
-                        continue
-                    # coerce percent to Decimal and clamp
-                    try:
-                        pct_dec = Decimal(str(pct_val))
-                    except Exception:
-                        pct_dec = Decimal('0.00')
-                    if pct_dec < Decimal('0.00'):
-                        pct_dec = Decimal('0.00')
-                    if pct_dec > Decimal('100.00'):
-                        pct_dec = Decimal('100.00')
-
-                    # compute hours = total_hours * (pct/100), quantized to 2 decimals
-                    hours_dec = (total_hours_dec * (pct_dec / Decimal('100.00'))).quantize(
-                        Decimal('0.01'), rounding=ROUND_HALF_UP
-                    )
+        # compute hours = total_hours * (pct/100), quantized to 2 decimals
+        hours_dec = (total_hours_dec * (pct_dec / _D100)).quantize(_DCENT, rounding=ROUND_HALF_UP)
+        upsert_rows.append((allocation_id, week_num, str(pct_dec), str(hours_dec)))
 
-                    # Upsert percent and hours
-                    cur.execute("""
-                        INSERT INTO weekly_allocations (allocation_id, week_number, percent, hours, updated_at)
-                        VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
-                        ON DUPLICATE KEY UPDATE
-                          percent = VALUES(percent),
-                          hours = VALUES(hours),
-                          updated_at = CURRENT_TIMESTAMP
-                    """, [allocation_id, week_num, str(pct_dec), str(hours_dec)])
+        # prepare response payload (strings to preserve decimal formatting)
+        result_weeks[str(week_num)] = format(hours_dec, '0.2f')
 
-                    # prepare response payload (strings to preserve decimal formatting)
-                    result_weeks[str(week_num)] = format(hours_dec, '0.2f')
+    try:
+        if upsert_rows:
+            # Upsert percent and hours for all weeks in one statement: executemany folds the
+            # rows into a multi-row VALUES list (placeholders only; updated_at is set by the
+            # column default on insert and explicitly on update)
+            with connection.cursor() as cur:
+                cur.executemany("""
+                    INSERT INTO weekly_allocations (allocation_id, week_number, percent, hours)
+                    VALUES (%s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                      percent = VALUES(percent),
+                      hours = VALUES(hours),
+                      updated_at = CURRENT_TIMESTAMP
+                """, upsert_rows)
 
     except Exception as exc:
         # optional: logger.exception("save_team_allocation failed: %s", exc)
@@ -2615,7 +3088,6 @@ def save_team_allocation(request):
 # -------------------------------------------------------------------
 # 3. MY ALLOCATIONS (VIEW)
 # -------------------------------------------------------------------
-from math import ceil
 from datetime import date, datetime, timedelta
 from decimal import Decimal, ROUND_HALF_UP
 
@@ -2623,7 +3095,6 @@ from decimal import Decimal, ROUND_HALF_UP
 # MY ALLOCATIONS (fixed)
 # -------------------------------------------------------------------
 # Add these imports at top of your views.py if not present
-import json
 from datetime import date, datetime, timedelta
 from decimal import Decimal, ROUND_HALF_UP
 from django.http import JsonResponse, HttpResponseForbidden
@@ -2631,7 +3102,6 @@ from django.db import connection, transaction
 from django.views.decorators.http import require_POST
 from django.shortcuts import render
 from django.urls import reverse
-import logging
 
 
 # Count working days Mon-Fri (exclude weekends Sat/Sun) and exclude holiday_dates set
@@ -2645,7 +3115,6 @@ def _count_working_days(start_date, end_date, holidays_set):
     return cnt
 
 # add/replace these imports at top of your views.py if missing
-import json
 from datetime import date, datetime, timedelta
 from decimal import Decimal, ROUND_HALF_UP
 from django.http import JsonResponse, HttpResponseForbidden
@@ -2715,8 +3184,18 @@ def _compute_weeks_for_billing(billing_start, billing_end):
     or the nearest previous Friday — but never produce wk_end < cur_start.
 
     Returns list of dicts {num, start, end} where start/end are date objects.
+    The slices are memoized per billing period; callers get fresh dicts and may
+    attach their own keys.
     """
-    print(f"START: _compute_weeks_for_billing | billing_start={billing_start}, billing_end={billing_end}")
+    return [
+        {'num': num, 'start': start, 'end': end}
+        for num, start, end in _weeks_for_billing_cached(billing_start, billing_end)
+    ]
+
+
+@lru_cache(maxsize=64)
+def _weeks_for_billing_cached(billing_start, billing_end):
+    """Week slices for `_compute_weeks_for_billing` as an immutable tuple of (num, start, end)."""
     weeks = []
     cur_start = billing_start
     wknum = 1
@@ -2724,40 +3203,32 @@ def _compute_weeks_for_billing(billing_start, billing_end):
     MAX_WEEKS = 1000
 
     while cur_start <= billing_end and wknum <= MAX_WEEKS:
-        print(f"  Loop wknum={wknum} | cur_start={cur_start}")
         # days_to_friday: how many days from cur_start to the next Friday (weekday 4)
         days_to_friday = (4 - cur_start.weekday()) % 7
         tentative_wk_end = cur_start + timedelta(days=days_to_friday)
-        print(f"    days_to_friday={days_to_friday} | tentative wk_end={tentative_wk_end}")
 
         wk_end = tentative_wk_end
 
         # If tentative week end goes past billing_end, clamp it.
         if wk_end > billing_end:
-            print(f"    wk_end {wk_end} > billing_end {billing_end}, clamping")
             # Candidate Friday computed from billing_end (previous Friday)
             candidate_friday = billing_end
             if billing_end.weekday() >= 5:
                 # billing_end is Sat(5) or Sun(6)
                 candidate_friday = billing_end - timedelta(days=(billing_end.weekday() - 4))
-                print(f"    billing_end {billing_end} is weekend; candidate_friday={candidate_friday}")
 
             # Use candidate_friday only if it's >= cur_start (keeps start <= end).
             if candidate_friday >= cur_start:
                 wk_end = candidate_friday
-                print(f"    using candidate_friday as wk_end: {wk_end}")
             else:
                 # candidate_friday would be before cur_start -> use billing_end instead
                 wk_end = billing_end
-                print(f"    candidate_friday {candidate_friday} < cur_start {cur_start}; using billing_end as wk_end: {wk_end}")
 
         # Safety check: ensure wk_end >= cur_start (if not, clamp to cur_start)
         if wk_end < cur_start:
-            print(f"    Safety clamp: wk_end {wk_end} < cur_start {cur_start} -> forcing wk_end = cur_start")
             wk_end = cur_start
 
-        weeks.append({'num': wknum, 'start': cur_start, 'end': wk_end})
-        print(f"    Appended week: num={wknum}, start={cur_start}, end={wk_end}")
+        weeks.append((wknum, cur_start, wk_end))
 
         # Advance to the day after wk_end for next week
         cur_start = wk_end + timedelta(days=1)
@@ -2765,10 +3236,24 @@ def _compute_weeks_for_billing(billing_start, billing_end):
 
     if wknum > MAX_WEEKS:
         # defensive: log if we hit the iteration cap
-        print(f"WARNING: _compute_weeks_for_billing reached MAX_WEEKS={MAX_WEEKS} and stopped to avoid infinite loop")
+        logger.warning("_compute_weeks_for_billing reached MAX_WEEKS=%s and stopped to avoid infinite loop", MAX_WEEKS)
 
-    print(f"END: _compute_weeks_for_billing | total weeks={len(weeks)}")
-    return weeks
+    logger.debug("_compute_weeks_for_billing %s..%s -> %d weeks", billing_start, billing_end, len(weeks))
+    return tuple(weeks)
+
+
+@lru_cache(maxsize=256)
+def _build_daily_dates(start, end):
+    """
+    Return the days in [start, end] as an immutable tuple of
+    (date, 'YYYY-MM-DD', weekday abbrev, weekday name), memoized per range.
+    """
+    days = []
+    cur_day = start
+    while cur_day <= end:
+        days.append((cur_day, cur_day.strftime('%Y-%m-%d'), cur_day.strftime('%a'), cur_day.strftime('%A')))
+        cur_day += timedelta(days=1)
+    return tuple(days)
 
 def compute_weeks_for_tl_punch_review(billing_start, billing_end):
     """
@@ -2846,7 +3331,45 @@ from django.urls import reverse
 from django.db import connection
 from datetime import date, timedelta, datetime
 from decimal import Decimal, ROUND_HALF_UP
-import json
+
+@dataclass(slots=True)
+class MyAllocationRow:
+    """One team distribution's week row on the my_allocations page."""
+    team_distribution_id: int
+    project_id: int | None
+    subproject_id: int | None
+    project_name: str
+    subproject_name: str
+    week_num: int
+    week_start: str
+    week_end: str
+    tl_allocation_hours: str
+    working_days: int
+    actual_effort: str
+    day_slots: list
+
+
+# weekly percent splits of a set of team_distributions ({in_frag})
+_SQL_TD_WEEK_PERCENTS = """
+    SELECT team_distribution_id, week_number, percent
+    FROM weekly_allocations
+    WHERE team_distribution_id IN {in_frag}
+"""
+
+# my_allocations reads, keyed by the user's team_distributions ids ({in_frag})
+_SQL_MY_WEEKLY_HOURS = """
+    SELECT team_distribution_id, week_number, hours
+    FROM weekly_allocations
+    WHERE team_distribution_id IN {in_frag}
+"""
+_SQL_MY_PUNCH_DATA = """
+    SELECT team_distribution_id, punch_date, allocated_hours, punched_hours, status
+    FROM punch_data
+    WHERE team_distribution_id IN {in_frag}
+      AND user_email = %s
+      AND month_start = %s
+"""
+
 
 # python
 def my_allocations(request):
@@ -2866,7 +3389,7 @@ def my_allocations(request):
 
     billing_start, billing_end = _get_billing_period_from_month(selected_year, selected_month)
 
-    monthly_max_hours = Decimal('0.00')
+    monthly_max_hours = 0.0
     with connection.cursor() as cur:
         cur.execute(
             "SELECT max_hours FROM monthly_hours_limit WHERE year=%s AND month=%s LIMIT 1",
@@ -2874,7 +3397,7 @@ def my_allocations(request):
         )
         r = cur.fetchone()
         if r and r[0]:
-            monthly_max_hours = Decimal(str(r[0]))
+            monthly_max_hours = float(r[0])
 
     weeks = _compute_weeks_for_billing(billing_start, billing_end)
     current_week = None
@@ -2890,19 +3413,9 @@ def my_allocations(request):
         selected_week = str(current_week)
 
     # Holidays
-    with connection.cursor() as cur:
-        cur.execute(
-            "SELECT holiday_date, name FROM holidays WHERE holiday_date BETWEEN %s AND %s",
-            [billing_start, billing_end]
-        )
-        hr = dictfetchall(cur)
-    holidays_set = set()
-    holidays_map = {}
-    for h in hr:
-        d = _to_date(h.get('holiday_date'))
-        if d:
-            holidays_set.add(d)
-            holidays_map[d.strftime("%Y-%m-%d")] = h.get('name', '')
+    holidays_by_date = _get_holidays(billing_start, billing_end)
+    holidays_set = set(holidays_by_date)
+    holidays_map = {d.strftime("%Y-%m-%d"): name for d, name in holidays_by_date.items()}
 
     # Leave daily distribution map
     leave_map = {}
@@ -2913,10 +3426,10 @@ def my_allocations(request):
             WHERE LOWER(user_email) = LOWER(%s) AND year = %s AND month = %s
               AND status IN ('PENDING', 'APPROVED')
         """, [user_email, selected_year, selected_month])
-        for r in dictfetchall(cur):
+        for r in dict_iter(cur):
             start = r['leave_start']
             end = r['leave_end']
-            hours = Decimal(str(r['leave_hours'] or '0.00'))
+            hours = float(r['leave_hours'] or 0)
             if not start or not end:
                 continue
             working_days = []
@@ -2928,9 +3441,9 @@ def my_allocations(request):
             num_days = len(working_days)
             if num_days == 0:
                 continue
-            per_day = (hours / Decimal(num_days)).quantize(Decimal('0.01'))
+            per_day = round(hours / num_days, 2)
             for d in working_days:
-                leave_map[d] = leave_map.get(d, Decimal('0.00')) + per_day
+                leave_map[d] = leave_map.get(d, 0.0) + per_day
 
     # Team distributions (project allocations)
     with connection.cursor() as cur:
@@ -2945,7 +3458,7 @@ def my_allocations(request):
             FROM team_distributions td
             LEFT JOIN projects p ON p.id = td.project_id
             LEFT JOIN subprojects sp ON sp.id = td.subproject_id
-            WHERE LOWER(td.reportee_ldap) = LOWER(%s) AND td.month_start = %s
+            WHERE td.reportee_ldap = %s AND td.month_start = %s
             ORDER BY td.id
         """, [user_email, billing_start])
         td_rows = dictfetchall(cur)
@@ -2959,122 +3472,122 @@ def my_allocations(request):
                 FROM team_distributions td
                 LEFT JOIN projects p ON p.id = td.project_id
                 LEFT JOIN subprojects sp ON sp.id = td.subproject_id
-                WHERE LOWER(td.reportee_ldap) = LOWER(%s) AND td.month_start BETWEEN %s AND %s
+                WHERE td.reportee_ldap = %s AND td.month_start BETWEEN %s AND %s
                 ORDER BY td.id
             """, [user_email, billing_start, billing_end])
             td_rows = dictfetchall(cur)
 
-    # Weekly allocations
-    weekly_alloc_map = {}
-    if td_rows:
-        td_ids = [r['team_distribution_id'] for r in td_rows]
-        placeholders = ','.join(['%s'] * len(td_ids))
-        with connection.cursor() as cur:
-            cur.execute(f"""
-                SELECT team_distribution_id, week_number, hours, percent, status
-                FROM weekly_allocations
-                WHERE team_distribution_id IN ({placeholders})
-            """, td_ids)
-            for row in dictfetchall(cur):
-                weekly_alloc_map[(row['team_distribution_id'], row['week_number'])] = row
-
-    # Punch data
+    # Weekly TL hours and punch data, read as plain tuples:
+    #   weekly_hours[(td_id, week)] -> hours
+    #   punch_data_map[(td_id, date)] -> ("0.00" allocated, "0.00" punched, status, punched float)
+    weekly_hours = {}
     punch_data_map = {}
     if td_rows:
         td_ids = [r['team_distribution_id'] for r in td_rows]
-        placeholders = ','.join(['%s'] * len(td_ids))
+        _f = float
         with connection.cursor() as cur:
-            cur.execute(f"""
-                SELECT team_distribution_id, punch_date, allocated_hours, punched_hours, status, comments
-                FROM punch_data
-                WHERE team_distribution_id IN ({placeholders})
-                  AND LOWER(user_email) = LOWER(%s)
-                  AND month_start = %s
-            """, td_ids + [user_email, billing_start])
-            for r in dictfetchall(cur):
-                punch_data_map[(int(r['team_distribution_id']), r['punch_date'])] = {
-                    'allocated_hours': Decimal(str(r['allocated_hours'] or '0.00')),
-                    'punched_hours': Decimal(str(r['punched_hours'] or '0.00')),
-                    'status': r['status'],
-                    'comments': r.get('comments', '')
-                }
+            cur.execute(_sql_with_in(_SQL_MY_WEEKLY_HOURS, len(td_ids)), td_ids)
+            for td_id, week_number, hours in cur.fetchall():
+                weekly_hours[(td_id, week_number)] = _f(hours or 0)
+
+            cur.execute(_sql_with_in(_SQL_MY_PUNCH_DATA, len(td_ids)), td_ids + [user_email, billing_start])
+            for td_id, punch_date, allocated, punched, status in cur.fetchall():
+                punched = _f(punched or 0)
+                punch_data_map[(int(td_id), punch_date)] = (
+                    f"{_f(allocated or 0):.2f}", f"{punched:.2f}", status, punched
+                )
 
     # Week-wise rows
     day_order = ['Sat', 'Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri']
     week_rows_by_num = {w['num']: [] for w in weeks}
 
+    # Per-week day skeleton, built once and shared by every team distribution:
+    # (day, iso date, weekday abbrev, is_holiday, formatted leave hours) plus the
+    # working-day count and the week's leave total
+    week_days = {}
+    week_leave_hours = {}
+    for w in weeks:
+        days = []
+        working_days = 0
+        leave_total = 0.0
+        for cur_day, iso, abbrev, _ in _build_daily_dates(w['start'], min(w['end'], billing_end)):
+            is_holiday = cur_day in holidays_set
+            if cur_day.weekday() < 5 and not is_holiday:
+                working_days += 1
+            leave_hours = leave_map.get(cur_day, 0.0)
+            leave_total += leave_hours
+            days.append((cur_day, iso, abbrev, is_holiday,
+                         format(leave_hours, '0.2f') if leave_hours > 0 else None))
+        # leave inside the week but past billing_end still counts towards the week total
+        cur_day = max(w['start'], billing_end + timedelta(days=1))
+        while cur_day <= w['end']:
+            leave_total += leave_map.get(cur_day, 0.0)
+            cur_day += timedelta(days=1)
+        week_days[w['num']] = (working_days, days)
+        week_leave_hours[w['num']] = round(leave_total, 2)
 
     for td in td_rows:
         tdid = int(td['team_distribution_id'])
         is_self_allocation = int(td.get('is_self_allocation', 0))
-        print(f"\n[my_allocations] team_distribution_id={tdid}, is_self_allocation={is_self_allocation}")
+        logger.debug("[my_allocations] team_distribution_id=%s, is_self_allocation=%s", tdid, is_self_allocation)
         for w in weeks:
             wknum = w['num']
             wk_start, wk_end = w['start'], w['end']
-            print(f"  [week] num={wknum}, start={wk_start}, end={wk_end}")
-            week_alloc = weekly_alloc_map.get((tdid, wknum), {})
-            tl_hours = Decimal(str(week_alloc.get('hours', 0) or '0'))
-            print(f"    [week_alloc] tl_hours={tl_hours}")
-            working_days = 0
-            cur_day = wk_start
-            while cur_day <= wk_end and cur_day <= billing_end:
-                if cur_day.weekday() < 5 and cur_day not in holidays_set:
-                    working_days += 1
-                cur_day += timedelta(days=1)
-            print(f"    [working_days] {working_days}")
+            logger.debug("  [week] num=%s, start=%s, end=%s", wknum, wk_start, wk_end)
+            tl_hours = weekly_hours.get((tdid, wknum), 0.0)
+            logger.debug("    [week_alloc] tl_hours=%s", tl_hours)
+            working_days, days = week_days[wknum]
+            logger.debug("    [working_days] %s", working_days)
 
             # Build day records
             days_list = []
-            cur_day = wk_start
-            while cur_day <= wk_end and cur_day <= billing_end:
-                is_holiday = cur_day in holidays_set
-                leave_hours = leave_map.get(cur_day, Decimal('0.00'))
+            effort = 0.0
+            for cur_day, iso, abbrev, is_holiday, leave_str in days:
                 punch = punch_data_map.get((tdid, cur_day))
-                punched_hours_val = None
-                if punch and punch.get('punched_hours') is not None:
-                    punched_hours_val = str(punch['punched_hours'])
+                if punch:
+                    allocated_val, punched_hours_val, status, punched = punch
+                    effort += punched
+                else:
+                    allocated_val = punched_hours_val = None
+                    status = 'DRAFT'
                 days_list.append({
-                    'date': cur_day.strftime('%Y-%m-%d'),
-                    'weekday': cur_day.strftime('%a'),
+                    'date': iso,
+                    'weekday': abbrev,
                     'is_holiday': is_holiday,
-                    'leave_hours': format(leave_hours, '0.2f') if leave_hours > 0 else None,
-                    'allocated_hours': format(punch['allocated_hours'], '0.2f') if punch else None,
+                    'leave_hours': leave_str,
+                    'allocated_hours': allocated_val,
                     'punched_hours': punched_hours_val,
-                    'status': punch['status'] if punch else 'DRAFT',
-                    'is_editable': (not punch or punch['status'] in ['DRAFT', 'REJECTED']) and not is_holiday
+                    'status': status,
+                    'is_editable': status in ('DRAFT', 'REJECTED') and not is_holiday
                 })
-                print(f"      [day] {cur_day.strftime('%Y-%m-%d')}: punched_hours={punched_hours_val}")
-                cur_day += timedelta(days=1)
+                logger.debug("      [day] %s: punched_hours=%s", iso, punched_hours_val)
 
             # Only show self-allocation row if there is actual effort in this week
             if is_self_allocation:
-                has_effort = any(
-                    d['punched_hours'] not in [None, '0', '0.00', '0.0', 0, 0.0] and Decimal(d['punched_hours']) > 0
-                    for d in days_list
-                )
-                print(f"    [self_allocation] has_effort={has_effort} for week {wknum}")
+                has_effort = effort > 0
+                logger.debug("    [self_allocation] has_effort=%s for week %s", has_effort, wknum)
                 if not has_effort:
-                    print(f"    [SKIP] team_distribution_id={tdid} week={wknum} (no effort)")
+                    logger.debug("    [SKIP] team_distribution_id=%s week=%s (no effort)", tdid, wknum)
                     continue  # skip this week for this self-allocation row
 
             abbrev_map = {d['weekday']: d for d in days_list}
             day_slots = [abbrev_map.get(ab) for ab in day_order]
 
-            print(f"    [ADD ROW] team_distribution_id={tdid} week={wknum}")
-            week_rows_by_num[wknum].append({
-                'team_distribution_id': tdid,
-                'project_id': td.get('project_id'),
-                'subproject_id': td.get('subproject_id'),
-                'project_name': td.get('project_name') or '',
-                'subproject_name': td.get('subproject_name') or '',
-                'week_num': wknum,
-                'week_start': wk_start.strftime('%Y-%m-%d'),
-                'week_end': wk_end.strftime('%Y-%m-%d'),
-                'tl_allocation_hours': format(tl_hours, '0.2f'),
-                'working_days': working_days,
-                'actual_effort': str(sum(Decimal(d['punched_hours'] or '0') for d in days_list)),
-                'day_slots': day_slots
-            })
+            logger.debug("    [ADD ROW] team_distribution_id=%s week=%s", tdid, wknum)
+            week_rows_by_num[wknum].append(MyAllocationRow(
+                tdid,
+                td.get('project_id'),
+                td.get('subproject_id'),
+                td.get('project_name') or '',
+                td.get('subproject_name') or '',
+                wknum,
+                wk_start.strftime('%Y-%m-%d'),
+                wk_end.strftime('%Y-%m-%d'),
+                format(tl_hours, '0.2f'),
+                working_days,
+                f"{effort:.2f}",
+                day_slots,
+            ))
 
     # Attach rows to week objects for easy template looping
     for w in weeks:
@@ -3085,27 +3598,14 @@ def my_allocations(request):
     all_weeks_list = _compute_weeks_for_billing(billing_start, billing_end)
     for week in all_weeks_list:
         week['days_list'] = [
-            {
-                'date': (week['start'] + timedelta(days=i)).strftime('%Y-%m-%d'),
-                'weekday': (week['start'] + timedelta(days=i)).strftime('%A')
-            }
-            for i in range((week['end'] - week['start']).days + 1)
+            {'date': iso, 'weekday': weekday}
+            for _, iso, _, weekday in _build_daily_dates(week['start'], week['end'])
         ]
     all_weeks_list_json = json.dumps(
         all_weeks_list,
         default=lambda obj: obj.isoformat() if isinstance(obj, datetime) else str(obj)
     )
 
-    # Weekly leave aggregation
-    week_leave_hours = {}
-    for week in weeks:
-        total = Decimal('0.00')
-        cur = week['start']
-        while cur <= week['end']:
-            total += leave_map.get(cur, Decimal('0.00'))
-            cur += timedelta(days=1)
-        week_leave_hours[week['num']] = total
-
     # Leave records for listing
     with connection.cursor() as cur:
         cur.execute("""
@@ -3149,7 +3649,7 @@ def my_allocations(request):
     # Get country code from session and check EU status
     country_code = request.session.get('country_code')
     is_eu_user = is_eu_country(country_code)
-    print("[my_allocations] country_code:", country_code, "is_eu_user:", is_eu_user)
+    logger.debug("[my_allocations] country_code: %s is_eu_user: %s", country_code, is_eu_user)
     context = {
         'weeks': weeks,
         'selected_week': selected_week,
@@ -3198,12 +3698,8 @@ from django.views.decorators.http import require_http_methods
 from django.http import JsonResponse
 from django.db import connection, transaction
 from decimal import Decimal, ROUND_HALF_UP
-import json
-import logging
 
 # Python
-import json
-import logging
 from datetime import date, timedelta
 from django.http import JsonResponse, HttpResponseBadRequest, HttpResponseForbidden
 from django.db import connection
@@ -4040,13 +4536,13 @@ def save_my_alloc_weekly(request):
         payload = json.loads(request.body.decode("utf-8"))
         allocation_id = int(payload.get("allocation_id", 0))
         week_number = int(payload.get("week_number", 0))
-        hours = Decimal(str(payload.get("actual_hours", "0"))).quantize(Decimal("0.01"), ROUND_HALF_UP)
+        hours = Decimal(str(payload.get("actual_hours", "0"))).quantize(_DCENT, ROUND_HALF_UP)
         wbs = payload.get("wbs")
     except Exception:
-        return JsonResponse({"ok": False, "error": "Invalid payload"}, status=400)
+        return fast_json({"ok": False, "error": "Invalid payload"}, status=400)
 
     if allocation_id <= 0 or week_number not in (1,2,3,4):
-        return JsonResponse({"ok": False, "error": "Invalid allocation_id or week_number"}, status=400)
+        return fast_json({"ok": False, "error": "Invalid allocation_id or week_number"}, status=400)
 
     try:
         with transaction.atomic():
@@ -4057,13 +4553,34 @@ def save_my_alloc_weekly(request):
                     VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
                     ON DUPLICATE KEY UPDATE hours = VALUES(hours)
                 """, [allocation_id, week_number, 0.0, str(hours)])
-        return JsonResponse({"ok": True, "allocation_id": allocation_id, "week_number": week_number, "hours": f"{hours:.2f}"})
+        return fast_json({"ok": True, "allocation_id": allocation_id, "week_number": week_number, "hours": f"{hours:.2f}"})
     except Exception as e:
         logger.exception("save_my_alloc_weekly failed: %s", e)
-        return JsonResponse({"ok": False, "error": str(e)}, status=500)
+        return fast_json({"ok": False, "error": str(e)}, status=500)
 
 # save_daily endpoint (modified to use billing period lookup for punch_date)
 # -------------------------
+_SQL_UPSERT_CAPPED_PUNCH = """
+    INSERT INTO user_punches
+    (user_ldap, allocation_id, punch_date, week_number, actual_hours, wbs, updated_at)
+    SELECT %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP
+    FROM (
+        SELECT
+            (SELECT COALESCE(hours,0) FROM weekly_allocations
+             WHERE allocation_id=%s AND week_number=%s) AS cap,
+            (SELECT COALESCE(SUM(actual_hours),0) FROM user_punches
+             WHERE user_ldap=%s AND allocation_id=%s AND punch_date BETWEEN %s AND %s) AS used,
+            (SELECT COALESCE(MAX(actual_hours),0) FROM user_punches
+             WHERE user_ldap=%s AND allocation_id=%s AND punch_date=%s) AS prev
+    ) t
+    WHERE (t.used - t.prev + CAST(%s AS DECIMAL(10,2))) <= t.cap
+    ON DUPLICATE KEY UPDATE
+      actual_hours=VALUES(actual_hours),
+      wbs=VALUES(wbs),
+      updated_at=CURRENT_TIMESTAMP
+"""
+
+
 @require_POST
 def save_my_alloc_daily(request):
     """Save daily punches aligned to billing cycle."""
@@ -4071,7 +4588,7 @@ def save_my_alloc_daily(request):
         data = json.loads(request.body.decode("utf-8"))
         allocation_id = int(data.get("allocation_id"))
         punch_date = datetime.strptime(data.get("punch_date"), "%Y-%m-%d").date()
-        actual_hours = Decimal(str(data.get("actual_hours", 0))).quantize(Decimal("0.01"), ROUND_HALF_UP)
+        actual_hours = Decimal(str(data.get("actual_hours", 0))).quantize(_DCENT, ROUND_HALF_UP)
         wbs = data.get("wbs")
 
         user_ldap = request.session.get("ldap_username")
@@ -4079,60 +4596,40 @@ def save_my_alloc_daily(request):
         billing_start, billing_end = get_billing_period_for_date(punch_date)
         week_number = ((punch_date - billing_start).days // 7) + 1
 
-        # get weekly allocation
-        with connection.cursor() as cur:
-            cur.execute("""
-                SELECT hours FROM weekly_allocations
-                WHERE allocation_id=%s AND week_number=%s
-            """, [allocation_id, week_number])
-            rec = cur.fetchone()
-        if not rec:
-            return JsonResponse({"ok": False, "error": "No weekly allocation found"}, status=400)
-
-        alloc_hours = Decimal(str(rec[0] or "0.00"))
         wk_start = billing_start + timedelta(days=(week_number - 1) * 7)
         wk_end = min(wk_start + timedelta(days=6), billing_end)
 
-        # validate total within week
+        # The weekly cap check and the upsert are one statement, so concurrent
+        # punches for the same week cannot both pass the check. No row is
+        # written when the week has no allocation (cap is NULL) or the new
+        # weekly total would exceed it. The hours stay DECIMAL on both sides so
+        # a total landing exactly on the cap is accepted.
         with connection.cursor() as cur:
-            cur.execute("""
-                SELECT COALESCE(SUM(actual_hours),0)
-                FROM user_punches
-                WHERE user_ldap=%s AND allocation_id=%s AND punch_date BETWEEN %s AND %s
-            """, [user_ldap, allocation_id, wk_start, wk_end])
-            sum_existing = Decimal(str(cur.fetchone()[0] or "0.00"))
-
-            cur.execute("""
-                SELECT actual_hours FROM user_punches
-                WHERE user_ldap=%s AND allocation_id=%s AND punch_date=%s
-            """, [user_ldap, allocation_id, punch_date])
-            existing_same = cur.fetchone()
-            existing_same_val = Decimal(str(existing_same[0])) if existing_same else Decimal("0.00")
-
-        total_after = (sum_existing - existing_same_val) + actual_hours
-        if total_after > alloc_hours:
-            return JsonResponse({"ok": False, "error": f"Exceeds weekly allocation {alloc_hours:.2f}"}, status=400)
-
-        with transaction.atomic():
-            with connection.cursor() as cur:
-                cur.execute("""
-                    INSERT INTO user_punches
-                    (user_ldap, allocation_id, punch_date, week_number, actual_hours, wbs, updated_at)
-                    VALUES (%s,%s,%s,%s,%s,%s,CURRENT_TIMESTAMP)
-                    ON DUPLICATE KEY UPDATE
-                      actual_hours=VALUES(actual_hours),
-                      wbs=VALUES(wbs),
-                      updated_at=CURRENT_TIMESTAMP
-                """, [user_ldap, allocation_id, punch_date, week_number, str(actual_hours), wbs])
+            cur.execute(_SQL_UPSERT_CAPPED_PUNCH, [
+                user_ldap, allocation_id, punch_date, week_number, actual_hours, wbs,
+                allocation_id, week_number,
+                user_ldap, allocation_id, wk_start, wk_end,
+                user_ldap, allocation_id, punch_date,
+                actual_hours,
+            ])
+            if cur.rowcount == 0:
+                cur.execute(
+                    "SELECT hours FROM weekly_allocations WHERE allocation_id=%s AND week_number=%s",
+                    [allocation_id, week_number]
+                )
+                rec = cur.fetchone()
+                if not rec:
+                    return fast_json({"ok": False, "error": "No weekly allocation found"}, status=400)
+                alloc_hours = Decimal(str(rec[0] or "0.00"))
+                return fast_json({"ok": False, "error": f"Exceeds weekly allocation {alloc_hours:.2f}"}, status=400)
 
-        return JsonResponse({"ok": True, "allocation_id": allocation_id})
+        return fast_json({"ok": True, "allocation_id": allocation_id})
 
     except Exception as e:
         logger.exception("save_my_alloc_daily failed: %s", e)
-        return JsonResponse({"ok": False, "error": str(e)}, status=500)
+        return fast_json({"ok": False, "error": str(e)}, status=500)
 
 
-import json
 from datetime import datetime
 from decimal import Decimal
 from django.http import JsonResponse, HttpResponseForbidden
@@ -4279,64 +4776,40 @@ def my_allocations_update_status(request):
     now = timezone.now()
 
     # --- Upsert into weekly_punch_confirmations using canonical_alloc_id ---
-    existing_id = None
+    # One statement against uk_alloc_week (allocation_id, billing_start, week_number, emp_email)
+    # instead of SELECT-then-UPDATE/INSERT; id = LAST_INSERT_ID(id) makes lastrowid report
+    # the existing row's id when the key already exists.
     saved_id = None
     try:
         with connection.cursor() as cur:
             cur.execute("""
-                SELECT id FROM weekly_punch_confirmations
-                WHERE emp_email = %s AND allocation_id = %s AND billing_start = %s AND week_number = %s
-                LIMIT 1
-            """, [user_email, canonical_alloc_id, billing_start, week_number])
-            r = cur.fetchone()
-            if r:
-                existing_id = int(r[0])
-
-            if existing_id:
-                cur.execute("""
-                    UPDATE weekly_punch_confirmations
-                    SET allocated_hours = %s,
-                        allocated_percent = %s,
-                        user_comment = %s,
-                        status = %s,
-                        actioned_by = %s,
-                        actioned_at = %s,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE id = %s
-                """, [
-                    (Decimal(str(allocated_hours)) if allocated_hours is not None else None),
-                    (str(allocated_percent) if allocated_percent is not None else None),
-                    (comment if comment is not None else None),
-                    new_status,
-                    user_email,
-                    now,
-                    existing_id
-                ])
-                saved_id = existing_id
-            else:
-                cur.execute("""
-                    INSERT INTO weekly_punch_confirmations
-                        (emp_email, allocation_id, billing_start, week_number,
-                         allocated_hours, allocated_percent, user_comment, status,
-                         actioned_by, actioned_at, created_at, updated_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-                """, [
-                    user_email,
-                    canonical_alloc_id,
-                    billing_start,
-                    week_number,
-                    (Decimal(str(allocated_hours)) if allocated_hours is not None else None),
-                    (str(allocated_percent) if allocated_percent is not None else None),
-                    (comment if comment is not None else None),
-                    new_status,
-                    user_email,
-                    now
-                ])
-                # cur.lastrowid not guaranteed by all DB backends using raw cursor; try fetch
-                try:
-                    saved_id = cur.lastrowid or None
-                except Exception:
-                    saved_id = None
+                INSERT INTO weekly_punch_confirmations
+                    (emp_email, allocation_id, billing_start, week_number,
+                     allocated_hours, allocated_percent, user_comment, status,
+                     actioned_by, actioned_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    id = LAST_INSERT_ID(id),
+                    allocated_hours = VALUES(allocated_hours),
+                    allocated_percent = VALUES(allocated_percent),
+                    user_comment = VALUES(user_comment),
+                    status = VALUES(status),
+                    actioned_by = VALUES(actioned_by),
+                    actioned_at = VALUES(actioned_at),
+                    updated_at = CURRENT_TIMESTAMP
+            """, [
+                user_email,
+                canonical_alloc_id,
+                billing_start,
+                week_number,
+                (Decimal(str(allocated_hours)) if allocated_hours is not None else None),
+                (str(allocated_percent) if allocated_percent is not None else None),
+                (comment if comment is not None else None),
+                new_status,
+                user_email,
+                now
+            ])
+            saved_id = cur.lastrowid or None
     except Exception as ex:
         return JsonResponse({"ok": False, "error": f"DB write failed (wpc): {str(ex)}"}, status=500)
 
@@ -4399,23 +4872,36 @@ def _cn_to_creator(cn: str):
 def _get_user_projects_for_allocations(request):
     """
     Return list of projects where session user is PDL, PM, or creator.
-    Enhanced with direct database inspection for name format debugging.
+    Cached per (ldap, cn) for DROPDOWN_CACHE_TIMEOUT seconds; project writes in this
+    app invalidate it, prism_wbs imports rely on the timeout.
     """
-    print("\n=== _get_user_projects_for_allocations START ===")
-
     session_ldap = request.session.get("ldap_username")
     session_cn = request.session.get("cn", "")
-    print(f"Session LDAP: {session_ldap}")
-    print(f"Session CN: {session_cn}")
+    identity = hashlib.sha1(f"{session_ldap or ''}|{session_cn or ''}".encode("utf-8")).hexdigest()
+    key = USER_PROJECTS_CACHE_KEY % (cache.get_or_set(USER_PROJECTS_GEN_KEY, 0, None), identity)
+    projects = cache.get(key)
+    if projects is None:
+        projects = _fetch_user_projects_for_allocations(session_ldap, session_cn)
+        if projects is None:  # query failed; do not cache the empty fallback
+            return []
+        cache.set(key, projects, DROPDOWN_CACHE_TIMEOUT)
+    return projects
+
+
+def _fetch_user_projects_for_allocations(session_ldap, session_cn):
+    """
+    Uncached body of _get_user_projects_for_allocations; returns None if the query fails.
+    At DEBUG level it also inspects prism_wbs creators / project PDL-PM names that
+    resemble the user, to help diagnose name-format mismatches.
+    """
+    debug = logger.isEnabledFor(logging.DEBUG)
 
     # Generate name variations
     name_variations = set()
     if session_ldap:
         name_variations.add(session_ldap.strip())
     if session_cn:
-        creator_name = _cn_to_creator(session_cn)
-        name_variations.add(creator_name)
-        print(f"Converted Creator Name (CN): {creator_name}")
+        name_variations.add(_cn_to_creator(session_cn))
 
     if session_ldap and '@' not in session_ldap:
         parts = session_ldap.strip().split()
@@ -4427,61 +4913,10 @@ def _get_user_projects_for_allocations(request):
             variation3 = ' '.join(parts[1:] + [parts[0].upper()])
             name_variations.add(variation3)
 
-    print(f"All name variations to match: {name_variations}")
-
-    # DIRECT DATABASE INSPECTION: Find all creators that might match
-    print("\n=== DIRECT DATABASE INSPECTION ===")
-    with connection.cursor() as cur:
-        # Get all unique creators from prism_wbs
-        cur.execute("""
-            SELECT DISTINCT creator, COUNT(*) as count
-            FROM prism_wbs
-            WHERE creator IS NOT NULL AND TRIM(creator) != ''
-            ORDER BY creator
-        """)
-        all_creators = cur.fetchall()
-        print(f"Total unique creators in prism_wbs: {len(all_creators)}")
-
-        # Search for creators containing any part of the user's name
-        name_parts = []
-        for var in name_variations:
-            name_parts.extend([p for p in var.split() if len(p) > 2 and '@' not in p])
-        unique_parts = list(set(name_parts))
-
-        print(f"\nSearching for name parts: {unique_parts}")
-
-        matching_creators = []
-        for part in unique_parts[:5]:  # Limit to avoid too many queries
-            cur.execute("""
-                SELECT DISTINCT creator, COUNT(*) as iom_count
-                FROM prism_wbs
-                WHERE LOWER(creator) LIKE LOWER(%s)
-                GROUP BY creator
-                ORDER BY iom_count DESC
-                LIMIT 20
-            """, (f'%{part}%',))
-            matches = cur.fetchall()
-            if matches:
-                print(f"\nCreators matching '{part}':")
-                for creator, cnt in matches:
-                    print(f"  - '{creator}' ({cnt} IOMs)")
-                    matching_creators.append(creator)
-
-        # Also check if any project has this user as PDL/PM
-        print(f"\n=== Checking PDL/PM matches ===")
-        for var in list(name_variations)[:3]:
-            cur.execute("""
-                SELECT id, name, pdl_name, pm_name
-                FROM projects
-                WHERE LOWER(pdl_name) LIKE LOWER(%s)
-                   OR LOWER(pm_name) LIKE LOWER(%s)
-                LIMIT 5
-            """, (f'%{var}%', f'%{var}%'))
-            pdl_pm_matches = cur.fetchall()
-            if pdl_pm_matches:
-                print(f"\nProjects where '{var}' is PDL/PM:")
-                for pid, pname, pdl, pm in pdl_pm_matches:
-                    print(f"  - Project {pid}: {pname} (PDL: {pdl}, PM: {pm})")
+    if debug:
+        logger.debug("_get_user_projects_for_allocations: ldap=%s cn=%s variations=%s",
+                     session_ldap, session_cn, name_variations)
+        _debug_user_project_name_matches(name_variations)
 
     if not name_variations:
         logger.warning("_get_user_projects_for_allocations: no session identifiers found")
@@ -4506,30 +4941,56 @@ def _get_user_projects_for_allocations(request):
 
     sql += " ORDER BY p.name"
 
-    print(f"\n--- Executing Query with {len(params)} parameters ---")
-
     try:
         with connection.cursor() as cur:
             cur.execute(sql, params)
             projects = dictfetchall(cur)
+        logger.debug("_get_user_projects_for_allocations: %d projects found", len(projects))
+        return projects
 
-        print(f"\n--- Query Results: {len(projects)} projects found ---")
+    except Exception as exc:
+        logger.exception("_get_user_projects_for_allocations failed: %s", exc)
+        return None
 
-        if projects:
-            for idx, proj in enumerate(projects[:10], 1):
-                print(f"  {idx}. Project {proj['id']}: {proj['name']}")
-        else:
-            print("No projects matched. Check database inspection output above.")
 
-        print(f"\n=== _get_user_projects_for_allocations END ===\n")
-        return projects
+def _debug_user_project_name_matches(name_variations):
+    """DEBUG-only: log prism_wbs creators and project PDL/PM names resembling the user's name."""
+    name_parts = {p for var in name_variations for p in var.split() if len(p) > 2 and '@' not in p}
+    with connection.cursor() as cur:
+        for part in list(name_parts)[:5]:  # Limit to avoid too many queries
+            cur.execute("""
+                SELECT DISTINCT creator, COUNT(*) as iom_count
+                FROM prism_wbs
+                WHERE LOWER(creator) LIKE LOWER(%s)
+                GROUP BY creator
+                ORDER BY iom_count DESC
+                LIMIT 20
+            """, (f'%{part}%',))
+            for creator, cnt in cur.fetchall():
+                logger.debug("  creator matching '%s': '%s' (%s IOMs)", part, creator, cnt)
 
-    except Exception as exc:
-        logger.exception(f"_get_user_projects_for_allocations failed: {exc}")
-        print(f"\n!!! ERROR: {type(exc).__name__}: {str(exc)}")
-        import traceback
-        print(f"Traceback:\n{traceback.format_exc()}")
-        return []
+        for var in list(name_variations)[:3]:
+            cur.execute("""
+                SELECT id, name, pdl_name, pm_name
+                FROM projects
+                WHERE LOWER(pdl_name) LIKE LOWER(%s)
+                   OR LOWER(pm_name) LIKE LOWER(%s)
+                LIMIT 5
+            """, (f'%{var}%', f'%{var}%'))
+            for pid, pname, pdl, pm in cur.fetchall():
+                logger.debug("  '%s' is PDL/PM of project %s: %s (PDL: %s, PM: %s)", var, pid, pname, pdl, pm)
+
+
+@dataclass(slots=True)
+class MonthlyAllocationItem:
+    """monthly_allocations: one (subproject, user) allocation, hours summed over its IOM entries."""
+    allocation_id: int
+    subproject_id: int | None
+    subproject_name: str
+    user_ldap: str
+    total_hours: Decimal
+    bg_code: str
+    iom_id: str | None
 
 
 def monthly_allocations(request):
@@ -4538,7 +4999,6 @@ def monthly_allocations(request):
     and uses billing_start resolved via get_billing_period(year, month).
     Now supports filtering by subproject_id and adapted for projects.pdl_name/pm_name string columns.
     """
-    print("monthly_allocations called")
     session_ldap = request.session.get("ldap_username")
     session_cn = request.session.get("cn", "")
 
@@ -4557,7 +5017,7 @@ def monthly_allocations(request):
 
     project_id_param = request.GET.get("project_id")
     subproject_id_param = request.GET.get("subproject_id")
-    print("project id param: ", project_id_param, "   Sub project id param: ", subproject_id_param)
+    logger.debug("monthly_allocations: project_id=%s subproject_id=%s", project_id_param, subproject_id_param)
 
     active_project_id = None
     try:
@@ -4575,7 +5035,7 @@ def monthly_allocations(request):
 
     # Fetch projects user can allocate for (updated query for string-based pdl_name)
     projects = _get_user_projects_for_allocations(request)
-    print("projects fetched: ", projects)
+    logger.debug("monthly_allocations: %d projects", len(projects))
     if not active_project_id and projects:
         active_project_id = projects[0]["id"]
 
@@ -4595,58 +5055,64 @@ def monthly_allocations(request):
             "month_hours_limit": 0,
         })
 
-    # Fetch COEs and domains
+    # Fetch COEs and their domains in one pass (COEs without domains come back once,
+    # with NULL domain columns)
+    coes_by_id = {}
+    domains_map = {}
     try:
         with connection.cursor() as cur:
-            cur.execute("SELECT id, name FROM coes ORDER BY name")
-            coes = dictfetchall(cur)
+            cur.execute("""
+                SELECT c.id, c.name, d.id, d.name
+                FROM coes c
+                LEFT JOIN domains d ON d.coe_id = c.id
+                ORDER BY c.name, d.name
+            """)
+            for coe_id, coe_name, domain_id, domain_name in cur.fetchall():
+                if coe_id not in coes_by_id:
+                    coes_by_id[coe_id] = {"id": coe_id, "name": coe_name}
+                if domain_id is not None:
+                    domains_map.setdefault(coe_id, []).append(
+                        {"id": domain_id, "coe_id": coe_id, "name": domain_name}
+                    )
     except Exception:
         logger.exception("Error fetching COEs")
-        coes = []
+        coes_by_id, domains_map = {}, {}
+    coes = list(coes_by_id.values())
 
-    coe_ids = [c["id"] for c in coes] if coes else []
-
-    domains_map = {}
-    if coe_ids:
-        try:
-            with connection.cursor() as cur:
-                placeholders = ','.join(['%s'] * len(coe_ids))
-                cur.execute(f"SELECT id, coe_id, name FROM domains WHERE coe_id IN ({placeholders}) ORDER BY name", coe_ids)
-                domains = dictfetchall(cur)
-                for d in domains:
-                    coe_id = d.get("coe_id")
-                    if coe_id not in domains_map:
-                        domains_map[coe_id] = []
-                    domains_map[coe_id].append(d)
-        except Exception:
-            logger.exception("Error fetching domains")
+    month_hours_limit = _get_month_hours_limit(billing_start.year, billing_start.month)
 
-    # Fetch allocation_items for this project/subproject/billing_start (canonical)
+    # Fetch allocation_items for this project/subproject/billing_start (canonical) together
+    # with their weekly_allocations: one row per (entry, week), or a single row with NULL
+    # week columns for entries without weekly splits. capacity_map (per user: allocated /
+    # remaining against month_hours_limit) is filled in the same pass.
     allocation_map = {}
-    capacity_accumulator = {}
-    allocation_ids = []
+    capacity_map = {}
+    weekly_map = {}
+    seen_ids = set()
 
     try:
         with connection.cursor() as cur:
-            # Base query for monthly_allocation_entries
+            # Base query for monthly_allocation_entries; total_hours is DECIMAL(10,2) NOT NULL,
+            # so the driver already hands back a 2-place Decimal
             base_sql = """
                 SELECT
-                    mae.id as allocation_id,
-                    mae.project_id,
+                    mae.id,
                     mae.subproject_id,
                     mae.iom_id,
                     mae.user_ldap,
                     mae.total_hours,
-                    mae.month_start,
-                    p.name as project_name,
-                    sp.name as subproject_name,
-                    COALESCE(pw.bg_code, '') as bg_code
+                    sp.name,
+                    COALESCE(pw.bg_code, ''),
+                    wa.week_number,
+                    wa.percent,
+                    wa.hours,
+                    wa.status
                 FROM monthly_allocation_entries mae
-                LEFT JOIN projects p ON p.id = mae.project_id
                 LEFT JOIN subprojects sp ON sp.id = mae.subproject_id
                 LEFT JOIN prism_wbs pw ON pw.id = mae.iom_id
+                LEFT JOIN weekly_allocations wa ON wa.allocation_id = mae.id
                 WHERE mae.project_id = %s
-                  AND DATE(mae.month_start) = %s
+                  AND mae.month_start = %s
             """
             params = [active_project_id, billing_start]
 
@@ -4658,88 +5124,37 @@ def monthly_allocations(request):
             base_sql += " ORDER BY mae.user_ldap, sp.name"
 
             cur.execute(base_sql, params)
-            rows = dictfetchall(cur)
-
-            for r in rows:
-                alloc_id = r.get("allocation_id")
-                user_ldap = r.get("user_ldap")
-                total_hours = Decimal(str(r.get("total_hours") or "0.00"))
-
-                allocation_ids.append(alloc_id)
-
-                key = (r.get("subproject_id"), user_ldap)
-                if key not in allocation_map:
-                    allocation_map[key] = {
-                        "allocation_id": alloc_id,
-                        "subproject_id": r.get("subproject_id"),
-                        "subproject_name": r.get("subproject_name") or "Unspecified",
-                        "user_ldap": user_ldap,
-                        "total_hours": Decimal("0.00"),
-                        "bg_code": r.get("bg_code") or "",
-                        "iom_id": r.get("iom_id"),
+            for (alloc_id, sub_id, iom_id, user_ldap, total_hours, sub_name, bg_code,
+                 wnum, percent, week_hours, week_status) in cur.fetchall():
+                if wnum is not None:
+                    weekly_map.setdefault(alloc_id, {})[wnum] = {
+                        "percent": percent,
+                        "hours": week_hours,
+                        "status": week_status,
                     }
 
-                allocation_map[key]["total_hours"] += total_hours
-
-                if user_ldap not in capacity_accumulator:
-                    capacity_accumulator[user_ldap] = Decimal("0.00")
-                capacity_accumulator[user_ldap] += total_hours
-
-    except Exception:
-        logger.exception("Error fetching allocation items")
-
-    # Fetch weekly allocations (unchanged)
-    weekly_map = {}
-    if allocation_ids:
-        try:
-            with connection.cursor() as cur:
-                placeholders = ','.join(['%s'] * len(allocation_ids))
-                cur.execute(
-                    f"""
-                    SELECT wa.allocation_id, wa.week_number, wa.percent, wa.hours, wa.status
-                    FROM weekly_allocations wa
-                    WHERE wa.allocation_id IN ({placeholders})
-                    """,
-                    allocation_ids
-                )
-                weekly_rows = dictfetchall(cur)
-                for wr in weekly_rows:
-                    aid = wr.get("allocation_id")
-                    wnum = wr.get("week_number")
-                    if aid not in weekly_map:
-                        weekly_map[aid] = {}
-                    weekly_map[aid][wnum] = {
-                        "percent": wr.get("percent"),
-                        "hours": wr.get("hours"),
-                        "status": wr.get("status"),
-                    }
-        except Exception:
-            logger.exception("Error fetching weekly allocations")
+                # the entry's own columns repeat on each of its week rows; count them once
+                if alloc_id in seen_ids:
+                    continue
+                seen_ids.add(alloc_id)
 
-    # Calculate capacity map
-    month_hours_limit = _get_month_hours_limit(billing_start.year, billing_start.month)
+                key = (sub_id, user_ldap)
+                item = allocation_map.get(key)
+                if item is None:
+                    item = allocation_map[key] = MonthlyAllocationItem(
+                        alloc_id, sub_id, sub_name or "Unspecified", user_ldap, _D0, bg_code or "", iom_id
+                    )
+                item.total_hours += total_hours
 
-    capacity_map = {}
-    for ldap_key, allocated in capacity_accumulator.items():
-        remaining = Decimal(str(month_hours_limit)) - allocated
-        capacity_map[ldap_key] = {
-            "allocated": float(allocated),
-            "remaining": float(remaining),
-            "limit": month_hours_limit,
-        }
+                cap = capacity_map.get(user_ldap)
+                if cap is None:
+                    cap = capacity_map[user_ldap] = {"allocated": 0.0, "remaining": month_hours_limit,
+                                                     "limit": month_hours_limit}
+                cap["allocated"] = round(cap["allocated"] + float(total_hours), 2)
+                cap["remaining"] = round(month_hours_limit - cap["allocated"], 2)
 
-    # Ensure every user in allocation_items has an entry in capacity_map
-    try:
-        all_users = set(k[1] for k in allocation_map.keys())
-        for u in all_users:
-            if u not in capacity_map:
-                capacity_map[u] = {
-                    "allocated": 0.0,
-                    "remaining": float(month_hours_limit),
-                    "limit": month_hours_limit,
-                }
     except Exception:
-        logger.exception("Error ensuring capacity map entries")
+        logger.exception("Error fetching allocation items")
 
     return render(request, "projects/monthly_allocations.html", {
         "projects": projects,
@@ -4759,9 +5174,20 @@ def monthly_allocations(request):
 
 # Implement _get_month_hours_limit used above
 def _get_month_hours_limit(year, month):
+    """max_hours for the billing month, memoized like get_billing_period."""
+    try:
+        year, month = int(year), int(month)
+    except (TypeError, ValueError):
+        return float(HOURS_AVAILABLE_PER_MONTH)
+    bucket = int(time.monotonic() // BILLING_PERIOD_CACHE_SECONDS)
+    return _month_hours_limit_cached(year, month, bucket)
+
+
+@lru_cache(maxsize=256)
+def _month_hours_limit_cached(year, month, bucket):
     try:
         with connection.cursor() as cur:
-            cur.execute("SELECT max_hours FROM monthly_hours_limit WHERE year = %s AND month = %s LIMIT 1", (int(year), int(month)))
+            cur.execute("SELECT max_hours FROM monthly_hours_limit WHERE year = %s AND month = %s LIMIT 1", (year, month))
             row = cur.fetchone()
             if row and row[0] is not None:
                 return float(row[0])
@@ -4769,6 +5195,36 @@ def _get_month_hours_limit(year, month):
         logger.exception("_get_month_hours_limit failed")
     return float(HOURS_AVAILABLE_PER_MONTH)
 
+# prism_wbs per-month (fte, hours) column names, indexed by month - 1
+_MONTH_COLS = (
+    ("jan_fte", "jan_hours"), ("feb_fte", "feb_hours"), ("mar_fte", "mar_hours"),
+    ("apr_fte", "apr_hours"), ("may_fte", "may_hours"), ("jun_fte", "jun_hours"),
+    ("jul_fte", "jul_hours"), ("aug_fte", "aug_hours"), ("sep_fte", "sep_hours"),
+    ("oct_fte", "oct_hours"), ("nov_fte", "nov_hours"), ("dec_fte", "dec_hours"),
+)
+
+
+def _month_cols(month):
+    """(fte_col, hours_col) of prism_wbs for `month`; January's columns for an out-of-range month."""
+    return _MONTH_COLS[month - 1] if 1 <= month <= 12 else _MONTH_COLS[0]
+
+
+# get_applicable_ioms base query per month (index month - 1), built once so each month
+# always sends the same statement text; the handler appends its dynamic filters.
+# Do NOT reference prism_wbs.mdm_code -- it doesn't exist.
+_IOM_SQL_BY_MONTH = tuple(
+    f"""
+        SELECT id, iom_id, department, site, `function`,
+               {fte} as month_fte, {hrs} as month_hours,
+               buyer_wbs_cc, seller_wbs_cc, project_id, creator
+        FROM prism_wbs
+        WHERE year = %s
+          AND ( ({fte} IS NOT NULL AND {fte} > 0) OR ({hrs} IS NOT NULL AND {hrs} > 0) )
+    """
+    for fte, hrs in _MONTH_COLS
+)
+
+
 # --- get_applicable_ioms (replace existing function) ---
 @require_GET
 def get_applicable_ioms(request):
@@ -4782,27 +5238,13 @@ def get_applicable_ioms(request):
     session_ldap = request.session.get("ldap_username")
     session_cn = request.session.get("cn")
 
-    def _cn_to_creator(cn):
-        if not cn:
-            return ""
-        parts = str(cn).strip().split()
-        if len(parts) >= 2:
-            return " ".join(parts[1:]) + " " + parts[0]
-        return str(cn).strip()
-
-    creator_candidates = []
-    if session_cn:
-        conv = _cn_to_creator(session_cn).strip()
-        if conv and conv.lower() not in [c.lower() for c in creator_candidates]:
-            creator_candidates.append(conv)
-        s = session_cn.strip()
-        if s and s.lower() not in [c.lower() for c in creator_candidates]:
-            creator_candidates.append(s)
-    if session_ldap:
-        sld = session_ldap.strip()
-        if sld and sld.lower() not in [c.lower() for c in creator_candidates]:
-            creator_candidates.append(sld)
-    creator_lower_vals = [c.lower() for c in creator_candidates]
+    # creator match values (lower-cased, deduplicated, first-seen order): the converted
+    # CN, the raw CN and the LDAP id
+    creator_lower_vals = []
+    for v in (_cn_to_creator(session_cn) if session_cn else "", session_cn, session_ldap):
+        lv = (v or "").strip().lower()
+        if lv and lv not in creator_lower_vals:
+            creator_lower_vals.append(lv)
 
     project_id = request.GET.get("project_id")
     subproject_id = request.GET.get("subproject_id")  # optional filter
@@ -4813,23 +5255,6 @@ def get_applicable_ioms(request):
     except Exception:
         return HttpResponseBadRequest("Invalid year/month")
 
-    # map month -> columns
-    _MONTH_MAP = {
-        1: ("jan_fte", "jan_hours"),
-        2: ("feb_fte", "feb_hours"),
-        3: ("mar_fte", "mar_hours"),
-        4: ("apr_fte", "apr_hours"),
-        5: ("may_fte", "may_hours"),
-        6: ("jun_fte", "jun_hours"),
-        7: ("jul_fte", "jul_hours"),
-        8: ("aug_fte", "aug_hours"),
-        9: ("sep_fte", "sep_hours"),
-        10: ("oct_fte", "oct_hours"),
-        11: ("nov_fte", "nov_hours"),
-        12: ("dec_fte", "dec_hours"),
-    }
-    fte_col, hrs_col = _MONTH_MAP.get(month, ("jan_fte", "jan_hours"))
-
     # If subproject_id provided, attempt to fetch its mdm_code/bg_code (prefer mdm_code then bg_code)
     sub_mdm = None
     sub_bg = None
@@ -4846,23 +5271,16 @@ def get_applicable_ioms(request):
             logger.exception("get_applicable_ioms: cannot load subproject %s", subproject_id)
             sub_mdm = sub_bg = None
 
-    # Build SQL (do NOT reference prism_wbs.mdm_code -- it doesn't exist)
-    sql = f"""
-        SELECT id, iom_id, department, site, `function`,
-               {fte_col} as month_fte, {hrs_col} as month_hours,
-               buyer_wbs_cc, seller_wbs_cc, project_id, creator
-        FROM prism_wbs
-        WHERE year = %s
-          AND ( ({fte_col} IS NOT NULL AND {fte_col} > 0) OR ({hrs_col} IS NOT NULL AND {hrs_col} > 0) )
-    """
+    # January's columns for an out-of-range month, as _month_cols does
+    sql = _IOM_SQL_BY_MONTH[month - 1 if 1 <= month <= 12 else 0]
     params = [str(year)]
     if project_id:
         sql += " AND project_id = %s"
         params.append(project_id)
 
     if creator_lower_vals:
-        placeholders = ",".join(["%s"] * len(creator_lower_vals))
-        sql += f" AND LOWER(TRIM(creator)) IN ({placeholders})"
+        placeholders = _in_placeholders(len(creator_lower_vals))
+        sql += f" AND LOWER(TRIM(creator)) IN {placeholders}"
         params.extend(creator_lower_vals)
 
     if search:
@@ -4935,89 +5353,146 @@ def get_iom_details(request):
     if not iom_row_id:
         return HttpResponseBadRequest("iom_row_id required")
 
-    _MONTH_MAP = {
-        1: ("jan_fte", "jan_hours"),
-        2: ("feb_fte", "feb_hours"),
-        3: ("mar_fte", "mar_hours"),
-        4: ("apr_fte", "apr_hours"),
-        5: ("may_fte", "may_hours"),
-        6: ("jun_fte", "jun_hours"),
-        7: ("jul_fte", "jul_hours"),
-        8: ("aug_fte", "aug_hours"),
-        9: ("sep_fte", "sep_hours"),
-        10: ("oct_fte", "oct_hours"),
-        11: ("nov_fte", "nov_hours"),
-        12: ("dec_fte", "dec_hours"),
-    }
-    fte_col, hrs_col = _MONTH_MAP.get(month, ("jan_fte", "jan_hours"))
+    fte_col, hrs_col = _month_cols(month)
+
+    # Use canonical billing start for this year/month
+    billing_start, billing_end = get_billing_period(year, month)
 
+    # used hours for this IOM come from monthly_allocation_entries (canonical month_start,
+    # and the subproject when one is selected), read in the same statement as the IOM row
+    sub_clause = " AND mae.subproject_id = %s" if subproject_id else ""
+    params = [project_id, billing_start] + ([subproject_id] if subproject_id else []) + [iom_row_id, iom_row_id]
     try:
         with connection.cursor() as cur:
             cur.execute(f"""
-                SELECT id, iom_id, project_id, department, site, `function`,
-                       {fte_col} as month_fte, {hrs_col} as month_hours,
-                       buyer_wbs_cc, seller_wbs_cc, total_fte, total_hours
-                FROM prism_wbs
-                WHERE id = %s OR iom_id = %s
+                SELECT pw.id, pw.iom_id, pw.project_id, pw.department, pw.site, pw.`function`,
+                       pw.{fte_col} as month_fte, pw.{hrs_col} as month_hours,
+                       pw.buyer_wbs_cc, pw.seller_wbs_cc, pw.total_fte, pw.total_hours,
+                       (SELECT COALESCE(SUM(mae.total_hours), 0)
+                          FROM monthly_allocation_entries mae
+                         WHERE mae.project_id = %s AND mae.iom_id = pw.iom_id
+                           AND mae.month_start = %s{sub_clause}) AS used_hours
+                FROM prism_wbs pw
+                WHERE pw.id = %s OR pw.iom_id = %s
                 LIMIT 1
-            """, [iom_row_id, iom_row_id])
+            """, params)
             row = cur.fetchone()
             if not row:
                 return JsonResponse({"ok": False, "error": "IOM not found"}, status=404)
             cols = [c[0] for c in cur.description]
             rec = dict(zip(cols, row))
-
-            # Use canonical billing start for this year/month
-            billing_start, billing_end = get_billing_period(year, month)
-
-            # compute used hours for this IOM from monthly_allocation_entries using canonical month_start
-            if subproject_id:
-                cur.execute("""
-                    SELECT COALESCE(SUM(total_hours),0) FROM monthly_allocation_entries
-                    WHERE project_id=%s AND iom_id=%s AND month_start=%s AND subproject_id=%s
-                """, [project_id, rec.get("iom_id"), billing_start, subproject_id])
-            else:
-                cur.execute("""
-                    SELECT COALESCE(SUM(total_hours),0) FROM monthly_allocation_entries
-                    WHERE project_id=%s AND iom_id=%s AND month_start=%s
-                """, [project_id, rec.get("iom_id"), billing_start])
-            used_hours = cur.fetchone()[0] or 0.0
+            used_hours = rec.get("used_hours") or 0.0
 
     except Exception as ex:
         logger.exception("get_iom_details failed: %s", ex)
         return JsonResponse({"ok": False, "error": str(ex)}, status=500)
 
-    month_hours = float(rec.get("month_hours") or 0.0)
     month_limit = _get_month_hours_limit(year, month)
+    resp = {
+        "ok": True,
+        "iom": _iom_details_payload(rec, used_hours, month_limit, billing_start, billing_end),
+    }
+
+    return JsonResponse(resp)
+
+
+def _iom_details_payload(rec, used_hours, month_limit, billing_start, billing_end):
+    """The "iom" object returned by get_iom_details / get_iom_details_bulk for one prism_wbs row."""
+    month_hours = float(rec.get("month_hours") or 0.0)
     month_fte = round((month_hours / month_limit) if month_limit > 0 else 0.0, 2)
 
     remaining_hours = max(0.0, month_hours - float(used_hours))
     remaining_hours = round(remaining_hours, 2)
     remaining_fte = round((remaining_hours / month_limit) if month_limit > 0 else 0.0, 2)
 
-    resp = {
-        "ok": True,
-        "iom": {
-            "id": rec.get("id"),
-            "iom_id": rec.get("iom_id"),
-            "department": rec.get("department"),
-            "site": rec.get("site"),
-            "function": rec.get("function"),
-            "month_fte": float(month_fte),
-            "month_hours": float(round(month_hours, 2)),
-            "total_fte": float(rec.get("total_fte") or 0),
-            "total_hours": float(rec.get("total_hours") or 0),
-            "buyer_wbs_cc": rec.get("buyer_wbs_cc"),
-            "seller_wbs_cc": rec.get("seller_wbs_cc"),
-            "remaining_hours": float(remaining_hours),
-            "remaining_fte": float(remaining_fte),
-            "month_limit": float(month_limit),
-            "billing_start": billing_start,
-            "billing_end": billing_end,
-        }
+    return {
+        "id": rec.get("id"),
+        "iom_id": rec.get("iom_id"),
+        "department": rec.get("department"),
+        "site": rec.get("site"),
+        "function": rec.get("function"),
+        "month_fte": float(month_fte),
+        "month_hours": float(round(month_hours, 2)),
+        "total_fte": float(rec.get("total_fte") or 0),
+        "total_hours": float(rec.get("total_hours") or 0),
+        "buyer_wbs_cc": rec.get("buyer_wbs_cc"),
+        "seller_wbs_cc": rec.get("seller_wbs_cc"),
+        "remaining_hours": float(remaining_hours),
+        "remaining_fte": float(remaining_fte),
+        "month_limit": float(month_limit),
+        "billing_start": billing_start,
+        "billing_end": billing_end,
     }
 
-    return JsonResponse(resp)
+
+IOM_DETAILS_BULK_MAX = 200
+
+
+@require_GET
+def get_iom_details_bulk(request):
+    """
+    get_iom_details for many IOMs in one request.
+    Accepts the same project_id, year, month and optional subproject_id, plus `ids`: a
+    comma-separated list (at most IOM_DETAILS_BULK_MAX) of prism_wbs ids or iom_ids.
+    Returns {"ok": True, "ioms": {<requested id>: <iom object>}}; ids that match no
+    prism_wbs row are left out.
+    """
+    project_id = request.GET.get("project_id")
+    subproject_id = request.GET.get("subproject_id")
+    try:
+        year = int(request.GET.get("year") or datetime.now().year)
+        month = int(request.GET.get("month") or datetime.now().month)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid year/month")
+    ids = list(dict.fromkeys(x.strip() for x in (request.GET.get("ids") or "").split(",") if x.strip()))
+    if not ids:
+        return HttpResponseBadRequest("ids required")
+    ids = ids[:IOM_DETAILS_BULK_MAX]
+
+    fte_col, hrs_col = _month_cols(month)
+    billing_start, billing_end = get_billing_period(year, month)
+    in_frag = _in_placeholders(len(ids))
+
+    try:
+        with connection.cursor() as cur:
+            cur.execute(f"""
+                SELECT id, iom_id, project_id, department, site, `function`,
+                       {fte_col} as month_fte, {hrs_col} as month_hours,
+                       buyer_wbs_cc, seller_wbs_cc, total_fte, total_hours
+                FROM prism_wbs
+                WHERE id IN {in_frag} OR iom_id IN {in_frag}
+                ORDER BY id
+            """, ids + ids)
+            recs = dictfetchall(cur)
+
+            used_by_iom = {}
+            iom_ids = list({r["iom_id"] for r in recs if r.get("iom_id")})
+            if iom_ids:
+                sub_clause = " AND subproject_id = %s" if subproject_id else ""
+                cur.execute(f"""
+                    SELECT iom_id, COALESCE(SUM(total_hours), 0)
+                    FROM monthly_allocation_entries
+                    WHERE project_id = %s AND month_start = %s{sub_clause}
+                      AND iom_id IN {_in_placeholders(len(iom_ids))}
+                    GROUP BY iom_id
+                """, [project_id, billing_start] + ([subproject_id] if subproject_id else []) + iom_ids)
+                used_by_iom = dict(cur.fetchall())
+    except Exception as ex:
+        logger.exception("get_iom_details_bulk failed: %s", ex)
+        return fast_json({"ok": False, "error": str(ex)}, status=500)
+
+    # like get_iom_details, a requested id resolves to the first row matching it by id or iom_id
+    wanted = set(ids)
+    month_limit = _get_month_hours_limit(year, month)
+    out = {}
+    for rec in recs:
+        for key in (str(rec.get("id")), rec.get("iom_id")):
+            if key in wanted and key not in out:
+                out[key] = _iom_details_payload(
+                    rec, used_by_iom.get(rec.get("iom_id")) or 0.0, month_limit, billing_start, billing_end
+                )
+
+    return fast_json({"ok": True, "ioms": out})
 
 
 # --- export_allocations (replace existing function) ---
@@ -5084,50 +5559,28 @@ def export_allocations(request):
                 "total_hours": row[6],
             }
 
-    # fetch allocations (respect subproject_id when present)
-    with connection.cursor() as cur:
-        if subproject_id:
-            cur.execute("""
-                SELECT user_ldap, total_hours
-                FROM monthly_allocation_entries
-                WHERE project_id=%s AND iom_id=%s AND month_start=%s AND subproject_id=%s
-                ORDER BY user_ldap
-            """, [project_id, iom_id, billing_start, subproject_id])
-        else:
-            cur.execute("""
-                SELECT user_ldap, total_hours
-                FROM monthly_allocation_entries
-                WHERE project_id=%s AND iom_id=%s AND month_start=%s
-                ORDER BY user_ldap
-            """, [project_id, iom_id, billing_start])
-        allocations = cur.fetchall() or []
-
-    # Build excel workbook (uses openpyxl, as before)
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+    # allocations (respect subproject_id when present)
+    alloc_sql = """
+        SELECT user_ldap, total_hours
+        FROM monthly_allocation_entries
+        WHERE project_id=%s AND iom_id=%s AND month_start=%s
+    """
+    alloc_params = [project_id, iom_id, billing_start]
+    if subproject_id:
+        alloc_sql += " AND subproject_id=%s"
+        alloc_params.append(subproject_id)
+    alloc_sql += " ORDER BY user_ldap"
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Allocations"
-
-    header_font = Font(name="Calibri", bold=True, color="FFFFFF", size=11)
-    bold_font = Font(name="Calibri", bold=True, size=11)
-    normal_font = Font(name="Calibri", size=11)
-    center = Alignment(horizontal="center", vertical="center")
-    left = Alignment(horizontal="left", vertical="center")
-    right = Alignment(horizontal="right", vertical="center")
-    fill_blue = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    fill_gray = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
-    border = Border(left=Side(style="thin"), right=Side(style="thin"),
-                    top=Side(style="thin"), bottom=Side(style="thin"))
-
-    row_idx = 1
-    ws.merge_cells(start_row=row_idx, start_column=1, end_row=row_idx, end_column=3)
-    title_cell = ws.cell(row=row_idx, column=1, value="IOM Allocation Report")
-    title_cell.font = Font(name="Calibri", bold=True, size=14, color="FFFFFF")
-    title_cell.alignment = center
-    title_cell.fill = fill_blue
-    row_idx += 2
+    # Build excel workbook in write-only mode: rows are streamed to the file as they are
+    # appended instead of being kept as live cell objects
+    wb = Workbook(write_only=True)
+    _add_xl_named_styles(wb)
+    ws = wb.create_sheet("Allocations")
+
+    ws.merged_cells.add("A1:C1")
+    ws.append([_xl_write_only_cell(ws, "IOM Allocation Report", font=XL_TITLE_FONT,
+                                   alignment=XL_CENTER, fill=XL_FILL_BLUE)])
+    ws.append([])
 
     if iom:
         details = [
@@ -5141,33 +5594,24 @@ def export_allocations(request):
             ("Billing Month Start", billing_start.strftime("%Y-%m-%d") if billing_start else "")
         ]
         for k, v in details:
-            ws.cell(row=row_idx, column=1, value=k).font = bold_font
-            ws.cell(row=row_idx, column=2, value=v).font = normal_font
-            row_idx += 1
-        row_idx += 1
+            ws.append([_xl_write_only_cell(ws, k, font=XL_BOLD_FONT),
+                       _xl_write_only_cell(ws, v, font=XL_NORMAL_FONT)])
+        ws.append([])
 
     # header
-    ws.cell(row=row_idx, column=1, value="Resource").font = header_font
-    ws.cell(row=row_idx, column=2, value="Total Hours").font = header_font
-    # style header
-    for c in range(1, 3):
-        cell = ws.cell(row=row_idx, column=c)
-        cell.alignment = center
-        cell.fill = fill_blue
-        cell.font = header_font
-    row_idx += 1
+    ws.append([_xl_write_only_cell(ws, "Resource", style="xl_header"),
+               _xl_write_only_cell(ws, "Total Hours", style="xl_header")])
 
     # rows
-    for r in allocations:
-        uname = r[0] or ''
-        hrs = float(r[1] or 0.0)
-        ws.cell(row=row_idx, column=1, value=uname).font = normal_font
-        ws.cell(row=row_idx, column=2, value=hrs).font = normal_font
-        row_idx += 1
+    # rows are fetched from the server in batches and appended to the write-only
+    # sheet as they arrive, so the result set is never held in memory as a whole
+    with closing(iter_rows(alloc_sql, alloc_params)) as allocations:
+        for r in allocations:
+            ws.append([_xl_write_only_cell(ws, r[0] or '', font=XL_NORMAL_FONT),
+                       _xl_write_only_cell(ws, float(r[1] or 0.0), font=XL_NORMAL_FONT)])
 
     # finalize workbook into HttpResponse
-    from io import BytesIO
-    buf = BytesIO()
+    buf = io.BytesIO()
     wb.save(buf)
     buf.seek(0)
     filename = f"allocations_{project_id}_{iom_id}_{billing_start.strftime('%Y%m%d')}.xlsx" if billing_start else f"allocations_{project_id}_{iom_id}.xlsx"
@@ -5454,7 +5898,6 @@ from django.views.decorators.http import require_POST
 from django.http import JsonResponse
 from django.db import transaction, connection
 from datetime import date
-import json
 
 @require_POST
 def save_team_distribution(request):
@@ -5540,7 +5983,7 @@ def save_team_distribution(request):
                     # 2) compute sum of existing allocations for other users (those not being updated by this request)
                     params = [month_start, subproject_id] + lead_variants
                     if submitted_ldaps:
-                        placeholders = ",".join(["%s"] * len(submitted_ldaps))
+                        placeholders = _in_placeholders(len(submitted_ldaps))
                         cur.execute(f"""
                             SELECT COALESCE(SUM(mae.total_hours), 0)
                             FROM monthly_allocation_entries mae
@@ -5551,7 +5994,7 @@ def save_team_distribution(request):
                                   OR LOWER(REPLACE(mae.user_ldap, '.', ' ')) = LOWER(%s)
                                   OR LOWER(REPLACE(mae.user_ldap, ' ', '.')) = LOWER(%s)
                               )
-                              AND LOWER(mae.user_ldap) NOT IN ({placeholders})
+                              AND LOWER(mae.user_ldap) NOT IN {placeholders}
                         """, params + _lower_list(submitted_ldaps))
                         existing_others_sum = float(cur.fetchone()[0] or 0.0)
                         print("Existing others sum (excluding submitted):", existing_others_sum)
@@ -5828,11 +6271,11 @@ def apply_team_distributions_view(request):
             # Compute monthly_allocation_entries totals for these reportees
             reportee_monthly_totals = {}
             if reportees:
-                placeholders = ",".join(["%s"] * len(reportees))
+                placeholders = _in_placeholders(len(reportees))
                 q = f"""
                     SELECT LOWER(user_ldap) as user_ldap, COALESCE(SUM(total_hours),0) as total
                     FROM monthly_allocation_entries
-                    WHERE month_start = %s AND LOWER(user_ldap) IN ({placeholders})
+                    WHERE month_start = %s AND LOWER(user_ldap) IN {placeholders}
                     GROUP BY LOWER(user_ldap)
                 """
                 params = [month_start] + reportees
@@ -5843,11 +6286,11 @@ def apply_team_distributions_view(request):
             # Compute team_distributions totals per reportee (new state)
             td_totals = {}
             if reportees:
-                placeholders = ",".join(["%s"] * len(reportees))
+                placeholders = _in_placeholders(len(reportees))
                 q2 = f"""
                     SELECT LOWER(reportee_ldap) AS reportee, COALESCE(SUM(hours),0) AS ttotal
                     FROM team_distributions
-                    WHERE month_start = %s AND LOWER(reportee_ldap) IN ({placeholders})
+                    WHERE month_start = %s AND LOWER(reportee_ldap) IN {placeholders}
                     GROUP BY LOWER(reportee_ldap)
                 """
                 params2 = [month_start] + reportees
@@ -5909,7 +6352,6 @@ def apply_team_distributions_view(request):
 from django.views.decorators.http import require_POST
 from django.http import JsonResponse
 from django.db import connection
-import json, logging
 
 @require_POST
 def delete_team_distribution(request):
@@ -5958,7 +6400,6 @@ def delete_team_distribution(request):
 from django.shortcuts import render, redirect
 from django.db import connection
 from datetime import date
-import json
 
 def tl_allocations_view(request):
     """
@@ -6109,20 +6550,7 @@ def tl_allocations_view(request):
             break
 
     # Fetch holidays
-    with connection.cursor() as cur:
-        cur.execute(
-            "SELECT holiday_date FROM holidays WHERE holiday_date BETWEEN %s AND %s",
-            [billing_start, billing_end]
-        )
-        holidays_rows = cur.fetchall() or []
-    holidays_set = set()
-    for hr in holidays_rows:
-        try:
-            d = hr[0]
-        except Exception:
-            d = hr
-        if d:
-            holidays_set.add(d.strftime("%Y-%m-%d"))
+    holidays_set = {d.strftime("%Y-%m-%d") for d in _get_holidays(billing_start, billing_end)}
 
     # Total working days in billing
     total_working_days = sum(_count_working_days(w['start'], w['end'], holidays_set) for w in weeks) or 1
@@ -6181,15 +6609,9 @@ def tl_allocations_view(request):
         td_ids = [r["id"] for r in td_rows if r.get("id")]
         weekly_map = {}
         if td_ids:
-            placeholders = ",".join(["%s"] * len(td_ids))
-            cur.execute(f"""
-                SELECT team_distribution_id, week_number, percent
-                FROM weekly_allocations
-                WHERE team_distribution_id IN ({placeholders})
-            """, td_ids)
-            for w in dictfetchall(cur):
-                tid = int(w["team_distribution_id"])
-                weekly_map.setdefault(tid, {})[int(w["week_number"])] = float(w["percent"] or 0)
+            cur.execute(_sql_with_in(_SQL_TD_WEEK_PERCENTS, len(td_ids)), td_ids)
+            for tid, week_number, percent in cur.fetchall():
+                weekly_map.setdefault(int(tid), {})[int(week_number)] = float(percent or 0)
         cur.execute("""
             SELECT max_hours FROM monthly_hours_limit
             WHERE %s BETWEEN start_date AND end_date
@@ -6259,8 +6681,6 @@ def tl_allocations_view(request):
     })
 
 from django.views.decorators.http import require_POST
-import json
-import logging
 import calendar
 from datetime import date
 from django.http import JsonResponse
@@ -6448,11 +6868,11 @@ def save_tl_allocations(request):
 
                     # Remove any weekly_allocations not in provided weeks
                     if provided_week_numbers:
-                        placeholders = ",".join(["%s"] * len(provided_week_numbers))
+                        placeholders = _in_placeholders(len(provided_week_numbers))
                         delete_sql = f"""
                             DELETE FROM weekly_allocations
                             WHERE team_distribution_id = %s
-                              AND week_number NOT IN ({placeholders})
+                              AND week_number NOT IN {placeholders}
                         """
                         print(f"  Deleting weekly_allocations not in weeks: {provided_week_numbers}")
                         cur.execute(delete_sql, [tdid] + provided_week_numbers)
@@ -6555,16 +6975,9 @@ def export_tl_allocations_excel(request):
             td_ids = [r["td_id"] for r in allocations if r.get("td_id")]
             weekly_map = {}
             if td_ids:
-                placeholders = ",".join(["%s"] * len(td_ids))
-                q = f"""
-                    SELECT team_distribution_id, week_number, COALESCE(percent,0) as percent
-                    FROM weekly_allocations
-                    WHERE team_distribution_id IN ({placeholders})
-                """
-                cur.execute(q, td_ids)
-                for w in dictfetchall(cur):
-                    tid = int(w["team_distribution_id"])
-                    weekly_map.setdefault(tid, {})[int(w["week_number"])] = float(w["percent"] or 0)
+                cur.execute(_sql_with_in(_SQL_TD_WEEK_PERCENTS, len(td_ids)), td_ids)
+                for tid, week_number, percent in cur.fetchall():
+                    weekly_map.setdefault(int(tid), {})[int(week_number)] = float(percent or 0)
 
             # --- 4️⃣ Team lead details ---
             lead_candidates = [r.get("lead_ldap") for r in allocations if r.get("lead_ldap")]
@@ -6602,16 +7015,14 @@ def export_tl_allocations_excel(request):
 
     # --- 6️⃣ Workbook setup ---
     wb = openpyxl.Workbook()
+    _add_xl_named_styles(wb)
     ws = wb.active
     ws.title = "Summary"
 
-    fill_blue = PatternFill("solid", fgColor="1F6FEB")
-    white_font = Font(color="FFFFFF", bold=True)
     bold = Font(bold=True)
-    center = Alignment(horizontal="center", vertical="center")
-    left = Alignment(horizontal="left", vertical="center")
-    thin = Side(style="thin", color="CCCCCC")
-    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    center = XL_CENTER
+    left = XL_LEFT
+    border = XL_TL_BORDER
 
     # Title
     ws.merge_cells("A1:E1")
@@ -6643,10 +7054,7 @@ def export_tl_allocations_excel(request):
     for idx, h in enumerate(headers, 1):
         c = ws.cell(row=start_row, column=idx)
         c.value = h
-        c.fill = fill_blue
-        c.font = white_font
-        c.alignment = center
-        c.border = border
+        c.style = "tl_header"
 
     # Subproject data
     row = start_row + 1
@@ -6688,10 +7096,7 @@ def export_tl_allocations_excel(request):
     for idx, h in enumerate(headers, 1):
         c = ws2.cell(row=1, column=idx)
         c.value = h
-        c.fill = fill_blue
-        c.font = white_font
-        c.alignment = center
-        c.border = border
+        c.style = "tl_header"
 
     for r in allocations:
         tid = r["td_id"]
@@ -6747,7 +7152,7 @@ def get_user_email_from_session(request):
 def save_my_alloc_weekly(request):
     user_email = get_user_email_from_session(request)
     if not user_email:
-        return JsonResponse({'ok': False, 'error': 'not authenticated'}, status=403)
+        return fast_json({'ok': False, 'error': 'not authenticated'}, status=403)
     try:
         payload = json.loads(request.body.decode('utf-8'))
         allocation_id = int(payload.get('allocation_id'))
@@ -6755,7 +7160,7 @@ def save_my_alloc_weekly(request):
         hours = payload.get('allocated_hours', None)
         percent = payload.get('allocated_percent', None)
         if hours is None and percent is None:
-            return JsonResponse({'ok': False, 'error': 'nothing to save'}, status=400)
+            return fast_json({'ok': False, 'error': 'nothing to save'}, status=400)
 
         with transaction.atomic(), connection.cursor() as cur:
             # Upsert weekly_allocations as PENDING (so user can edit again)
@@ -6764,7 +7169,7 @@ def save_my_alloc_weekly(request):
                     INSERT INTO weekly_allocations (allocation_id, week_number, hours, percent, status, updated_at)
                     VALUES (%s,%s,%s,%s,'PENDING',NOW())
                     ON DUPLICATE KEY UPDATE hours=VALUES(hours), percent=VALUES(percent), status='PENDING', updated_at=NOW()
-                """, [allocation_id, week_number, str(Decimal(str(hours)).quantize(Decimal('0.01')) if hours != '' else '0.00'), (None if percent=='' else percent)])
+                """, [allocation_id, week_number, str(Decimal(str(hours)).quantize(_DCENT) if hours != '' else '0.00'), (None if percent=='' else percent)])
             else:
                 cur.execute("""
                     INSERT INTO weekly_allocations (allocation_id, week_number, hours, percent, status, updated_at)
@@ -6772,10 +7177,10 @@ def save_my_alloc_weekly(request):
                     ON DUPLICATE KEY UPDATE percent=VALUES(percent), status='PENDING', updated_at=NOW()
                 """, [allocation_id, week_number, (None if percent=='' else percent)])
 
-        return JsonResponse({'ok': True})
+        return fast_json({'ok': True})
     except Exception as e:
         logger.exception("save_my_alloc_weekly error: %s", e)
-        return JsonResponse({'ok': False, 'error': 'server error'}, status=500)
+        return fast_json({'ok': False, 'error': 'server error'}, status=500)
 
 # --- 3) Accept / Reject endpoint (single handler) ---
 
@@ -6796,7 +7201,7 @@ def save_vacation_view(request):
                 INSERT INTO user_vacations (user_email, billing_start, billing_end, hours, reason)
                 VALUES (%s,%s,%s,%s,%s)
                 ON DUPLICATE KEY UPDATE hours=VALUES(hours), reason=VALUES(reason), updated_at=NOW()
-            """, [user_email, billing_start, billing_end, str(Decimal(str(hours)).quantize(Decimal('0.01'))), reason[:2000]])
+            """, [user_email, billing_start, billing_end, str(Decimal(str(hours)).quantize(_DCENT)), reason[:2000]])
         return JsonResponse({'ok': True})
     except Exception as e:
         logger.exception("save_vacation_view error: %s", e)
@@ -7008,9 +7413,7 @@ def record_leave(request):
     db_leave_type = leave_type_mapping.get(leave_type, 'OTHER')
 
     # Get holidays in the range
-    with connection.cursor() as cur:
-        cur.execute("SELECT holiday_date FROM holidays WHERE holiday_date BETWEEN %s AND %s", [start_date, end_date])
-        holidays = {row[0] for row in cur.fetchall()}
+    holidays = set(_get_holidays(start_date, end_date))
 
     eligible_days = []
     skipped_days = []
@@ -7214,7 +7617,6 @@ from django.shortcuts import render, redirect
 from django.http import JsonResponse
 from django.db import connection, transaction
 from datetime import date
-import json
 
 from django.views.decorators.http import require_GET
 from django.shortcuts import render, redirect
@@ -7352,7 +7754,7 @@ def tl_punch_review(request):
     print("Month start for punch fetch:", canonical_month_start)
     punch_records = []
     if reportee_ldaps:
-        placeholders = ",".join(["%s"] * len(reportee_ldaps))
+        placeholders = _in_placeholders(len(reportee_ldaps))
         with connection.cursor() as cur:
             print(f"Running punch_data query for month_start={canonical_month_start} and reportees={reportee_ldaps}")
             cur.execute(f"""
@@ -7362,7 +7764,7 @@ def tl_punch_review(request):
                 FROM punch_data pd
                 LEFT JOIN projects p ON pd.project_id = p.id
                 LEFT JOIN subprojects sp ON pd.subproject_id = sp.id
-                WHERE pd.month_start = %s AND LOWER(pd.user_email) IN ({placeholders})
+                WHERE pd.month_start = %s AND LOWER(pd.user_email) IN {placeholders}
                 ORDER BY pd.user_email, pd.punch_date, pd.project_id, pd.subproject_id
             """, [canonical_month_start] + reportee_ldaps)
             columns = [col[0] for col in cur.description]
@@ -7379,7 +7781,7 @@ def tl_punch_review(request):
                 SELECT td.reportee_ldap, td.project_id, td.subproject_id, wa.week_number, wa.hours
                 FROM team_distributions td
                 JOIN weekly_allocations wa ON wa.team_distribution_id = td.id
-                WHERE td.month_start = %s AND LOWER(td.reportee_ldap) IN ({placeholders})
+                WHERE td.month_start = %s AND LOWER(td.reportee_ldap) IN {placeholders}
             """, [canonical_month_start] + reportee_ldaps)
             for row in cur.fetchall():
                 key = (
@@ -7397,18 +7799,8 @@ def tl_punch_review(request):
     def get_week_num(punch_date):
         return month_day_to_week_number_for_period(punch_date, billing_start, billing_end)
 
+    # Act. effort per (reportee, project, subproject, week), summed in the same pass
     act_effort_map = defaultdict(float)
-    for row in punch_records:
-        ldap = row["user_email"].lower()
-        week_number = get_week_num(row["punch_date"])
-        project_id = row.get("project_id")
-        subproject_id = row.get("subproject_id")
-        project = row.get("project_name") or "None"
-        subproject = row.get("subproject_name") or "None"
-        punched_hours = float(row.get("punched_hours") or 0)
-        act_effort_key = (ldap, project_id, subproject_id, week_number)
-        act_effort_map[act_effort_key] += punched_hours
-
     for row in punch_records:
         ldap = row["user_email"].lower()
         week_number = get_week_num(row["punch_date"])
@@ -7428,7 +7820,8 @@ def tl_punch_review(request):
             "subproject_id": subproject_id,
         }
         grouped[ldap][week_number][project][subproject].append(punch)
-        fte_totals[ldap] += float(row.get("punched_hours") or 0)
+        fte_totals[ldap] += punch["punched_hours"]
+        act_effort_map[(ldap, project_id, subproject_id, week_number)] += punch["punched_hours"]
 
     for ldap, weeks in grouped.items():
         for week_num, projects in weeks.items():
@@ -7514,7 +7907,7 @@ def tl_punch_review(request):
     # Get country code from session and check EU status
     country_code = request.session.get('country_code')
     is_eu_user = is_eu_country(country_code)
-    print("[my_allocations] country_code:", country_code, "is_eu_user:", is_eu_user)
+    logger.debug("[tl_punch_review] country_code: %s is_eu_user: %s", country_code, is_eu_user)
     week_days = []
     if selected_week and selected_week != "all":
         # Find the week object for the selected week
@@ -7579,7 +7972,6 @@ def tl_punch_approve(request):
 from django.views.decorators.http import require_POST
 from django.http import JsonResponse
 from django.db import connection, transaction
-import json
 
 @require_POST
 def tl_punch_bulk_approve(request):
@@ -7625,7 +8017,6 @@ def tl_punch_bulk_approve(request):
 
 from django.views.decorators.http import require_POST
 from django.http import JsonResponse
-import json
 
 @require_POST
 def punch_status_api(request):
@@ -7634,8 +8025,8 @@ def punch_status_api(request):
     if not punch_ids:
         return JsonResponse({'ok': False, 'error': 'No punch_ids'}, status=400)
     with connection.cursor() as cur:
-        placeholders = ','.join(['%s'] * len(punch_ids))
-        cur.execute(f"SELECT id, status FROM punch_data WHERE id IN ({placeholders})", punch_ids)
+        placeholders = _in_placeholders(len(punch_ids))
+        cur.execute(f"SELECT id, status FROM punch_data WHERE id IN {placeholders}", punch_ids)
         statuses = [{'punch_id': row[0], 'status': row[1]} for row in cur.fetchall()]
     return JsonResponse({'ok': True, 'statuses': statuses})
 
@@ -573,6 +573,9 @@ def import_master(request):
                 year_val = read_val(year_col)
                 seller_country_val = read_val(seller_country_col)
                 creator_val = read_val(creator_col)
+                if isinstance(creator_val, str):
+                    # stored trimmed so lookups can compare with "creator = %s" on the index
+                    creator_val = creator_val.strip() or None
                 date_created_val = read_val(date_created_col)
                 comment_val = read_val(comment_col)
                 buyer_bau_val = read_val(buyer_bau_col)
@@ -751,6 +754,11 @@ def holidays_add(request):
     with connection.cursor() as cur:
         cur.execute("INSERT INTO holidays (holiday_date, name, created_by) VALUES (%s,%s,%s)",
                     [d, name, request.user.email if request.user.is_authenticated else None])
+    from projects.views import HOLIDAYS_CACHE_KEY, cache
+    try:
+        cache.delete(HOLIDAYS_CACHE_KEY % int(d[:4]))
+    except ValueError:
+        pass
     return redirect(reverse("settings:settings_holidays"))
 
 
@@ -902,6 +910,8 @@ def save_monthly_hours(request):
     except Exception as ex:
         return JsonResponse({"ok": False, "error": str(ex)})
 
+    from projects.views import clear_billing_period_caches
+    clear_billing_period_caches()
     return JsonResponse({"ok": True, "year": year})
 
 